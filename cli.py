@@ -0,0 +1,296 @@
+""" Headless batch runner for the Pre OS / OS / Pre Perso / Perso pipeline
+
+Same semantics as the LOAD button of the GUI (PcscSimLink.run_script for every
+selected stage, in order), but driven from the command line and looping over
+cards with a CardHandler (manual insertion) or CardHandlerAuto (card feeder).
+PyQt6 is never imported on this path.
+
+Example:
+        python cli.py -p 0 --os os.txt --perso perso.txt -n 100
+"""
+
+import argparse
+import sys
+import time
+
+from connection import PcscSimLink, LOGS_PATH
+from log_sink import StreamSink, LEVELS
+from log_writer import LogWriter, FORMAT_TEXT, FORMAT_JSONL
+from pySim.card_handler import CardHandlerBase, CardHandler, CardHandlerAuto
+from pySim.exceptions import NoCardError
+from pySim.transport import argparse_add_pcsc_args, pcsc_protocol_arg
+from pySim.transport.replay import RecordingTracer
+from pySim.transport.stats import ApduStats
+from script_compiler import CardDataCsv
+
+# options run_batch() honours but the multi-reader engine does not
+ALL_READERS_UNSUPPORTED = [
+    ("pcsc_dev", "--pcsc-device"),
+    ("pcsc_protocol", "--pcsc-protocol"),
+    ("card_handler_config", "--card-handler"),
+    ("dry_run", "--dry-run"),
+    ("replay", "--replay"),
+    ("realtime", "--realtime"),
+    ("log_level", "--log-level"),
+    ("log_file", "--log-file"),
+    ("log_format", "--log-format"),
+    ("log_per_card", "--log-per-card"),
+    ("record", "--record"),
+    ("stats", "--stats"),
+]
+
+# (option, banner) in execution order
+STAGES = [
+    ("pre_os", "#=========================Pre OS Loaded ============================#"),
+    ("os", "#======================== OS Loaded =================================#"),
+    (
+        "pre_perso",
+        "#=========================Pre Perso Loaded ===========================#",
+    ),
+    (
+        "perso",
+        "#=========================Post Peros Loaded ============================#",
+    ),
+]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Load Pre OS / OS / Pre Perso / Perso scripts onto a batch of cards"
+    )
+    # cards are always accessed through PC/SC, see run_batch()
+    argparse_add_pcsc_args(parser)
+
+    stage_group = parser.add_argument_group("Scripts")
+    stage_group.add_argument(
+        "--pre-os", metavar="FILE", help="Pre OS (BL/RESTORE) script"
+    )
+    stage_group.add_argument("--os", metavar="FILE", help="OS script")
+    stage_group.add_argument("--pre-perso", metavar="FILE", help="Pre Perso script")
+    stage_group.add_argument("--perso", metavar="FILE", help="Perso script")
+
+    batch_group = parser.add_argument_group("Batch")
+    batch_group.add_argument(
+        "-n",
+        "--cards",
+        type=int,
+        default=1,
+        help="Number of cards to program (0 = until interrupted)",
+    )
+    batch_group.add_argument(
+        "--card-handler",
+        dest="card_handler_config",
+        metavar="FILE",
+        default=None,
+        help="Use automatic card handling machine with this YAML config",
+    )
+    batch_group.add_argument(
+        "--data",
+        metavar="FILE",
+        default=None,
+        help="CSV file with one row of ${NAME} script variables per card",
+    )
+    batch_group.add_argument(
+        "--all-readers",
+        action="store_true",
+        help="Program cards on all PC/SC readers in parallel",
+    )
+    batch_group.add_argument(
+        "--dry-run",
+        metavar="PROFILE",
+        choices=["uicc", "sim"],
+        default=None,
+        help="Run the scripts against an in-memory virtual card (uicc or sim)",
+    )
+    batch_group.add_argument(
+        "--replay",
+        metavar="FILE",
+        default=None,
+        help="Run the scripts against the responses of a recorded APDU trace",
+    )
+    batch_group.add_argument(
+        "--realtime",
+        action="store_true",
+        help="With --replay, answer at the recorded card latencies",
+    )
+
+    log_group = parser.add_argument_group("Logging")
+    log_group.add_argument(
+        "--log-level",
+        choices=list(LEVELS),
+        default="summary",
+        help="What is printed on the console",
+    )
+    log_group.add_argument(
+        "--log-file", metavar="FILE", default=LOGS_PATH, help="APDU log file"
+    )
+    log_group.add_argument(
+        "--log-format", choices=[FORMAT_TEXT, FORMAT_JSONL], default=FORMAT_TEXT
+    )
+    log_group.add_argument(
+        "--log-per-card",
+        action="store_true",
+        help="Rotate the APDU log file for every card",
+    )
+    log_group.add_argument(
+        "--record",
+        metavar="FILE",
+        default=None,
+        help="Record all APDUs with their responses and timing for --replay",
+    )
+    log_group.add_argument(
+        "--stats",
+        metavar="JSON",
+        nargs="?",
+        const="",
+        default=None,
+        help="Print per-instruction APDU latency statistics at the end, "
+        "optionally also written to a JSON report",
+    )
+    return parser
+
+
+def run_batch(opts, stages, data: CardDataCsv = None) -> int:
+    """Program opts.cards cards on a single reader; returns the number of failures."""
+    sink = StreamSink(LEVELS[opts.log_level])
+    log = LogWriter(
+        opts.log_file, fmt=opts.log_format, rotate_per_card=opts.log_per_card
+    )
+    tracer = RecordingTracer(opts.record) if opts.record else None
+    stats = ApduStats() if opts.stats is not None else None
+    if opts.dry_run:
+        # imported here, it pulls in the whole file system model
+        from dry_run import VirtualSimLink
+
+        scc = VirtualSimLink.from_name(
+            opts.dry_run,
+            textEdit=sink,
+            log_writer=log,
+            apdu_tracer=tracer,
+            apdu_stats=stats,
+        )
+        sink.summary("Using virtual %s card" % opts.dry_run.upper())
+    elif opts.replay:
+        from dry_run import ReplaySimLink
+
+        scc = ReplaySimLink(
+            opts.replay,
+            textEdit=sink,
+            log_writer=log,
+            realtime=opts.realtime,
+            loop=opts.cards != 1,
+            apdu_tracer=tracer,
+            apdu_stats=stats,
+        )
+        sink.summary("Replaying %s (%d records)" % (opts.replay, len(scc)))
+    else:
+        scc = PcscSimLink(
+            sink,
+            log_writer=log,
+            protocol=pcsc_protocol_arg(opts),
+            apdu_tracer=tracer,
+            apdu_stats=stats,
+        )
+        reader = scc.open_reader(opts.pcsc_dev or 0)
+        sink.summary("Using reader: %s" % reader)
+    scc.debug = False
+
+    if opts.dry_run or opts.replay:
+        ch = CardHandlerBase(scc)
+    elif opts.card_handler_config:
+        ch = CardHandlerAuto(scc, opts.card_handler_config)
+    else:
+        ch = CardHandler(scc)
+
+    ok_count = 0
+    fail_count = 0
+    start = time.perf_counter()
+    first = True
+    try:
+        while opts.cards == 0 or ok_count + fail_count < opts.cards:
+            if stats:
+                stats.idle()
+            try:
+                ch.get(first)
+            except NoCardError:
+                continue
+            # only take a data row once a card is actually there
+            variables = None
+            if data is not None:
+                variables = data.next_card()
+                if variables is None:
+                    sink.summary("No more card data in %s" % data.filename)
+                    break
+            if first:
+                sink.summary("Card protocol: T=%d" % scc.protocol)
+            first = False
+            log.new_card((variables or {}).get("ICCID", str(ok_count + fail_count + 1)))
+            ok = True
+            for path, banner in stages:
+                ok = scc.run_script(path, variables=variables)
+                if not ok:
+                    break
+                sink.summary(banner)
+            if ok:
+                ok_count += 1
+                ch.done()
+            else:
+                fail_count += 1
+                ch.error()
+            elapsed = time.perf_counter() - start
+            sink.summary(
+                "Card %d: %s (%d ok, %d failed, %.0f cards/hour)"
+                % (
+                    ok_count + fail_count,
+                    "OK" if ok else "FAILED",
+                    ok_count,
+                    fail_count,
+                    ok_count * 3600 / elapsed if elapsed > 0 else 0.0,
+                )
+            )
+    except KeyboardInterrupt:
+        sink.summary("Interrupted")
+    finally:
+        log.close()
+        if tracer:
+            tracer.close()
+        if stats:
+            print(stats.table())
+            if opts.stats:
+                stats.to_json(opts.stats)
+    return fail_count
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    opts = parser.parse_args(argv)
+    stages = [
+        (getattr(opts, name), banner) for name, banner in STAGES if getattr(opts, name)
+    ]
+    if not stages:
+        print("No script given, use --pre-os, --os, --pre-perso and/or --perso")
+        return 2
+
+    if opts.all_readers:
+        given = [
+            option
+            for dest, option in ALL_READERS_UNSUPPORTED
+            if getattr(opts, dest) != parser.get_default(dest)
+        ]
+        if given:
+            parser.error("--all-readers cannot be combined with %s" % ", ".join(given))
+        # imported here, the single reader path does not need it
+        import multi_reader
+
+        return multi_reader.main(
+            [path for path, _ in stages]
+            + (["--cards", str(opts.cards)] if opts.cards else [])
+            + (["--data", opts.data] if opts.data else [])
+        )
+
+    data = CardDataCsv(opts.data) if opts.data else None
+    return 1 if run_batch(opts, stages, data) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,10 +16,13 @@ from smartcard.Exceptions import (
 from smartcard.System import readers
 from pySim.exceptions import NoCardError, ProtocolError, ReaderError
 from pySim.transport import LinkBase
-from pySim.utils import h2i, i2h
+from pySim.transport.pcsc import pcsc_connect
 from functools import wraps
-from message import message
+from log_sink import LogSink
+from log_writer import LogWriter
+from script_compiler import compile_script, is_valid_apdu, OP_APDU, OP_RESET
 import time
+from typing import Optional
 
 LOGS_PATH = "logs.txt"
 
@@ -55,12 +58,170 @@ def str_2_apdu(apdu_str: str):
     return apdu_list
 
 
-class PcscSimLink(LinkBase):
+class ScriptRunner:
+    """run_script() front-end of a card link: executes script files with SW
+    checks, APDU log and console output.
+
+    Mixed into LinkBase subclasses, whose send_apdu_bytes(), reset_card(),
+    get_atr() and apdu_tracer it uses.  The link provides:
+
+        textEdit : console the script output goes to (a LogSink or the GUI
+                   text box)
+        log_writer : LogWriter of the APDU log, None for LOGS_PATH
+        debug : whether to echo every APDU on stdout as well
+    """
+
+    textEdit = None  # type: LogSink
+    log_writer = None  # type: Optional[LogWriter]
+    debug = False
+
+    def get_log_writer(self) -> LogWriter:
+        """Return the APDU log writer, starting the default one on first use."""
+        if self.log_writer is None:
+            self.log_writer = LogWriter(LOGS_PATH)
+        return self.log_writer
+
+    #    @staticmethod
+    def run_script(self, path, progress=None, variables=None) -> bool:
+        """Execute a script file against the connected card.
+
+        Args:
+                path : path of the script file
+                progress : optional callable(index, total) invoked after every
+                           APDU; returning False cancels the script
+                variables : dict of values for the ${NAME} placeholders
+        Returns:
+                True if the script ran to completion without SW mismatch
+        """
+        debug = self.debug
+        _ok = True
+
+        log_file = self.get_log_writer()
+        try:
+            start_time = time.perf_counter()
+            program = compile_script(path)
+            if program.slots:
+                program = program.bind(variables or {})
+            total = program.apdu_count
+            index = 0
+
+            for op in program.ops:
+                if op.opcode == OP_APDU:
+                    (data, sw) = self.send_apdu_bytes(op.apdu)
+                    # hex only at the display and log edges
+                    response = data.hex().upper()
+                    sw = "%04X" % sw
+                    log_file.apdu(op.text, response, sw, op.sw or "")
+
+                    cmd = f"CMD: {op.text}"
+                    res = f"RES: [{response}]"
+                    res_verify = "SW: {} Expected: {}".format(sw, op.sw or "")
+
+                    if debug:
+                        print(cmd)
+                        print(res)
+                        print(res_verify)
+
+                    self.textEdit.append(cmd)
+                    self.textEdit.append(res)
+                    self.textEdit.append(res_verify)
+                    self.textEdit.append("")
+
+                    # the log writer records a mismatch along with the APDU
+                    _ok = self.error_check(sw, op.sw or "", op.sw is not None)
+                    if not _ok:
+                        break
+
+                    index += 1
+                    if progress and progress(index, total) is False:
+                        _ok = False
+                        self.textEdit.summary(f"Script({path}) cancelled")
+                        break
+
+                elif op.opcode == OP_RESET:
+                    if self.reset_card():
+                        response = self.get_atr()
+                        if self.apdu_tracer:
+                            self.apdu_tracer.trace_reset(response)
+                        cmd = f"CMD: {op.text}"
+                        res = f"ATR: {self.dec_list_2_hex_str(response)}"
+
+                        log_file.write(cmd + "\n" + res + "\n")
+
+                        if debug:
+                            print(cmd)
+                            print("CARD RESET")
+                            print(res)
+
+                        self.textEdit.append(cmd)
+                        self.textEdit.append(res)
+                        self.textEdit.append("")  # for spare line
+
+                else:
+                    cmd = f"CMD: {op.text} [INVALID]"
+
+                    log_file.write(cmd + "\n")
+
+                    if debug:
+                        print(cmd)
+                        print("")
+
+                    self.textEdit.append(cmd)
+                    self.textEdit.append("")  # for spare line
+
+            end_time = time.perf_counter()
+            execution_time = end_time - start_time
+            self.textEdit.summary(f"Script({path}) Took {execution_time:.4f} seconds\n")
+        #            log_file.write(f'Script({path}) Took {execution_time:.4f} seconds\n')
+
+        except Exception as e:
+            self.textEdit.error(str(e))
+            return False
+        finally:
+            log_file.flush()
+
+        return _ok
+
+    def error_check(
+        self, sw: str, resp_2_verify: str, error_flag: bool, log=None
+    ) -> bool:
+        if error_flag is True:
+            if sw.upper() == resp_2_verify.upper():
+                return True
+            else:
+                error = "ERROR ! Response: {} Expected: {}".format(sw, resp_2_verify)
+                if log is not None:
+                    log.write(error + "\n")
+                self.textEdit.error(error)
+                return False
+
+        else:
+            return True
+
+    def dec_list_2_hex_str(self, dec_list):
+        string = " ".join(list(map(lambda x: format(x, "02X").upper(), dec_list)))
+        return string
+
+
+class PcscSimLink(ScriptRunner, LinkBase):
     """pySim: PCSC reader transport link."""
 
-    def __init__(self, textEdit=None, **kwargs):
+    # echo every APDU of run_script on stdout
+    debug = True
+
+    def __init__(
+        self,
+        textEdit=None,
+        log_writer: LogWriter = None,
+        protocol: Optional[int] = None,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
-        self.textEdit = textEdit
+        # None = negotiate (T=1 if the ATR offers it), 0 = T=0, 1 = T=1
+        self.preferred_protocol = protocol
+        self.protocol = 0
+        self.textEdit = textEdit if textEdit is not None else LogSink()
+        self.log_writer = log_writer
         self.r = readers()
         self.refresh_hid_list()
 
@@ -86,15 +247,21 @@ class PcscSimLink(LinkBase):
             raise NoCardError()
         return self.r
 
+    def open_reader(self, reader_number: int = 0):
+        """Bind this link to a reader without connecting to the card."""
+        if reader_number >= len(self.r):
+            raise ReaderError("No reader found for number %d" % reader_number)
+        self._reader = self.r[reader_number]
+        self._con = self._reader.createConnection()
+        return self._reader
+
     def custom_connect(self, reader_number: int = 0):
         try:
             #            self.disconnect()
             #            r = readers()
-            if reader_number >= len(self.r):
-                raise ReaderError("No reader found for number %d" % reader_number)
-            self._reader = self.r[reader_number]
-            self._con = self._reader.createConnection()
-            self._con.connect(CardConnection.T0_protocol)
+            self.open_reader(reader_number)
+            self.protocol = pcsc_connect(self._con, self.preferred_protocol)
+            self.connect_count += 1
             return True
         except CardConnectionException as e:
             return e
@@ -119,13 +286,18 @@ class PcscSimLink(LinkBase):
             # is disconnected
             self.disconnect()
 
-            # Explicitly select T=0 communication protocol
-            self._con.connect(CardConnection.T0_protocol)
+            self.protocol = pcsc_connect(self._con, self.preferred_protocol)
+            self.connect_count += 1
         except CardConnectionException:
             raise ProtocolError()
         except NoCardException:
             raise NoCardError()
 
+    @property
+    def extended_length(self):
+        # extended APDUs are only carried by T=1
+        return self.protocol == 1
+
     def get_atr(self):
         return self._con.getATR()
 
@@ -137,15 +309,13 @@ class PcscSimLink(LinkBase):
         self.connect()
         return 1
 
-    def _send_apdu_raw(self, pdu):
-        apdu = h2i(pdu)
-
-        data, sw1, sw2 = self._con.transmit(apdu)
-
-        sw = [sw1, sw2]
+    def _send_apdu_bytes(self, apdu: bytes):
+        data, sw1, sw2 = self._con.transmit(list(apdu))
+        return bytes(data), (sw1 << 8) | sw2
 
-        # Return value
-        return i2h(data), i2h(sw)
+    def _send_apdu_raw(self, pdu):
+        data, sw = self._send_apdu_bytes(bytes.fromhex(pdu))
+        return data.hex(), "%04x" % sw
 
     # @staticmethod
     # def calculate_something(num, text_edit):
@@ -156,142 +326,9 @@ class PcscSimLink(LinkBase):
     #     text_edit.append(f'Function calculate_something({num}) Took {execution_time:.4f} seconds')
     #     return total
 
-    #    @staticmethod
-    def run_script(self, path):
-        debug = True
-
-        try:
-            start_time = time.perf_counter()
-            with open(path, "r") as f:
-                apdu_commands = f.readlines()
-
-            with open(LOGS_PATH, "a+") as log_file:
-                _ok = True
-                for command in apdu_commands:
-                    if _ok is True:
-                        command = command.replace("\n", "")
-                        command = command.replace(" ", "")  # to remove spaces
-                        if command == "":
-                            pass
-                        else:
-                            if (
-                                command.startswith("#")
-                                or command.startswith("//")
-                                or command.startswith("/")
-                            ):
-                                pass
-                            else:
-                                if self.is_valid_apdu(command):
-                                    (
-                                        command,
-                                        resp_2_verify,
-                                        error_flag,
-                                    ) = self.break_cmd_res_sw(command)
-
-                                    (response, sw) = self.send_apdu(command)
-                                    response = response.upper()
-                                    sw = sw.upper()
-
-                                    cmd = f"CMD: {command.strip()}"
-                                    res = f"RES: [{response}]"
-                                    #                                    sw_disp=f"SW: {sw}"
-                                    res_verify = "SW: {} Expected: {}".format(
-                                        sw, resp_2_verify
-                                    )
-                                    log_file.write(cmd + "\n")
-                                    log_file.write(res + "\n")
-                                    log_file.write(res_verify + "\n")
-                                    log_file.write("\n")
-
-                                    if debug:
-                                        print(cmd)
-                                        print(res)
-                                        print(res_verify)
-
-                                    self.textEdit.append(cmd)
-                                    self.textEdit.append(res)
-                                    self.textEdit.append(res_verify)
-                                    self.textEdit.append("")
-
-                                    _ok = self.error_check(
-                                        sw, resp_2_verify, error_flag, log_file
-                                    )
-                                    log_file.write("\n")
-
-                                elif (
-                                    command.lower() == "reset"
-                                    or command.lower() == "rst"
-                                ):
-                                    if self.reset_card():
-                                        response = self.get_atr()
-                                        cmd = f"CMD: {command.strip()}"
-                                        res = (
-                                            f"ATR: {self.dec_list_2_hex_str(response)}"
-                                        )
-
-                                        log_file.write(cmd + "\n")
-                                        log_file.write(res + "\n")
-                                        log_file.write("\n")
-
-                                        if debug:
-                                            print(cmd)
-                                            print("CARD RESET")
-                                            print(res)
-
-                                        self.textEdit.append(cmd)
-                                        self.textEdit.append(res)
-                                        self.textEdit.append("")  # for spare line
-
-                                else:
-                                    cmd = f"CMD: {command.strip()} [INVALID]"
-
-                                    log_file.write(cmd + "\n")
-                                    log_file.write("\n")
-
-                                    if debug:
-                                        print(cmd)
-                                        print("")
-
-                                    self.textEdit.append(cmd)
-                                    self.textEdit.append("")  # for spare line
-
-                end_time = time.perf_counter()
-                execution_time = end_time - start_time
-                self.textEdit.append(
-                    f"Script({path}) Took {execution_time:.4f} seconds\n"
-                )
-        #                log_file.write(f'Script({path}) Took {execution_time:.4f} seconds\n')
-
-        except Exception as e:
-            self.textEdit.append(str(e))
-            pass
-
-    def error_check(self, sw: str, resp_2_verify: str, error_flag: bool, log) -> bool:
-        if error_flag is True:
-            if sw.upper() == resp_2_verify.upper():
-                return True
-            else:
-                error = "ERROR ! Response: {} Expected: {}".format(sw, resp_2_verify)
-                message.Show_message_box(
-                    "Error", "Error", "Error loading Script {}!".format(error)
-                )
-                print(error)
-                log.write(error)
-                self.textEdit.append(error)
-                return False
-
-        else:
-            return True
-
     # apdu_command="A02000020830303031FFFFFFFF"
     def is_valid_apdu(self, apdu_command):
-        if len(apdu_command) % 2 != 0 or not all(
-            c in "0123456789ABCDEFSW" for c in apdu_command
-        ):  # and (len(apdu_command)!=0):#and apdu_size_check(apdu_command)#:
-            return False
-        if len(apdu_command) < 10:
-            return False
-        return True
+        return is_valid_apdu(apdu_command)
 
     def header(self, log_file):
         log_file.write("#======================================================#\n")
@@ -322,10 +359,6 @@ class PcscSimLink(LinkBase):
             res = ""
             return cmd, res, error_flag
 
-    def dec_list_2_hex_str(self, dec_list):
-        string = " ".join(list(map(lambda x: format(x, "02X").upper(), dec_list)))
-        return string
-
 
 # scc=PcscSimLink()
 # # #scc.connect()
@@ -0,0 +1,56 @@
+""" Script dry-run against an in-memory virtual card or a recorded trace
+
+VirtualSimLink puts connection.ScriptRunner, the script runner of PcscSimLink, on
+pySim.transport.virtual.VirtualCardLink: scripts are executed with the same
+run_script() semantics, logging and SW checks, but without a reader.  Use it
+to validate scripts and to benchmark everything above the transport.
+
+ReplaySimLink does the same on top of pySim.transport.replay.ReplayLink,
+serving the responses of a trace recorded with cli.py --record.
+
+Example:
+        python cli.py --dry-run uicc --os os.txt --perso perso.txt
+        python cli.py --replay card.trace --os os.txt --perso perso.txt
+"""
+
+from connection import ScriptRunner
+from log_sink import LogSink
+from log_writer import LogWriter
+from pySim.transport.replay import ReplayLink
+from pySim.transport.virtual import VirtualCardLink
+
+
+def _profile(name: str):
+    if name == "sim":
+        from pySim.ts_51_011 import CardProfileSIM
+
+        return CardProfileSIM()
+    from pySim.ts_102_221 import CardProfileUICC
+
+    return CardProfileUICC()
+
+
+PROFILES = ["uicc", "sim"]
+
+
+class VirtualSimLink(ScriptRunner, VirtualCardLink):
+    """Virtual card link with the run_script() front-end of ScriptRunner."""
+
+    def __init__(self, mf, textEdit=None, log_writer: LogWriter = None, **kwargs):
+        super().__init__(mf, **kwargs)
+        self.textEdit = textEdit if textEdit is not None else LogSink()
+        self.log_writer = log_writer
+
+    @classmethod
+    def from_name(cls, name: str = "uicc", **kwargs) -> "VirtualSimLink":
+        """Build a virtual card from one of PROFILES."""
+        return cls.from_profile(_profile(name), **kwargs)
+
+
+class ReplaySimLink(ScriptRunner, ReplayLink):
+    """Replay link with the run_script() front-end of ScriptRunner."""
+
+    def __init__(self, path, textEdit=None, log_writer: LogWriter = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.textEdit = textEdit if textEdit is not None else LogSink()
+        self.log_writer = log_writer
@@ -387,9 +387,9 @@ class Ui_MainWindow(object):
         self.gridLayout_7 = QtWidgets.QGridLayout(self.frame_3)
         self.gridLayout_7.setContentsMargins(-1, -1, 20, -1)
         self.gridLayout_7.setObjectName("gridLayout_7")
-        self.textEdit = QtWidgets.QTextEdit(parent=self.frame_3)
+        self.textEdit = QtWidgets.QPlainTextEdit(parent=self.frame_3)
         self.textEdit.setStyleSheet(
-            "QTextEdit{\n"
+            "QPlainTextEdit{\n"
             "background-color: rgba(63,64,66,255);\n"
             'font: 550 9pt "Segoe UI";\n'
             "color:White;\n"
@@ -397,7 +397,7 @@ class Ui_MainWindow(object):
             "border:2px solid black;\n"
             "}"
         )
-        self.textEdit.setLineWrapMode(QtWidgets.QTextEdit.LineWrapMode.NoWrap)
+        self.textEdit.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
         self.textEdit.setReadOnly(True)
         self.textEdit.setTextInteractionFlags(
             QtCore.Qt.TextInteractionFlag.LinksAccessibleByKeyboard
@@ -406,6 +406,7 @@ class Ui_MainWindow(object):
             | QtCore.Qt.TextInteractionFlag.TextSelectableByKeyboard
             | QtCore.Qt.TextInteractionFlag.TextSelectableByMouse
         )
+        self.textEdit.setMaximumBlockCount(20000)
         self.textEdit.setObjectName("textEdit")
         self.gridLayout_7.addWidget(self.textEdit, 0, 0, 1, 1)
         self.gridLayout_2.addWidget(self.frame_3, 0, 1, 1, 1)
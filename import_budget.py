@@ -0,0 +1,196 @@
+""" Import time regression benchmark of the script loading entry points
+
+Imports every entry point in a fresh interpreter started with
+python -X importtime, and checks that
+
+ - the cumulative import time stays within the budget, and
+ - none of the heavy modules deferred to first use (the EF model, pySim.cat,
+   construct, Cryptodome, yaml, pytlv, ...) gets imported on the way.
+
+With --script, compiling the given script files after importing connection
+is checked the same way, as this is what the GUI and cli.py do before the
+first APDU goes out.  The exit code is 1 if any check fails.
+
+Example:
+        python import_budget.py --script scripts/os.txt --budget 150
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, NamedTuple, Optional
+
+# modules the plain script path must not import
+DEFERRED = [
+    "pySim.filesystem",
+    "pySim.ts_",
+    "pySim.cards",
+    "pySim.cat",
+    "pySim.tlv",
+    "pySim.construct",
+    "construct",
+    "gsm0338",
+    "bidict",
+    "Cryptodome",
+    "yaml",
+    "pytlv",
+]
+
+# entry point -> modules it additionally must not import
+ENTRY_POINTS = {
+    "connection": [],
+    "script_compiler": [],
+    "cli": ["PyQt6"],
+}
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ImportRecord(NamedTuple):
+    """One line of python -X importtime output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parse the 'import time:' lines written to stderr by -X importtime."""
+    records = []  # type: List[ImportRecord]
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                stripped,
+                int(fields[0]),
+                int(fields[1]),
+                (len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def measure(code: str) -> List[ImportRecord]:
+    """Run code in a fresh interpreter and return its import records."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if proc.returncode:
+        raise RuntimeError("'%s' failed:\n%s" % (code, proc.stderr[-2000:]))
+    return parse_importtime(proc.stderr)
+
+
+def total_ms(records: List[ImportRecord]) -> float:
+    return sum(r.cumulative_us for r in records if r.depth == 0) / 1000
+
+
+def _matches(module: str, pattern: str) -> bool:
+    """A pattern names a module and its submodules, or with a trailing '_'
+    all modules starting with it (pySim.ts_ = pySim.ts_51_011, ...)."""
+    if pattern.endswith("_"):
+        return module.startswith(pattern)
+    return module == pattern or module.startswith(pattern + ".")
+
+
+def forbidden(records: List[ImportRecord], extra: List[str]) -> List[str]:
+    """Modules of records that are in DEFERRED or extra."""
+    return [
+        r.module
+        for r in records
+        if any(_matches(r.module, p) for p in DEFERRED + extra)
+    ]
+
+
+def check(
+    name: str,
+    code: str,
+    extra: List[str],
+    budget: Optional[float],
+    repeat: int,
+    top: int,
+) -> bool:
+    """Measure code repeat times, print a report and return whether it passed."""
+    runs = [measure(code) for _ in range(repeat)]
+    # the fastest run is the one least disturbed by the rest of the machine
+    best = min(runs, key=total_ms)
+    ms = total_ms(best)
+    bad = forbidden(best, extra)
+    ok = not bad and (budget is None or ms <= budget)
+
+    print(
+        "%-30s %8.1f ms %4d modules  %s"
+        % (name, ms, len(best), "OK" if ok else "FAILED")
+    )
+    for r in sorted(best, key=lambda r: r.self_us, reverse=True)[:top]:
+        print("    %8.1f ms  %s" % (r.self_us / 1000, r.module))
+    if budget is not None and ms > budget:
+        print("    over budget of %.1f ms" % budget)
+    if bad:
+        print("    imports deferred modules: %s" % ", ".join(bad))
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check import time and imported modules of the script loading path"
+    )
+    parser.add_argument(
+        "--script",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help="Also check compiling this script file (may be given repeatedly)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="Maximum cumulative import time per entry point in ms",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Measure every entry point this many times, keep the fastest",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="Show this many modules with the highest self import time",
+    )
+    opts = parser.parse_args(argv)
+
+    ok = True
+    for name, extra in ENTRY_POINTS.items():
+        ok &= check(name, "import %s" % name, extra, opts.budget, opts.repeat, opts.top)
+    for path in opts.script:
+        code = (
+            "import connection, script_compiler; "
+            "script_compiler.compile_script(%r)" % os.path.abspath(path)
+        )
+        ok &= check(
+            "connection + %s" % os.path.basename(path),
+            code,
+            [],
+            opts.budget,
+            opts.repeat,
+            opts.top,
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+""" Console view for a LogSink
+
+Flushes the lines of a LogSink into a QPlainTextEdit in chunks, at most
+max_fps times per second.  The widget is capped by its maximumBlockCount, so
+appending stays cheap no matter how large the OS image is.
+"""
+
+from PyQt6.QtCore import QObject, QTimer
+
+from log_sink import LogSink
+
+DEFAULT_MAX_FPS = 10
+DEFAULT_CHUNK_LINES = 2000
+DEFAULT_MAX_BLOCKS = 20000
+
+
+class LogConsole(QObject):
+    """Render a LogSink into a QPlainTextEdit on a timer tick."""
+
+    def __init__(
+        self,
+        view,
+        sink: LogSink,
+        max_fps: int = DEFAULT_MAX_FPS,
+        chunk_lines: int = DEFAULT_CHUNK_LINES,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+    ):
+        super().__init__(view)
+        self.view = view
+        self.sink = sink
+        self.chunk_lines = chunk_lines
+        self.view.setMaximumBlockCount(max_blocks)
+        self.timer = QTimer(self)
+        self.timer.setInterval(max(1, 1000 // max_fps))
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def flush(self):
+        """Move at most chunk_lines lines from the sink into the view."""
+        lines = self.sink.drain(self.chunk_lines)
+        if lines:
+            self.view.appendPlainText("\n".join(lines))
+
+    def clear(self):
+        self.sink.drain()
+        self.view.clear()
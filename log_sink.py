@@ -0,0 +1,90 @@
+""" Console log sink
+
+Bounded, thread safe ring buffer for console lines.  Producers (the script
+worker, the CLI) push lines tagged with a level; lines below the configured
+display level are dropped on push, so they never get rendered at all.  The
+consumer drains the buffer in chunks (see log_console.LogConsole).
+
+Levels:
+        VERBOSE : APDU traffic (CMD / RES / SW lines)
+        SUMMARY : stage banners, timing and connection messages
+        ERROR   : SW mismatches and exceptions
+"""
+
+import sys
+import threading
+from collections import deque
+from typing import List
+
+VERBOSE = 0
+SUMMARY = 1
+ERROR = 2
+
+LEVELS = {"verbose": VERBOSE, "summary": SUMMARY, "errors": ERROR}
+
+DEFAULT_MAX_LINES = 50000
+
+
+class LogSink:
+    """Ring buffer of console lines, drop-in for QTextEdit.append()."""
+
+    def __init__(self, level: int = VERBOSE, max_lines: int = DEFAULT_MAX_LINES):
+        self.level = level
+        self._lines = deque(maxlen=max_lines)
+        self._pushed = 0
+        self._drained = 0
+        # guards the buffer and both counters between producer and consumer
+        self._lock = threading.Lock()
+
+    def set_level(self, level):
+        """Set the display level, either as int or as name from LEVELS."""
+        if isinstance(level, str):
+            level = LEVELS[level]
+        self.level = level
+
+    def append(self, line: str, level: int = VERBOSE):
+        if level >= self.level:
+            with self._lock:
+                self._lines.append(line)
+                self._pushed += 1
+
+    def summary(self, line: str):
+        self.append(line, SUMMARY)
+
+    def error(self, line: str):
+        self.append(line, ERROR)
+
+    def drain(self, max_lines: int = None) -> List[str]:
+        """Pop up to max_lines buffered lines (all if None).
+
+        If the buffer overflowed since the last drain, a marker line with the
+        number of dropped lines is put in front."""
+        lines = []
+        with self._lock:
+            dropped = self._pushed - self._drained - len(self._lines)
+            if dropped > 0:
+                lines.append(f"... {dropped} lines dropped ...")
+                self._drained += dropped
+            popleft = self._lines.popleft
+            try:
+                while max_lines is None or len(lines) < max_lines:
+                    lines.append(popleft())
+                    self._drained += 1
+            except IndexError:
+                pass
+        return lines
+
+    def __len__(self):
+        return len(self._lines)
+
+
+class StreamSink(LogSink):
+    """Sink writing lines straight to a stream (stdout by default), for headless use."""
+
+    def __init__(self, level: int = VERBOSE, stream=None):
+        super().__init__(level, max_lines=1)
+        self.stream = stream if stream is not None else sys.stdout
+
+    def append(self, line: str, level: int = VERBOSE):
+        if level >= self.level:
+            self.stream.write(line + "\n")
@@ -0,0 +1,197 @@
+""" Asynchronous APDU log writer
+
+The transmit path only puts a tuple on a queue; formatting and disk I/O
+happen on a background thread that writes through a large buffer.  The log
+file is rotated by size and, optionally, for every new card, keeping
+backup_count old files (logs.txt.1 is the most recent one), or all of them
+numbered in the order they were written (logs.txt.1 is the oldest one).
+
+Two formats are supported:
+        "text"  : the classic CMD / RES / SW layout of logs.txt
+        "jsonl" : one compact JSON object per line
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+FORMAT_TEXT = "text"
+FORMAT_JSONL = "jsonl"
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 10
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# flush the file buffer after the queue was idle for this long (seconds)
+FLUSH_INTERVAL = 1.0
+
+_APDU = 0
+_TEXT = 1
+_CARD = 2
+_FLUSH = 3
+
+
+class LogWriter:
+    """Background thread writing APDU logs to a rotating file."""
+
+    def __init__(
+        self,
+        path: str,
+        fmt: str = FORMAT_TEXT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: Optional[int] = DEFAULT_BACKUP_COUNT,
+        rotate_per_card: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        """
+        Args:
+                path : path of the log file
+                fmt : FORMAT_TEXT or FORMAT_JSONL
+                max_bytes : rotate once the file exceeds this size (0 = never)
+                backup_count : number of rotated files to keep (None = all)
+                rotate_per_card : start a new file on every new_card() call
+                buffer_size : size of the file write buffer
+        """
+        if fmt not in (FORMAT_TEXT, FORMAT_JSONL):
+            raise ValueError("Unknown log format '%s'" % fmt)
+        self.path = path
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_per_card = rotate_per_card
+        self.buffer_size = buffer_size
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._size = 0
+        self._cards = 0
+        self._next_backup = 1
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # producer side, called from the transmit path
+
+    def apdu(self, cmd: str, res: str, sw: str, expected: str = ""):
+        """Log one command APDU together with response data, SW and expected SW.
+
+        A SW differing from a non-empty expected SW is logged as an error."""
+        self._queue.put((_APDU, time.time(), cmd, res, sw, expected))
+
+    def write(self, text: str):
+        """Log a free-form line (reset/ATR, errors, ...)."""
+        self._queue.put((_TEXT, time.time(), text))
+
+    def new_card(self, label: str = ""):
+        """Mark the start of a new card; rotates the file if rotate_per_card."""
+        self._queue.put((_CARD, time.time(), label))
+
+    def flush(self, wait: bool = False):
+        """Ask the writer thread to flush; optionally block until it did."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, time.time(), done))
+        if wait:
+            done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # writer thread
+
+    def _open(self):
+        self._file = open(self.path, "a", buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self.backup_count is None:
+            # keep everything, never overwrite the files of an earlier run
+            while os.path.exists("%s.%d" % (self.path, self._next_backup)):
+                self._next_backup += 1
+            if os.path.exists(self.path):
+                os.replace(self.path, "%s.%d" % (self.path, self._next_backup))
+                self._next_backup += 1
+        elif self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = "%s.%d" % (self.path, i)
+                if os.path.exists(src):
+                    os.replace(src, "%s.%d" % (self.path, i + 1))
+            if os.path.exists(self.path):
+                os.replace(self.path, self.path + ".1")
+        else:
+            # no backups: just truncate
+            open(self.path, "w").close()
+        self._open()
+
+    def _format(self, item) -> str:
+        kind, ts = item[0], item[1]
+        if self.fmt == FORMAT_JSONL:
+            if kind == _APDU:
+                rec = {"ts": ts, "cmd": item[2], "res": item[3], "sw": item[4]}
+                if item[5]:
+                    rec["exp"] = item[5]
+            elif kind == _TEXT:
+                rec = {"ts": ts, "text": item[2]}
+            else:
+                rec = {"ts": ts, "card": item[2]}
+            return json.dumps(rec, separators=(",", ":")) + "\n"
+
+        if kind == _APDU:
+            text = "CMD: %s\nRES: [%s]\nSW: %s Expected: %s\n\n" % item[2:6]
+            if item[5] and item[4].upper() != item[5].upper():
+                text += "ERROR ! Response: %s Expected: %s\n" % (item[4], item[5])
+            return text + "\n"
+        elif kind == _TEXT:
+            return item[2] + "\n"
+        return "#=== CARD %d %s ===#\n" % (self._cards, item[2])
+
+    def _write(self, item):
+        if item[0] == _CARD:
+            self._cards += 1
+            if self.rotate_per_card and self._size > 0:
+                self._rotate()
+        text = self._format(item)
+        if self.max_bytes and self._size + len(text) > self.max_bytes and self._size:
+            self._rotate()
+        if self._file is None:
+            # a previous rotation failed half way, try again with a fresh file
+            self._open()
+        self._file.write(text)
+        self._size += len(text)
+
+    def _flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def _run(self):
+        try:
+            self._open()
+        except OSError as e:
+            print("Error opening log file %s: %s" % (self.path, e))
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = (_FLUSH, time.time(), None)
+            if item is None:
+                break
+            # never take down the transmit path (or a flush() waiting for
+            # this thread) because of the log
+            try:
+                if item[0] == _FLUSH:
+                    self._flush()
+                else:
+                    self._write(item)
+            except Exception as e:
+                print("Error writing log file %s: %s" % (self.path, e))
+            finally:
+                if item[0] == _FLUSH and item[2] is not None:
+                    item[2].set()
+        if self._file is not None:
+            self._file.close()
@@ -3,11 +3,25 @@ import time
 import os
 import sys
 from connection import PcscSimLink
+from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QApplication, QMainWindow, QFileDialog, QTextEdit
+from PyQt6.QtWidgets import (
+    QApplication,
+    QMainWindow,
+    QFileDialog,
+    QComboBox,
+    QPushButton,
+    QHBoxLayout,
+)
 from forms.main_ui import Ui_MainWindow
+from message import message
+from worker import ScriptWorker
+from log_sink import LogSink, LEVELS
+from log_console import LogConsole
+from multi_reader import MultiReaderEngine
 
 debug = False
+STATUS_REFRESH_MS = 100
 from connection import PcscSimLink
 
 
@@ -21,13 +35,11 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(QIcon("resources\\stc_logo.ico"))
         self.ui.reader_refresh.setIcon(QIcon("resources\\refresh.ico"))
         self.ui.reader_connection.setIcon(QIcon("resources\\connect.ico"))
-        self.ui.textEdit.setLineWrapMode(
-            QTextEdit.LineWrapMode.NoWrap
-        )  # Commenting this line removes the delay
-
         self.showMaximized()
         #        self.con=CardConnection()
-        self.scc = PcscSimLink(self.ui.textEdit)
+        self.console_sink = LogSink()
+        self.console = LogConsole(self.ui.textEdit, self.console_sink)
+        self.scc = PcscSimLink(self.console_sink)
         self.devices = self.scc.refresh_hid_list()
 
         #        scc.connect_to_reader()
@@ -48,6 +60,33 @@ class MainWindow(QMainWindow):
         #        self.ui.reader_refresh.clicked.connect(self.refresh_hid_list)
 
         self.ui.load_button.clicked.connect(self.loadFile)
+
+        self.worker = None
+        self.engine = None
+        self._progress = None
+        self._error = None
+        self.cancel_button = QPushButton("CANCEL", parent=self.ui.frame_4)
+        self.pause_button = QPushButton("PAUSE", parent=self.ui.frame_4)
+        self.load_all_button = QPushButton("LOAD ALL READERS", parent=self.ui.frame_4)
+        self.cancel_button.setEnabled(False)
+        self.pause_button.setEnabled(False)
+        self.level_comboBox = QComboBox(parent=self.ui.frame_4)
+        self.level_comboBox.addItems(list(LEVELS))
+        self.level_comboBox.currentTextChanged.connect(self.console_sink.set_level)
+        layout = QHBoxLayout(self.ui.frame_4)
+        layout.addWidget(self.level_comboBox)
+        layout.addWidget(self.load_all_button)
+        layout.addWidget(self.pause_button)
+        layout.addWidget(self.cancel_button)
+        self.cancel_button.clicked.connect(self.cancel_loading)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.load_all_button.clicked.connect(self.loadAllReaders)
+
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(STATUS_REFRESH_MS)
+        self.status_timer.timeout.connect(self.update_status)
+        self.status_timer.start()
+
         self.refresh_hid_list()
 
     #        print(self.scc.break_cmd_res_sw("A0B000000A [985955555555111111F0]SW9000"))
@@ -62,26 +101,27 @@ class MainWindow(QMainWindow):
             rtn = self.scc.custom_connect(reader_number=selected_index)
             if rtn is True:
                 self.connect_reader_index = selected_index
-                self.ui.textEdit.append(
+                self.console_sink.summary(
                     f"Connected to HID reader: {self.reader_list[selected_index]}"
+                    f" (T={self.scc.protocol})"
                 )
                 print(f"Connected to HID reader: {self.reader_list[selected_index]}")
             else:
                 print("Error connecting to HID reader:{}".format(rtn))
-                self.ui.textEdit.append(
+                self.console_sink.error(
                     "Error connecting to HID reader: {}".format(rtn)
                 )
 
     def disconnect_to_reader(self):
         bool_rtn, e, reader_2_disconnect = self.scc.disconnect()
         if bool_rtn is True:
-            self.ui.textEdit.append(
+            self.console_sink.summary(
                 f"Disconnected to HID reader: {self.reader_list[reader_2_disconnect]}"
             )
             print(f"Connected to HID reader: {self.reader_list[reader_2_disconnect]}")
         else:
             print("Error disconnecting to HID reader:{}".format(e))
-            self.ui.textEdit.append("Error disconnecting to HID reader: {}".format(e))
+            self.console_sink.error("Error disconnecting to HID reader: {}".format(e))
 
     def refresh_hid_list(self):
         #        self.scc.calculate_something(50,self.ui.textEdit)
@@ -101,46 +141,148 @@ class MainWindow(QMainWindow):
         if file_path:
             return file_path
 
-    def loadFile(self):
-        self.ui.textEdit.clear()
+    def selected_stages(self):
+        """Return the checked stages as list of (path, banner)."""
+        stages = []
         if (
             self.is_path_selected(self._pre_os_sys_path)
             and self.ui.pre_os_check_box.isChecked()
         ):
-            path = self._pre_os_sys_path
-            self.scc.run_script(path=path)
-            self.ui.textEdit.append(
-                "#=========================Pre OS Loaded ============================#"
+            stages.append(
+                (
+                    self._pre_os_sys_path,
+                    "#=========================Pre OS Loaded ============================#",
+                )
             )
 
         if (
             self.is_path_selected(self._operat_sys_path)
             and self.ui.os_sys_check_box.isChecked()
         ):
-            path = self._operat_sys_path
-            self.scc.run_script(path=path)
-            self.ui.textEdit.append(
-                "#======================== OS Loaded =================================#"
+            stages.append(
+                (
+                    self._operat_sys_path,
+                    "#======================== OS Loaded =================================#",
+                )
             )
 
         if (
             self.is_path_selected(self._pre_perso_path)
             and self.ui.pre_perso_check_box.isChecked()
         ):
-            path = self._pre_perso_path
-            self.scc.run_script(path=path)
-            self.ui.textEdit.append(
-                "#=========================Pre Perso Loaded ===========================#"
+            stages.append(
+                (
+                    self._pre_perso_path,
+                    "#=========================Pre Perso Loaded ===========================#",
+                )
             )
 
         if (
             self.is_path_selected(self._perso_path)
             and self.ui.perso_check_box.isChecked()
         ):
-            path = self._perso_path
-            self.scc.run_script(path=path)
-            self.ui.textEdit.append(
-                "#=========================Post Peros Loaded ============================#"
+            stages.append(
+                (
+                    self._perso_path,
+                    "#=========================Post Peros Loaded ============================#",
+                )
+            )
+
+        return stages
+
+    def is_busy(self):
+        return (self.worker is not None and self.worker.isRunning()) or (
+            self.engine is not None and self.engine.is_running()
+        )
+
+    def loadFile(self):
+        if self.is_busy():
+            return
+        self.console.clear()
+        stages = self.selected_stages()
+        if not stages:
+            return
+        self.worker = ScriptWorker(self.scc, stages, parent=self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.finished.connect(self.on_finished)
+        self._progress = None
+        self._error = None
+        self.ui.load_button.setEnabled(False)
+        self.load_all_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.pause_button.setEnabled(True)
+        self.pause_button.setText("PAUSE")
+        self.worker.start()
+
+    def loadAllReaders(self):
+        """Run the checked stages on every connected reader in parallel."""
+        if self.is_busy():
+            return
+        self.console.clear()
+        stages = [path for path, _ in self.selected_stages()]
+        if not stages:
+            return
+        try:
+            self.engine = MultiReaderEngine(stages)
+        except Exception as e:
+            self.console_sink.error("Error opening readers: {}".format(e))
+            return
+        for status in self.engine.status:
+            self.console_sink.summary(str(status))
+        self.ui.load_button.setEnabled(False)
+        self.load_all_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.engine.start()
+
+    def on_progress(self, index, total, elapsed, throughput):
+        # only remember the latest value, it is rendered on the next timer tick
+        self._progress = (index, total, elapsed, throughput)
+
+    def on_failed(self, error):
+        self._error = error
+
+    def on_finished(self):
+        self.update_status()
+        self.ui.load_button.setEnabled(True)
+        self.load_all_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.pause_button.setEnabled(False)
+        if self._error:
+            message().Show_message_box("Error", self._error)
+
+    def cancel_loading(self):
+        if self.worker is not None:
+            self.worker.cancel()
+        if self.engine is not None:
+            self.engine.stop()
+
+    def toggle_pause(self):
+        if self.worker is None:
+            return
+        if self.worker.is_paused():
+            self.worker.resume()
+            self.pause_button.setText("PAUSE")
+        else:
+            self.worker.pause()
+            self.pause_button.setText("RESUME")
+
+    def update_status(self):
+        if self.engine is not None:
+            self.ui.statusbar.showMessage(self.engine.summary())
+            if not self.engine.is_running():
+                for status in self.engine.status:
+                    self.console_sink.summary(str(status))
+                self.console_sink.summary(self.engine.summary())
+                self.engine = None
+                self.ui.load_button.setEnabled(True)
+                self.load_all_button.setEnabled(True)
+                self.cancel_button.setEnabled(False)
+            return
+        if self._progress is not None:
+            index, total, elapsed, throughput = self._progress
+            self.ui.statusbar.showMessage(
+                f"APDU {index}/{total}   {elapsed:.1f} s   {throughput:.1f} APDU/s"
             )
 
     def browse_PRE_OS_File(self):
@@ -150,8 +292,7 @@ class MainWindow(QMainWindow):
         if file_path:
             self.ui.pre_os_path.setText(file_path)
             self._pre_os_sys_path = file_path
-            temp = f'<a href="{file_path}">{file_path}</a>'
-            self.ui.textEdit.append("{} is selected as Pre OS\n".format(temp))
+            self.console_sink.summary("{} is selected as Pre OS\n".format(file_path))
 
     def browse_OS_File(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -160,8 +301,7 @@ class MainWindow(QMainWindow):
         if file_path:
             self.ui.op_sys_path.setText(file_path)
             self._operat_sys_path = file_path
-            temp = f'<a href="{file_path}">{file_path}</a>'
-            self.ui.textEdit.append("{} is selected as OS\n".format(temp))
+            self.console_sink.summary("{} is selected as OS\n".format(file_path))
 
     def browse_PRE_PERSO_File(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -170,8 +310,9 @@ class MainWindow(QMainWindow):
         if file_path:
             self.ui.pre_perso_path.setText(file_path)
             self._pre_perso_path = file_path
-            temp = f'<a href="{file_path}">{file_path}</a>'
-            self.ui.textEdit.append("{} is selected as Pre Perso File\n".format(temp))
+            self.console_sink.summary(
+                "{} is selected as Pre Perso File\n".format(file_path)
+            )
 
     def browse_PERSO_File(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -180,8 +321,9 @@ class MainWindow(QMainWindow):
         if file_path:
             self.ui.perso_path.setText(file_path)
             self._perso_path = file_path
-            temp = f'<a href="{file_path}">{file_path}</a>'
-            self.ui.textEdit.append("{} is selected as PERSO File\n".format(temp))
+            self.console_sink.summary(
+                "{} is selected as PERSO File\n".format(file_path)
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+""" Multi-reader parallel personalization engine
+
+Opens every PC/SC reader returned by smartcard.System.readers() and runs the
+same compiled script stages on each of them concurrently, one worker thread
+per reader.  pyscard releases the GIL inside SCardTransmit, so the readers
+really work in parallel and the host only serializes the (small) Python side
+of every APDU.
+
+The engine is GUI agnostic: MainWindow polls the reader status on a timer tick and the
+command line front-end below prints summary() periodically.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from smartcard.System import readers
+
+from connection import PcscSimLink
+from log_sink import LogSink, ERROR
+from log_writer import LogWriter
+from pySim.exceptions import NoCardError
+from script_compiler import compile_script, CardDataCsv
+
+# how long a worker blocks waiting for a card before re-checking for stop()
+CARD_POLL_TIMEOUT = 1
+
+STATE_IDLE = "idle"
+STATE_WAITING = "waiting for card"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_ERROR = "error"
+
+
+class ReaderStatus:
+    """Status of one reader, updated by its worker thread."""
+
+    def __init__(self, index: int, name: str):
+        self.index = index
+        self.name = name
+        self.state = STATE_IDLE
+        self.cards_ok = 0
+        self.cards_failed = 0
+        self.apdu_index = 0
+        self.apdu_total = 0
+        self.last_error = ""
+
+    def __str__(self):
+        return "[%d] %s: %s, %d ok, %d failed, APDU %d/%d%s" % (
+            self.index,
+            self.name,
+            self.state,
+            self.cards_ok,
+            self.cards_failed,
+            self.apdu_index,
+            self.apdu_total,
+            " (%s)" % self.last_error if self.last_error else "",
+        )
+
+
+class MultiReaderEngine:
+    """Personalize cards on all connected readers in parallel."""
+
+    def __init__(
+        self,
+        stages: List[str],
+        card_count: Optional[int] = None,
+        log_prefix: str = "logs",
+        reader_numbers: Optional[List[int]] = None,
+        data: Optional[CardDataCsv] = None,
+    ):
+        """
+        Args:
+                stages : script files, executed in order for every card
+                card_count : cards to program per reader (None = until stop())
+                log_prefix : APDU logs go to <log_prefix>-<reader>.txt, the
+                        log of every finished card is kept as .1, .2, ...
+                reader_numbers : restrict to these readers (default: all)
+                data : per-card ${NAME} variables, shared by all readers
+        """
+        self.stages = stages
+        self.data = data
+        self.card_count = card_count
+        self.log_prefix = log_prefix
+        self._stop = threading.Event()
+        self._threads = []  # type: List[threading.Thread]
+        self._start = 0.0
+
+        # compile once up front, every worker then hits the cache
+        self.apdu_total = sum(compile_script(p).apdu_count for p in stages)
+
+        self.links = []  # type: List[PcscSimLink]
+        self.status = []  # type: List[ReaderStatus]
+        numbers = (
+            reader_numbers
+            if reader_numbers is not None
+            else list(range(len(readers())))
+        )
+        for n in numbers:
+            link = PcscSimLink(
+                LogSink(ERROR),
+                # production log: keep the APDU log of every card
+                log_writer=LogWriter(
+                    "%s-%d.txt" % (log_prefix, n),
+                    rotate_per_card=True,
+                    backup_count=None,
+                ),
+            )
+            link.debug = False
+            reader = link.open_reader(n)
+            self.links.append(link)
+            self.status.append(ReaderStatus(n, str(reader)))
+
+    def start(self):
+        self._stop.clear()
+        self._start = time.perf_counter()
+        for link, status in zip(self.links, self.status):
+            t = threading.Thread(
+                target=self._run_reader,
+                args=(link, status),
+                name="reader-%d" % status.index,
+                daemon=True,
+            )
+            self._threads.append(t)
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: float = None):
+        for t in self._threads:
+            t.join(timeout)
+
+    def is_running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def cards_done(self) -> int:
+        return sum(s.cards_ok for s in self.status)
+
+    def cards_per_hour(self) -> float:
+        elapsed = time.perf_counter() - self._start if self._start else 0
+        return self.cards_done() * 3600 / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return "%d readers, %d cards ok, %d failed, %.0f cards/hour" % (
+            len(self.status),
+            self.cards_done(),
+            sum(s.cards_failed for s in self.status),
+            self.cards_per_hour(),
+        )
+
+    def _run_reader(self, link: PcscSimLink, status: ReaderStatus):
+        first = True
+        log = link.get_log_writer()
+
+        def progress(index, total):
+            status.apdu_index = base + index
+            return not self._stop.is_set()
+
+        while not self._stop.is_set():
+            if self.card_count is not None and (
+                status.cards_ok + status.cards_failed >= self.card_count
+            ):
+                break
+            status.state = STATE_WAITING
+            try:
+                link.wait_for_card(timeout=CARD_POLL_TIMEOUT, newcardonly=not first)
+            except NoCardError:
+                continue
+            except Exception as e:
+                status.state = STATE_ERROR
+                status.last_error = str(e)
+                return
+            first = False
+
+            # only take a data row once a card is actually there
+            variables = None
+            if self.data is not None:
+                variables = self.data.next_card()
+                if variables is None:
+                    status.last_error = "no more card data"
+                    break
+
+            status.state = STATE_RUNNING
+            status.apdu_total = self.apdu_total
+            log.new_card((variables or {}).get("ICCID", status.name))
+            base = 0
+            ok = True
+            for path in self.stages:
+                ok = link.run_script(path, progress=progress, variables=variables)
+                if not ok:
+                    break
+                base += compile_script(path).apdu_count
+            if ok:
+                status.cards_ok += 1
+                status.last_error = ""
+            elif not self._stop.is_set():
+                status.cards_failed += 1
+                status.last_error = "failed in %s" % path
+        status.state = STATE_DONE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run script files on all PC/SC readers in parallel"
+    )
+    parser.add_argument("stages", nargs="+", help="Script files, executed in order")
+    parser.add_argument(
+        "-n",
+        "--cards",
+        type=int,
+        default=None,
+        help="Number of cards per reader (default: until interrupted)",
+    )
+    parser.add_argument(
+        "--data",
+        default=None,
+        help="CSV file with one row of ${NAME} script variables per card",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Status report interval in seconds",
+    )
+    opts = parser.parse_args(argv)
+
+    data = CardDataCsv(opts.data) if opts.data else None
+    engine = MultiReaderEngine(opts.stages, card_count=opts.cards, data=data)
+    engine.start()
+    try:
+        while engine.is_running():
+            time.sleep(opts.interval)
+            for s in engine.status:
+                print(s)
+            print(engine.summary())
+    except KeyboardInterrupt:
+        engine.stop()
+        engine.join()
+    print(engine.summary())
+    return 0 if all(s.cards_failed == 0 for s in engine.status) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+""" Regression check of the SimCardCommands path tracker
+
+Runs sequences of SELECT / READ / UPDATE calls against in-memory virtual
+cards (see pySim.transport.virtual), once with the path cache and once
+without it, and compares the results.  Any difference means the tracker
+skipped a SELECT the card needed, i.e. addressed a file in the wrong DF.
+The exit code is 1 if any sequence differs.
+
+Example:
+        python path_cache_check.py -v
+"""
+
+import argparse
+import sys
+from typing import Callable, List
+
+from pySim.commands import SimCardCommands
+from pySim.exceptions import SwMatchError
+from pySim.transport.virtual import VirtualCardLink
+
+USIM_AID = "a0000000871002"
+
+
+def _virtual_uicc() -> VirtualCardLink:
+    """Virtual UICC with ADF.USIM and the proprietary DF.SYSTEM (A515)."""
+    from pySim.filesystem import CardMF
+    from pySim.sysmocom_sja2 import DF_SYSTEM
+    from pySim.ts_102_221 import CardProfileUICC
+    from pySim.ts_31_102 import CardApplicationUSIM
+
+    profile = CardProfileUICC()
+    profile.add_application(CardApplicationUSIM())
+    mf = CardMF(profile=profile)
+    for f in profile.files_in_mf:
+        mf.add_file(f, ignore_existing=True)
+    mf.add_file(DF_SYSTEM())
+    for app in profile.applications:
+        mf.add_application_df(app.adf)
+    return VirtualCardLink(mf)
+
+
+def seq_proprietary_df(scc: SimCardCommands):
+    """cards.py SysmoISIMSJA2.program(): DF.SYSTEM is selected by its
+    proprietary FID, files under the MF are addressed by path afterwards."""
+    yield scc.read_binary(["3f00", "2fe2"])
+    scc.select_path(["3f00"])
+    yield scc.select_path(["a515"])
+    yield scc.read_binary(["3f00", "2fe2"])
+    scc.select_path(["3f00"])
+    scc.select_path(["a515"])
+    yield scc.read_binary("6f20")
+    yield scc.update_binary(["3f00", "2fe2"], "98001032547698103214")
+    yield scc.read_binary(["3f00", "2fe2"])
+    yield scc.read_binary(["3f00", "a515", "6f20"])
+
+
+def seq_sfi_after_proprietary_df(scc: SimCardCommands):
+    """EF.ICCID (SFI 02) is read by SFI only while the MF is known to be the
+    current DF, not after DF.SYSTEM was selected."""
+    yield scc.read_binary(["3f00", "2fe2"])
+    yield scc.read_binary(["3f00", "2f05"])
+    yield scc.read_binary("2fe2")
+    scc.select_path(["3f00", "a515"])
+    yield scc.read_binary("2fe2")
+    yield scc.update_binary("2fe2", "98001032547698103214")
+    scc.select_path(["3f00", "2f05"])
+    yield scc.read_binary("2fe2")
+
+
+def seq_adf_parent(scc: SimCardCommands):
+    """SELECT parent from an ADF lands in the MF."""
+    scc.select_adf(USIM_AID)
+    yield scc.read_binary(["7fff", "6f07"])
+    scc.select_parent_df()
+    yield scc.read_binary(["3f00", "2fe2"])
+    scc.select_adf(USIM_AID)
+    yield scc.read_binary(["7fff", "6fad"])
+
+
+SEQUENCES = [
+    seq_proprietary_df,
+    seq_sfi_after_proprietary_df,
+    seq_adf_parent,
+]  # type: List[Callable]
+
+
+def run(seq: Callable, path_cache: bool) -> list:
+    link = _virtual_uicc()
+    scc = SimCardCommands(link)
+    scc.cla_byte = "00"
+    scc.sel_ctrl = "0004"
+    scc.path_cache = path_cache
+    results = []
+    it = seq(scc)
+    while True:
+        try:
+            results.append(next(it))
+        except StopIteration:
+            break
+        except (SwMatchError, ValueError) as e:
+            results.append("%s: %s" % (type(e).__name__, e))
+            break
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare card accesses with and without the path cache"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Print the results"
+    )
+    opts = parser.parse_args(argv)
+
+    ok = True
+    for seq in SEQUENCES:
+        expected = run(seq, False)
+        got = run(seq, True)
+        same = expected == got
+        ok &= same
+        print("%-30s %s" % (seq.__name__, "OK" if same else "FAILED"))
+        if opts.verbose or not same:
+            for n, (e, g) in enumerate(zip(expected, got)):
+                print("    %d: %s%s" % (n, e, "" if e == g else "  <> %s" % (g,)))
+            if len(expected) != len(got):
+                print("    %d vs %d results" % (len(expected), len(got)))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,7 +28,6 @@ from pySim.transport import LinkBase
 
 import subprocess
 import sys
-import yaml
 
 
 class CardHandlerBase:
@@ -93,6 +92,9 @@ class CardHandlerAuto(CardHandlerBase):
     verbose = True
 
     def __init__(self, sl: LinkBase, config_file: str):
+        # only the card feeder needs yaml, not manual insertion
+        import yaml
+
         super().__init__(sl)
         print("Card handler Config-file: " + str(config_file))
         with open(config_file) as cfg:
@@ -30,7 +30,6 @@ from pySim.ts_31_102 import EF_USIM_ADF_map
 from pySim.ts_31_103 import EF_ISIM_ADF_map
 from pySim.utils import *
 from smartcard.util import toBytes
-from pytlv.TLV import *
 
 
 def format_addr(addr: str, addr_type: str) -> str:
@@ -280,11 +279,9 @@ class SimCard:
         """Fetch all the AIDs present on UICC"""
         self._aids = []
         try:
-            # Find out how many records the EF.DIR has
-            # and store all the AIDs in the UICC
-            rec_cnt = self._scc.record_count(EF["DIR"])
-            for i in range(0, rec_cnt):
-                rec = self._scc.read_record(EF["DIR"], i + 1)
+            # Read all records of EF.DIR and store all the AIDs in the UICC
+            for rec_no, data, sw in self._scc.read_records(EF["DIR"]):
+                rec = (data, sw)
                 if (
                     (rec[0][0:2], rec[0][4:6]) == ("61", "4f")
                     and len(rec[0]) > 12
@@ -478,10 +475,8 @@ class IsimCard(SimCard):
         super(IsimCard, self).__init__(ssc)
 
     def read_pcscf(self):
-        rec_cnt = self._scc.record_count(EF_ISIM_ADF_map["PCSCF"])
         pcscf_recs = ""
-        for i in range(0, rec_cnt):
-            (res, sw) = self._scc.read_record(EF_ISIM_ADF_map["PCSCF"], i + 1)
+        for i, res, sw in self._scc.read_records(EF_ISIM_ADF_map["PCSCF"]):
             if sw == "9000":
                 try:
                     addr, addr_type = dec_addr_tlv(res)
@@ -529,6 +524,8 @@ class IsimCard(SimCard):
             plmn_str = "mnc" + lpad(mnc, 3, "0") + ".mcc" + lpad(mcc, 3, "0")
             hex_str = s2h("ims." + plmn_str + ".3gppnetwork.org")
 
+        from pytlv.TLV import TLV
+
         # Build TLV
         tlv = TLV(["80"])
         content = tlv.build({"80": hex_str})
@@ -553,6 +550,8 @@ class IsimCard(SimCard):
         hex_str = ""
         if impi:
             hex_str = s2h(impi)
+        from pytlv.TLV import TLV
+
         # Build TLV
         tlv = TLV(["80"])
         content = tlv.build({"80": hex_str})
@@ -564,10 +563,8 @@ class IsimCard(SimCard):
         return sw
 
     def read_impu(self):
-        rec_cnt = self._scc.record_count(EF_ISIM_ADF_map["IMPU"])
         impu_recs = ""
-        for i in range(0, rec_cnt):
-            (res, sw) = self._scc.read_record(EF_ISIM_ADF_map["IMPU"], i + 1)
+        for i, res, sw in self._scc.read_records(EF_ISIM_ADF_map["IMPU"]):
             if sw == "9000":
                 # Skip the initial tag value ('80') byte and get length of contents
                 length = int(res[2:4], 16)
@@ -583,6 +580,8 @@ class IsimCard(SimCard):
         hex_str = ""
         if impu:
             hex_str = s2h(impu)
+        from pytlv.TLV import TLV
+
         # Build TLV
         tlv = TLV(["80"])
         content = tlv.build({"80": hex_str})
@@ -593,10 +592,8 @@ class IsimCard(SimCard):
         return sw
 
     def read_iari(self):
-        rec_cnt = self._scc.record_count(EF_ISIM_ADF_map["UICCIARI"])
         uiari_recs = ""
-        for i in range(0, rec_cnt):
-            (res, sw) = self._scc.read_record(EF_ISIM_ADF_map["UICCIARI"], i + 1)
+        for i, res, sw in self._scc.read_records(EF_ISIM_ADF_map["UICCIARI"]):
             if sw == "9000":
                 # Skip the initial tag value ('80') byte and get length of contents
                 length = int(res[2:4], 16)
@@ -198,21 +198,24 @@ class DF_CDMA(CardDF):
         super().__init__(
             fid="7f25", name="DF.CDMA", desc="CDMA related files (3GPP2 C.S0023-D)"
         )
-        files = [
-            # TODO: lots of other files
-            EF_ServiceTable(
-                "6f32",
-                None,
-                "EF.CST",
-                "CDMA Service Table",
-                table=EF_CST_map,
-                size=(5, 16),
-            ),
-            EF_SPN(),
-            EF_AD(),
-            EF_SMS(),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                # TODO: lots of other files
+                EF_ServiceTable(
+                    "6f32",
+                    None,
+                    "EF.CST",
+                    "CDMA Service Table",
+                    table=EF_CST_map,
+                    size=(5, 16),
+                ),
+                EF_SPN(),
+                EF_AD(),
+                EF_SMS(),
+            ]
+
+        self.add_files_lazy(files)
 
 
 class CardProfileRUIM(CardProfile):
@@ -21,8 +21,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from construct import *
-from pySim.construct import LV
 from pySim.utils import (
     rpad,
     b2h,
@@ -33,8 +31,79 @@ from pySim.utils import (
     h2i,
     str_sanitize,
     expand_hex,
+    atr_extended_length,
+    ef_atr_extended_length,
+    fcp_parse,
+    diff_runs,
 )
 from pySim.exceptions import SwMatchError
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# FCP data objects needed for file sizes: file size and file descriptor
+_FCP_TAGS = (0x80, 0x82)
+_FCP_SFI_TAG = (0x88,)
+
+
+class VerifyMismatch(NamedTuple):
+    """One difference found by SimCardCommands.verify_journal_pass()."""
+
+    path: str  # DF path and EF FID, e.g. "3f00/7f20/6f07" or "adf:<aid>/6f07"
+    record: Optional[int]  # record number, None for transparent EFs
+    offset: int
+    expected: Hexstr
+    actual: Optional[Hexstr]  # None if the file could not be read
+    error: Optional[str] = None
+
+
+class VerifyJournal:
+    """Expected file contents collected from writes with deferred verification,
+    keyed by the (DF path, EF) state of the SELECT path tracker.  Later writes
+    to the same bytes or records replace earlier expectations."""
+
+    def __init__(self):
+        self.binary = {}  # type: Dict[Tuple[Tuple[str, ...], str], Dict[int, int]]
+        self.records = {}  # type: Dict[Tuple[Tuple[str, ...], str], Dict[int, str]]
+
+    def __len__(self):
+        return len(self.binary) + len(self.records)
+
+    def add_binary(self, ef_state, offset: int, data: bytes):
+        expected = self.binary.setdefault(ef_state, {})
+        for i, b in enumerate(data):
+            expected[offset + i] = b
+
+    def add_record(self, ef_state, rec_no: int, data: Hexstr):
+        self.records.setdefault(ef_state, {})[rec_no] = data.lower()
+
+    def files(self) -> List[Tuple[Tuple[str, ...], str]]:
+        """All journaled files, in order of their first write."""
+        return list(self.binary) + [f for f in self.records if f not in self.binary]
+
+
+def _binary_mismatches(
+    name: str, expected: Dict[int, int], start: int, actual: bytes
+) -> List[VerifyMismatch]:
+    """Runs of journaled bytes that differ from what was read back."""
+    report = []  # type: List[VerifyMismatch]
+    run_start = None
+    for offset in range(start, max(expected) + 2):
+        exp = expected.get(offset)
+        i = offset - start
+        differs = exp is not None and (i >= len(actual) or actual[i] != exp)
+        if differs and run_start is None:
+            run_start = offset
+        elif not differs and run_start is not None:
+            report.append(
+                VerifyMismatch(
+                    name,
+                    None,
+                    run_start,
+                    b2h(bytes(expected[o] for o in range(run_start, offset))),
+                    b2h(actual[run_start - start : offset - start]),
+                )
+            )
+            run_start = None
+    return report
 
 
 class SimCardCommands:
@@ -42,42 +111,25 @@ class SimCardCommands:
         self._tp = transport
         self.cla_byte = "a0"
         self.sel_ctrl = "0000"
-
-    # Extract a single FCP item from TLV
-    def __parse_fcp(self, fcp):
-        # see also: ETSI TS 102 221, chapter 11.1.1.3.1 Response for MF,
-        # DF or ADF
-        from pytlv.TLV import TLV
-
-        tlvparser = TLV(
-            ["82", "83", "84", "a5", "8a", "8b", "8c", "80", "ab", "c6", "81", "88"]
-        )
-
-        # pytlv is case sensitive!
-        fcp = fcp.lower()
-
-        if fcp[0:2] != "62":
-            raise ValueError(
-                "Tag of the FCP template does not match, expected 62 but got %s"
-                % fcp[0:2]
-            )
-
-        # Unfortunately the spec is not very clear if the FCP length is
-        # coded as one or two byte vale, so we have to try it out by
-        # checking if the length of the remaining TLV string matches
-        # what we get in the length field.
-        # See also ETSI TS 102 221, chapter 11.1.1.3.0 Base coding.
-        exp_tlv_len = int(fcp[2:4], 16)
-        if len(fcp[4:]) // 2 == exp_tlv_len:
-            skip = 4
-        else:
-            exp_tlv_len = int(fcp[2:6], 16)
-            if len(fcp[4:]) // 2 == exp_tlv_len:
-                skip = 6
-
-        # Skip FCP tag and length
-        tlv = fcp[skip:]
-        return tlvparser.parse(tlv)
+        # READ/UPDATE BINARY chunk size, determined on first use after every
+        # (re)connect of the link, see max_chunk_size()
+        self._max_chunk = None
+        self._max_chunk_ctx = None
+        # extended length chunk size for cards that do not state their limits
+        # in EF.ATR; kept well below what readers and cards commonly accept
+        self.extended_chunk_default = 1024
+        # cost of one more UPDATE BINARY in bytes (header, SW, turnaround): in
+        # conserve mode, unchanged gaps up to this size are rewritten rather
+        # than split into separate writes
+        self.write_apdu_overhead = 16
+        # deferred verify-after-write, see start_verify_journal()
+        self.verify_journal = None  # type: Optional[VerifyJournal]
+        # SELECT path tracker: set path_cache to False to always select the
+        # full path, as pySim did historically
+        self.path_cache = True
+        self._cur_file = None  # type: Optional[Tuple[Tuple[str, ...], Optional[str]]]
+        self._fcp_cache = {}
+        self._cache_ctx = None
 
     # Tell the length of a record by the card response
     # USIMs respond with an FCP template, which is different
@@ -86,19 +138,30 @@ class SimCardCommands:
     # SIM: GSM 11.11, chapter 9.2.1 SELECT
     def __record_len(self, r) -> int:
         if self.sel_ctrl == "0004":
-            tlv_parsed = self.__parse_fcp(r[-1])
-            file_descriptor = tlv_parsed["82"]
+            file_descriptor = fcp_parse(bytes.fromhex(r[-1]), _FCP_TAGS)[0x82]
             # See also ETSI TS 102 221, chapter 11.1.1.4.3 File Descriptor
-            return int(file_descriptor[4:8], 16)
+            return int.from_bytes(file_descriptor[2:4], "big")
         else:
             return int(r[-1][28:30], 16)
 
+    # Record length and number of records from a single select response
+    def __record_info(self, r) -> Tuple[int, int]:
+        if self.sel_ctrl == "0004":
+            fcp = fcp_parse(bytes.fromhex(r[-1]), _FCP_TAGS)
+            rec_length = int.from_bytes(fcp[0x82][2:4], "big")
+            file_size = int.from_bytes(fcp[0x80], "big")
+        else:
+            rec_length = int(r[-1][28:30], 16)
+            file_size = int(r[-1][4:8], 16)
+        return rec_length, file_size // rec_length if rec_length else 0
+
     # Tell the length of a binary file. See also comment
     # above.
     def __len(self, r) -> int:
         if self.sel_ctrl == "0004":
-            tlv_parsed = self.__parse_fcp(r[-1])
-            return int(tlv_parsed["80"], 16)
+            return int.from_bytes(
+                fcp_parse(bytes.fromhex(r[-1]), _FCP_TAGS)[0x80], "big"
+            )
         else:
             return int(r[-1][4:8], 16)
 
@@ -106,6 +169,224 @@ class SimCardCommands:
         """Return the ATR of the currently inserted card."""
         return self._tp.get_atr()
 
+    def max_chunk_size(self) -> int:
+        """Largest number of bytes a single READ/UPDATE BINARY transfers.
+
+        Extended length APDUs are used if both the link (LinkBase.extended_length)
+        and the card (card capabilities in the ATR historical bytes) support them.
+        Their size is then limited by the extended length information of the
+        card in EF.ATR, or else by extended_chunk_default.  It is determined
+        again after the link (re)connected, until then a failed extended length
+        APDU drops it to 255."""
+        if self._max_chunk is None or self._max_chunk_ctx != self._tp.connect_count:
+            self._max_chunk_ctx = self._tp.connect_count
+            self._max_chunk = 255
+            if self._tp.extended_length and atr_extended_length(self._tp.get_atr()):
+                limits = self._read_extended_length_info()
+                size = min(limits) if limits else self.extended_chunk_default
+                self._max_chunk = max(255, min(size, self._tp.max_extended_length))
+        return self._max_chunk
+
+    def _read_extended_length_info(self) -> Optional[Tuple[int, int]]:
+        """Extended length information of the card from EF.ATR.  It is only
+        read if the selected file is tracked, and selected again afterwards,
+        so that the card is left in the state the caller expects."""
+        if not self.path_cache or self.sel_ctrl != "0004":
+            return None
+        self._check_cache_ctx()
+        cur = self._cur_file
+        if cur is None or cur[0][0] != "3f00":
+            return None
+        try:
+            data = self.read_binary(["3f00", "2f01"])[0]
+        except (SwMatchError, ValueError):
+            data = None
+        self.select_path(list(cur[0]) + ([cur[1]] if cur[1] else []))
+        return ef_atr_extended_length(h2b(data)) if data else None
+
+    # Selected file tracking.  The current file is kept as (DF path, EF FID),
+    # where the DF path is a tuple of DF FIDs starting with "3f00", or with
+    # "adf:<aid>" for an application.  The select response of every file is
+    # cached by that key, until reset, logical channel operations, a failed
+    # SELECT or a file management command.
+
+    def invalidate_path_cache(self):
+        """Forget the selected file and all cached select responses."""
+        self._cur_file = None
+        self._fcp_cache.clear()
+
+    def _check_cache_ctx(self):
+        # select responses depend on class byte and selection control
+        ctx = (self.cla_byte, self.sel_ctrl)
+        if ctx != self._cache_ctx:
+            self._cache_ctx = ctx
+            self.invalidate_path_cache()
+
+    def _fcp_is_df(self, fcp: Optional[str]) -> Optional[bool]:
+        """Whether a select response is the one of a DF (or ADF), None if it
+        does not tell."""
+        if not fcp:
+            return None
+        if self.sel_ctrl == "0004":
+            try:
+                fd = fcp_parse(bytes.fromhex(fcp), _FCP_TAGS).get(0x82)
+            except ValueError:
+                return None
+            if not fd:
+                return None
+            # TS 102 221 Section 11.1.1.4.3: b6..b4 of the descriptor byte
+            # are all set for a DF or ADF
+            return fd[0] & 0x38 == 0x38
+        # GSM 11.11 Section 9.2.1: type of file 01 MF, 02 DF, 04 EF
+        if len(fcp) < 14:
+            return None
+        return {1: True, 2: True, 4: False}.get(int(fcp[12:14], 16))
+
+    def _select_step(self, cur, fid: str, fcp: Optional[str] = None):
+        """The (DF path, EF) selected after selecting fid while cur is selected.
+
+        A file is a DF or an EF as told by the file descriptor of its select
+        response, given as fcp or cached from an earlier SELECT, and else by
+        the FID coding of TS 102 221 Section 8.3: 3F00 is the MF, 7Fxx first
+        level DFs, 5Fxx second level DFs, 7FFF the current ADF, 2Fxx / 6Fxx /
+        4Fxx EFs.  Proprietary FIDs (like DF.SYSTEM A515 of sysmocom cards)
+        are never guessed.  Returns None where the result is not conclusive."""
+        fid = fid.lower()
+        if fid == "3f00":
+            return (("3f00",), None)
+        if cur is None:
+            return None
+        df = cur[0]
+        in_mf = df[0] == "3f00"
+        std_df = fid == "7fff" or fid[0:2] in ("7f", "5f")
+        std_ef = fid[0:2] in ("2f", "4f", "6f")
+        is_df = self._fcp_is_df(fcp)
+        if is_df is None:
+            if std_df or std_ef:
+                is_df = std_df
+            elif (df, fid) in self._fcp_cache:
+                is_df = False
+            elif (df + (fid,), None) in self._fcp_cache:
+                is_df = True
+            else:
+                return None
+        elif (std_df and not is_df) or (std_ef and is_df):
+            return None
+        if not is_df:
+            return (df, fid)
+        if fid == "7fff":
+            return None if in_mf else ((df[0],), None)
+        if fid[0:2] == "7f":
+            # child of the MF or sibling of the current first level DF
+            return (("3f00", fid), None) if in_mf else None
+        if fid[0:2] == "5f":
+            base = df[:2] if in_mf else df[:1]
+            if in_mf and len(base) < 2:
+                return None
+            return (base + (fid,), None)
+        # a proprietary DF is unambiguous only as a child of the MF, anywhere
+        # else it could as well be a sibling of the current DF
+        return (("3f00", fid), None) if df == ("3f00",) else None
+
+    def _path_skip(self, states) -> int:
+        """Number of leading elements of a path that need no SELECT, because
+        the card is already positioned accordingly and their select responses
+        are cached."""
+        cur = self._cur_file
+        if cur is None or not self.path_cache:
+            return 0
+        for i in range(len(states) - 1, -1, -1):
+            st = states[i]
+            if st is None:
+                continue
+            if st == cur or (st[1] is None and st[0] == cur[0]):
+                if all(states[j] in self._fcp_cache for j in range(i + 1)):
+                    return i + 1
+        return 0
+
+    # SFI addressing (TS 102 221 Section 8.4.2): READ/UPDATE BINARY with b8 of
+    # P1 set and the SFI in P1 b5..b1, READ/UPDATE RECORD with the SFI in P2
+    # b8..b4.  The EF is implicitly selected within the current DF, so an EF
+    # with a known SFI costs no SELECT as long as its DF is current.  Unless
+    # the caller passes it, the SFI is taken from the cached select response
+    # of an EF selected before (tag 88), whose size and record length are then
+    # known as well.
+
+    def _sfi_target(self, ef, sfi: Optional[int] = None):
+        """Tracker state and SFI of ef if it can be addressed by SFI instead
+        of being selected, else (None, None)."""
+        if not self.path_cache or self.sel_ctrl != "0004":
+            return None, None
+        self._check_cache_ctx()
+        cur = self._cur_file
+        if cur is None:
+            return None, None
+        # the card resolves the SFI within its current DF, so rely on the
+        # tracked one only if its own select response said it is a DF (and
+        # that of the current EF, if any, that it is an EF)
+        if not self._fcp_is_df(self._fcp_cache.get((cur[0], None))):
+            return None, None
+        if (
+            cur[1] is not None
+            and self._fcp_is_df(self._fcp_cache.get(cur)) is not False
+        ):
+            return None, None
+        st = cur
+        for fid in ef if type(ef) is list else [ef]:
+            st = self._select_step(st, fid)
+            if st is None:
+                return None, None
+        if st[1] is None or st[0] != cur[0]:
+            return None, None
+        if sfi is None:
+            # nothing to gain for the current EF
+            fcp = self._fcp_cache.get(st) if st != cur else None
+            if not fcp:
+                return None, None
+            value = fcp_parse(bytes.fromhex(fcp), _FCP_SFI_TAG).get(0x88)
+            # an empty tag 88 means the EF has no SFI; without the tag it
+            # would be the low bits of the FID, not relied upon here
+            if not value or len(value) != 1:
+                return None, None
+            sfi = value[0] >> 3
+        if not 0 < sfi < 31:
+            return None, None
+        return st, sfi
+
+    def _send_sfi(self, pdu: str, st):
+        """Send an SFI addressed APDU, track the EF it implicitly selects."""
+        try:
+            rv = self._tp.send_apdu_checksw(pdu)
+        except SwMatchError:
+            self.invalidate_path_cache()
+            raise
+        self._cur_file = st
+        return rv
+
+    def _read_binary_sfi_all(self, sfi: int, st, offset: int):
+        """READ BINARY by SFI from offset up to the end of the file, whose size
+        is unknown as there is no select response."""
+        total_data = ""
+        pdu = self.cla_byte + "b0%02x%02x00" % (0x80 | sfi, offset)
+        while True:
+            try:
+                data, sw = self._tp.send_apdu(pdu)
+            except Exception:
+                self.invalidate_path_cache()
+                raise
+            self._cur_file = st
+            if sw == "6b00" and total_data:
+                # previous chunk ended exactly at the end of the file
+                break
+            if sw != "9000" and sw != "6282" and sw[0:2] != "91":
+                self.invalidate_path_cache()
+                raise SwMatchError(sw, "9000", self._tp.sw_interpreter)
+            total_data += data
+            if sw == "6282" or len(data) < 512:
+                break
+            pdu = self.cla_byte + "b0%04x00" % (offset + len(total_data) // 2)
+        return total_data, "9000"
+
     def try_select_path(self, dir_list):
         """Try to select a specified path
 
@@ -116,6 +397,7 @@ class SimCardCommands:
         rv = []
         if type(dir_list) is not list:
             dir_list = [dir_list]
+        self._cur_file = None
         for i in dir_list:
             data, sw = self._tp.send_apdu(
                 self.cla_byte + "a4" + self.sel_ctrl + "02" + i
@@ -134,13 +416,29 @@ class SimCardCommands:
         Returns:
                 list of return values (FCP in hex encoding) for each element of the path
         """
+        return self._select_path(dir_list)[0]
+
+    def _select_path(self, dir_list):
+        """select_path(), also telling whether the last element was actually
+        selected (and so its record pointer reset) rather than taken from the
+        cache."""
         rv = []
         if type(dir_list) is not list:
             dir_list = [dir_list]
-        for i in dir_list:
-            data, sw = self.select_file(i)
-            rv.append(data)
-        return rv
+        self._check_cache_ctx()
+        states = []
+        st = self._cur_file
+        for fid in dir_list:
+            st = self._select_step(st, fid)
+            states.append(st)
+        skip = self._path_skip(states)
+        for n, i in enumerate(dir_list):
+            if n < skip:
+                rv.append(self._fcp_cache[states[n]])
+            else:
+                data, sw = self.select_file(i)
+                rv.append(data)
+        return rv, skip < len(dir_list)
 
     def select_file(self, fid: str):
         """Execute SELECT a given file by FID.
@@ -149,13 +447,31 @@ class SimCardCommands:
                 fid : file identifier as hex string
         """
 
-        return self._tp.send_apdu_checksw(
-            self.cla_byte + "a4" + self.sel_ctrl + "02" + fid
-        )
+        self._check_cache_ctx()
+        cur = self._cur_file
+        try:
+            data, sw = self._tp.send_apdu_checksw(
+                self.cla_byte + "a4" + self.sel_ctrl + "02" + fid
+            )
+        except SwMatchError:
+            self.invalidate_path_cache()
+            raise
+        st = self._select_step(cur, fid, data)
+        self._cur_file = st
+        if st is not None:
+            self._fcp_cache[st] = data
+        return data, sw
 
     def select_parent_df(self):
         """Execute SELECT to switch to the parent DF"""
-        return self._tp.send_apdu_checksw(self.cla_byte + "a4030400")
+        cur = self._cur_file
+        self._cur_file = None
+        rv = self._tp.send_apdu_checksw(self.cla_byte + "a4030400")
+        if cur is not None:
+            # the parent of an ADF (and of the MF itself) is the MF
+            df = cur[0][:-1] if len(cur[0]) > 1 else ("3f00",)
+            self._cur_file = (df, None)
+        return rv
 
     def select_adf(self, aid: str):
         """Execute SELECT a given Applicaiton ADF.
@@ -165,32 +481,78 @@ class SimCardCommands:
         """
 
         aidlen = ("0" + format(len(aid) // 2, "x"))[-2:]
-        return self._tp.send_apdu_checksw(self.cla_byte + "a4" + "0404" + aidlen + aid)
+        self._check_cache_ctx()
+        self._cur_file = None
+        rv = self._tp.send_apdu_checksw(self.cla_byte + "a4" + "0404" + aidlen + aid)
+        # partial AIDs select the same ADF, but we cannot tell which one
+        self._cur_file = (("adf:" + aid.lower(),), None)
+        self._fcp_cache[self._cur_file] = rv[0]
+        return rv
 
-    def read_binary(self, ef, length: int = None, offset: int = 0):
+    def read_binary(
+        self, ef, length: int = None, offset: int = 0, sfi: Optional[int] = None
+    ):
         """Execute READD BINARY.
 
         Args:
                 ef : string or list of strings indicating name or path of transparent EF
                 length : number of bytes to read
                 offset : byte offset in file from which to start reading
+                sfi : short file identifier of the EF, used instead of a SELECT if
+                      the DF of the EF is the current DF (default: the SFI in
+                      the cached select response of the EF, if any)
         """
-        r = self.select_path(ef)
-        if len(r[-1]) == 0:
-            return (None, None)
-        if length is None:
-            length = self.__len(r) - offset
+        max_chunk = self.max_chunk_size()
+        st, sfi = self._sfi_target(ef, sfi) if offset <= 255 else (None, None)
+        if st is not None:
+            if length is None:
+                fcp = self._fcp_cache.get(st)
+                if not fcp:
+                    return self._read_binary_sfi_all(sfi, st, offset)
+                length = self.__len([fcp]) - offset
+        else:
+            r = self.select_path(ef)
+            if len(r[-1]) == 0:
+                return (None, None)
+            if length is None:
+                length = self.__len(r) - offset
         if length < 0:
             return (None, None)
 
         total_data = ""
         chunk_offset = 0
         while chunk_offset < length:
-            chunk_len = min(255, length - chunk_offset)
-            pdu = self.cla_byte + "b0%04x%02x" % (offset + chunk_offset, chunk_len)
+            chunk_len = min(max_chunk, length - chunk_offset)
+            if st is not None:
+                # first chunk addressed by SFI, the EF is current afterwards
+                chunk_len = min(255, chunk_len)
+                data, sw = self._send_sfi(
+                    self.cla_byte + "b0%02x%02x%02x" % (0x80 | sfi, offset, chunk_len),
+                    st,
+                )
+                st = None
+                total_data += data
+                chunk_offset += chunk_len
+                continue
+            if chunk_len <= 255:
+                pdu = self.cla_byte + "b0%04x%02x" % (offset + chunk_offset, chunk_len)
+            else:
+                pdu = b2h(
+                    self._tp.build_apdu(
+                        int(self.cla_byte, 16),
+                        0xB0,
+                        (offset + chunk_offset) >> 8,
+                        (offset + chunk_offset) & 0xFF,
+                        le=chunk_len,
+                    )
+                )
             try:
                 data, sw = self._tp.send_apdu_checksw(pdu)
             except Exception as e:
+                if chunk_len > 255:
+                    # extended length not accepted after all, use short APDUs
+                    self._max_chunk = max_chunk = 255
+                    continue
                 raise ValueError(
                     "%s, failed to read (offset %d)" % (str_sanitize(str(e)), offset)
                 )
@@ -205,6 +567,7 @@ class SimCardCommands:
         offset: int = 0,
         verify: bool = False,
         conserve: bool = False,
+        sfi: Optional[int] = None,
     ):
         """Execute UPDATE BINARY.
 
@@ -213,40 +576,92 @@ class SimCardCommands:
                 data : hex string of data to be written
                 offset : byte offset in file from which to start writing
                 verify : Whether or not to verify data after write
+                conserve : read the range first, write only the byte runs that differ
+                sfi : short file identifier of the EF, used instead of a SELECT if
+                      the DF of the EF is the current DF (default: the SFI in
+                      the cached select response of the EF, if any)
         """
 
-        file_len = self.binary_size(ef)
-        data = expand_hex(data, file_len)
+        max_chunk = self.max_chunk_size()
+        # the file size is only needed to expand "." / ".." fillers
+        st, sfi = self._sfi_target(ef, sfi) if offset <= 255 else (None, None)
+        if "." in data:
+            fcp = self._fcp_cache.get(st) if st is not None else None
+            if fcp:
+                file_len = self.__len([fcp])
+            else:
+                st = None
+                file_len = self.binary_size(ef)
+            data = expand_hex(data, file_len)
 
         data_length = len(data) // 2
 
-        # Save write cycles by reading+comparing before write
+        # Save write cycles by reading+comparing before write, only the
+        # differing byte runs are written
         if conserve:
-            data_current, sw = self.read_binary(ef, data_length, offset)
-            if data_current == data:
+            data_current, sw = self.read_binary(ef, data_length, offset, sfi=sfi)
+            runs = diff_runs(
+                h2b(data_current or ""), h2b(data), self.write_apdu_overhead
+            )
+            if not runs:
                 return None, sw
-
-        self.select_path(ef)
+            # the EF is current now, whether it was read by SFI or not
+            st = None
+        else:
+            runs = [(0, data_length)]
+            if st is None:
+                self.select_path(ef)
         total_data = ""
-        chunk_offset = 0
-        while chunk_offset < data_length:
-            chunk_len = min(255, data_length - chunk_offset)
-            # chunk_offset is bytes, but data slicing is hex chars, so we need to multiply by 2
-            pdu = (
-                self.cla_byte
-                + "d6%04x%02x" % (offset + chunk_offset, chunk_len)
-                + data[chunk_offset * 2 : (chunk_offset + chunk_len) * 2]
-            )
-            try:
-                chunk_data, chunk_sw = self._tp.send_apdu_checksw(pdu)
-            except Exception as e:
-                raise ValueError(
-                    "%s, failed to write chunk (chunk_offset %d, chunk_len %d)"
-                    % (str_sanitize(str(e)), chunk_offset, chunk_len)
-                )
-            total_data += data
-            chunk_offset += chunk_len
-        if verify:
+        for run_offset, run_length in runs:
+            chunk_offset = run_offset
+            run_end = run_offset + run_length
+            while chunk_offset < run_end:
+                chunk_len = min(max_chunk, run_end - chunk_offset)
+                if st is not None:
+                    chunk_len = min(255, chunk_len)
+                # chunk_offset is bytes, but data slicing is hex chars, so we need to multiply by 2
+                chunk = data[chunk_offset * 2 : (chunk_offset + chunk_len) * 2]
+                if st is not None:
+                    chunk_data, chunk_sw = self._send_sfi(
+                        self.cla_byte
+                        + "d6%02x%02x%02x" % (0x80 | sfi, offset, chunk_len)
+                        + chunk,
+                        st,
+                    )
+                    st = None
+                    total_data += data
+                    chunk_offset += chunk_len
+                    continue
+                if chunk_len <= 255:
+                    pdu = (
+                        self.cla_byte
+                        + "d6%04x%02x" % (offset + chunk_offset, chunk_len)
+                        + chunk
+                    )
+                else:
+                    pdu = b2h(
+                        self._tp.build_apdu(
+                            int(self.cla_byte, 16),
+                            0xD6,
+                            (offset + chunk_offset) >> 8,
+                            (offset + chunk_offset) & 0xFF,
+                            h2b(chunk),
+                        )
+                    )
+                try:
+                    chunk_data, chunk_sw = self._tp.send_apdu_checksw(pdu)
+                except Exception as e:
+                    if chunk_len > 255:
+                        # extended length not accepted after all, use short APDUs
+                        self._max_chunk = max_chunk = 255
+                        continue
+                    raise ValueError(
+                        "%s, failed to write chunk (chunk_offset %d, chunk_len %d)"
+                        % (str_sanitize(str(e)), chunk_offset, chunk_len)
+                    )
+                total_data += data
+                chunk_offset += chunk_len
+        if verify and not self._journal_binary(data, offset):
             self.verify_binary(ef, data, offset)
         return total_data, chunk_sw
 
@@ -265,18 +680,65 @@ class SimCardCommands:
                 % (data.lower(), res[0].lower())
             )
 
-    def read_record(self, ef, rec_no: int):
+    def read_record(self, ef, rec_no: int, sfi: Optional[int] = None):
         """Execute READ RECORD.
 
         Args:
                 ef : string or list of strings indicating name or path of linear fixed EF
                 rec_no : record number to read
+                sfi : short file identifier of the EF, used instead of a SELECT if
+                      the DF of the EF is the current DF (default: the SFI in
+                      the cached select response of the EF, if any)
         """
+        st, sfi = self._sfi_target(ef, sfi)
+        if st is not None:
+            # record length unknown without select response: Le=00, the link
+            # retries with the exact length on 6Cxx
+            fcp = self._fcp_cache.get(st)
+            rec_length = self.__record_len([fcp]) if fcp else 0
+            pdu = self.cla_byte + "b2%02x%02x%02x" % (
+                rec_no,
+                (sfi << 3) | 0x04,
+                rec_length,
+            )
+            return self._send_sfi(pdu, st)
         r = self.select_path(ef)
         rec_length = self.__record_len(r)
         pdu = self.cla_byte + "b2%02x04%02x" % (rec_no, rec_length)
         return self._tp.send_apdu_checksw(pdu)
 
+    def read_records(
+        self, ef, records: Iterable[int] = None
+    ) -> Iterator[Tuple[int, str, str]]:
+        """Read multiple records of a record oriented EF.
+
+        The EF is selected and its select response parsed only once.  Where
+        the EF has just been selected, ascending consecutive records from
+        record 1 on are read in NEXT mode (the record pointer starts before
+        the first record after SELECT), everything else in absolute mode.
+
+        Args:
+                ef : string or list of strings indicating name or path of linear fixed EF
+                records : record numbers to read (default: all records of the EF)
+        Returns:
+                generator of tuple(rec_no, data, sw), one per record as it is read
+        """
+        r, selected = self._select_path(ef)
+        rec_length, rec_count = self.__record_info(r)
+        if records is None:
+            records = range(1, rec_count + 1)
+        # last record read in NEXT mode, 0: record pointer not set by us
+        pointer = 0 if selected else None
+        for rec_no in records:
+            if pointer is not None and rec_no == pointer + 1:
+                pdu = self.cla_byte + "b20002%02x" % rec_length
+                pointer = rec_no
+            else:
+                pdu = self.cla_byte + "b2%02x04%02x" % (rec_no, rec_length)
+                pointer = None
+            data, sw = self._tp.send_apdu_checksw(pdu)
+            yield rec_no, data, sw
+
     def update_record(
         self,
         ef,
@@ -285,6 +747,7 @@ class SimCardCommands:
         force_len: bool = False,
         verify: bool = False,
         conserve: bool = False,
+        sfi: Optional[int] = None,
     ):
         """Execute UPDATE RECORD.
 
@@ -295,9 +758,43 @@ class SimCardCommands:
                 force_len : enforce record length by using the actual data length
                 verify : verify data by re-reading the record
                 conserve : read record and compare it with data, skip write on match
+                sfi : short file identifier of the EF, used instead of a SELECT if
+                      the DF of the EF is the current DF (default: the SFI in
+                      the cached select response of the EF, if any)
         """
 
-        res = self.select_path(ef)
+        # without select response the record length is only known from the
+        # data (force_len) or from the record read for conserve
+        st, sfi = self._sfi_target(ef, sfi)
+        fcp = self._fcp_cache.get(st) if st is not None else None
+        if st is not None and not fcp and (force_len or conserve) and "." not in data:
+            if conserve:
+                data_current, sw = self.read_record(ef, rec_no, sfi=sfi)
+                if not force_len and len(data) != len(data_current):
+                    data = rpad(data, len(data_current))
+                    if len(data) != len(data_current):
+                        raise ValueError(
+                            "Data length exceeds record length (expected max %d, got %d)"
+                            % (len(data_current) // 2, len(data) // 2)
+                        )
+                if data_current.lower() == data.lower():
+                    return None, sw
+            pdu = self.cla_byte + "dc%02x%02x%02x" % (
+                rec_no,
+                (sfi << 3) | 0x04,
+                len(data) // 2,
+            )
+            res = self._send_sfi(pdu + data, st)
+            if verify and not self._journal_record(rec_no, data):
+                self.verify_record(ef, rec_no, data, sfi=sfi)
+            return res
+
+        if fcp:
+            # select response known, the EF is addressed by SFI below
+            res = [fcp]
+        else:
+            st = None
+            res = self.select_path(ef)
         rec_length = self.__record_len(res)
         data = expand_hex(data, rec_length)
 
@@ -317,32 +814,114 @@ class SimCardCommands:
 
         # Save write cycles by reading+comparing before write
         if conserve:
-            data_current, sw = self.read_record(ef, rec_no)
+            data_current, sw = self.read_record(ef, rec_no, sfi=sfi)
             data_current = data_current[0 : rec_length * 2]
-            if data_current == data:
+            if data_current.lower() == data.lower():
                 return None, sw
-
-        pdu = (self.cla_byte + "dc%02x04%02x" % (rec_no, rec_length)) + data
-        res = self._tp.send_apdu_checksw(pdu)
-        if verify:
+            # the EF is current now, whether it was read by SFI or not
+            st = None
+
+        if st is not None:
+            pdu = self.cla_byte + "dc%02x%02x%02x" % (
+                rec_no,
+                (sfi << 3) | 0x04,
+                rec_length,
+            )
+            res = self._send_sfi(pdu + data, st)
+        else:
+            pdu = (self.cla_byte + "dc%02x04%02x" % (rec_no, rec_length)) + data
+            res = self._tp.send_apdu_checksw(pdu)
+        if verify and not self._journal_record(rec_no, data):
             self.verify_record(ef, rec_no, data)
         return res
 
-    def verify_record(self, ef, rec_no: int, data: str):
+    def verify_record(self, ef, rec_no: int, data: str, sfi: Optional[int] = None):
         """Verify record against given data
 
         Args:
                 ef : string or list of strings indicating name or path of linear fixed EF
                 rec_no : record number to read
                 data : hex string of data to be verified
+                sfi : short file identifier of the EF (see read_record)
         """
-        res = self.read_record(ef, rec_no)
+        res = self.read_record(ef, rec_no, sfi=sfi)
         if res[0].lower() != data.lower():
             raise ValueError(
                 "Record verification failed (expected %s, got %s)"
                 % (data.lower(), res[0].lower())
             )
 
+    # Deferred verification: with a journal started, update_binary() and
+    # update_record() called with verify=True only note what they wrote.  The
+    # journal is keyed by the selected file as known to the path tracker, so
+    # writes are verified immediately where that is unknown.
+
+    def start_verify_journal(self):
+        """Defer the verification of writes until verify_journal_pass()."""
+        self.verify_journal = VerifyJournal()
+
+    def _journal_binary(self, data: str, offset: int) -> bool:
+        if self.verify_journal is None or self._cur_file is None:
+            return False
+        if self._cur_file[1] is None:
+            return False
+        self.verify_journal.add_binary(self._cur_file, offset, h2b(data))
+        return True
+
+    def _journal_record(self, rec_no: int, data: str) -> bool:
+        if self.verify_journal is None or self._cur_file is None:
+            return False
+        if self._cur_file[1] is None:
+            return False
+        self.verify_journal.add_record(self._cur_file, rec_no, data)
+        return True
+
+    def _select_ef_state(self, ef_state) -> List[str]:
+        """Select the EF of a path tracker state; returns its path relative to
+        the current DF."""
+        df, fid = ef_state
+        path = list(df) + [fid]
+        cur = self._cur_file
+        if df[0].startswith("adf:"):
+            if cur is None or cur[0][0] != df[0]:
+                self.select_adf(df[0][4:])
+            path = path[1:]
+        self.select_path(path)
+        return [fid]
+
+    def verify_journal_pass(self) -> List[VerifyMismatch]:
+        """Verify all writes noted since start_verify_journal() and stop
+        journaling.  Files are verified one after another, each selected once
+        and read in a single READ BINARY range or READ RECORD sequence.
+
+        Returns:
+                list of VerifyMismatch, empty if the card content is as written
+        """
+        journal, self.verify_journal = self.verify_journal, None
+        report = []  # type: List[VerifyMismatch]
+        if journal is None:
+            return report
+        for ef_state in journal.files():
+            name = "/".join(ef_state[0] + (ef_state[1],))
+            try:
+                path = self._select_ef_state(ef_state)
+                expected = journal.binary.get(ef_state)
+                if expected:
+                    start = min(expected)
+                    end = max(expected) + 1
+                    actual = h2b(self.read_binary(path, end - start, start)[0] or "")
+                    report.extend(_binary_mismatches(name, expected, start, actual))
+                records = journal.records.get(ef_state)
+                if records:
+                    for rec_no, data, sw in self.read_records(path, sorted(records)):
+                        exp = records[rec_no]
+                        act = data[: len(exp)].lower()
+                        if act != exp:
+                            report.append(VerifyMismatch(name, rec_no, 0, exp, act))
+            except (SwMatchError, ValueError) as e:
+                report.append(VerifyMismatch(name, None, 0, "", None, str(e)))
+        return report
+
     def record_size(self, ef):
         """Determine the record size of given file.
 
@@ -359,7 +938,7 @@ class SimCardCommands:
                 ef : string or list of strings indicating name or path of linear fixed EF
         """
         r = self.select_path(ef)
-        return self.__len(r) // self.__record_len(r)
+        return self.__record_info(r)[1]
 
     def binary_size(self, ef):
         """Determine the size of given transparent file.
@@ -460,6 +1039,10 @@ class SimCardCommands:
                 autn : 8 byte Autentication Token (AUTN)
                 context : 16 byte random data ('3g' or 'gsm')
         """
+        # imported here, construct is not needed by any other command
+        from construct import Const, Optional, Select, Struct
+        from pySim.construct import LV
+
         # 3GPP TS 31.102 Section 7.1.2.1
         AuthCmd3G = Struct("rand" / LV, "autn" / Optional(LV))
         AuthResp3GSyncFail = Struct(Const(b"\xDC"), "auts" / LV)
@@ -488,6 +1071,7 @@ class SimCardCommands:
 
     def deactivate_file(self):
         """Execute DECATIVATE FILE command as per TS 102 221 Section 11.1.14."""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_constr_checksw(
             self.cla_byte, "04", "00", "00", None, None, None
         )
@@ -498,34 +1082,41 @@ class SimCardCommands:
         Args:
                 fid : file identifier as hex string
         """
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(self.cla_byte + "44000002" + fid)
 
     def create_file(self, payload: Hexstr):
         """Execute CREEATE FILE command as per TS 102 222 Section 6.3"""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(
             self.cla_byte + "e00000%02x%s" % (len(payload) // 2, payload)
         )
 
     def resize_file(self, payload: Hexstr):
         """Execute RESIZE FILE command as per TS 102 222 Section 6.10"""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(
             "80d40000%02x%s" % (len(payload) // 2, payload)
         )
 
     def delete_file(self, fid):
         """Execute DELETE FILE command as per TS 102 222 Section 6.4"""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(self.cla_byte + "e4000002" + fid)
 
     def terminate_df(self, fid):
         """Execute TERMINATE DF command as per TS 102 222 Section 6.7"""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(self.cla_byte + "e6000002" + fid)
 
     def terminate_ef(self, fid):
         """Execute TERMINATE EF command as per TS 102 222 Section 6.8"""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(self.cla_byte + "e8000002" + fid)
 
     def terminate_card_usage(self):
         """Execute TERMINATE CARD USAGE command as per TS 102 222 Section 6.9"""
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(self.cla_byte + "fe000000")
 
     def manage_channel(self, mode="open", lchan_nr=0):
@@ -540,10 +1131,13 @@ class SimCardCommands:
         else:
             p1 = 0x00
         pdu = self.cla_byte + "70%02x%02x00" % (p1, lchan_nr)
+        self.invalidate_path_cache()
         return self._tp.send_apdu_checksw(pdu)
 
     def reset_card(self):
         """Physically reset the card"""
+        self._max_chunk = None
+        self.invalidate_path_cache()
         return self._tp.reset_card()
 
     def _chv_process_sw(self, op_name, chv_no, pin_code, sw):
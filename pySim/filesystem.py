@@ -25,6 +25,7 @@ not the actual contents / runtime state of interacting with a given smart card.
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import code
+import functools
 import tempfile
 import json
 import abc
@@ -34,7 +35,7 @@ import cmd2
 from cmd2 import CommandSet, with_default_category, with_argparser
 import argparse
 
-from typing import cast, Optional, Iterable, List, Dict, Tuple, Union
+from typing import cast, Callable, Optional, Iterable, List, Dict, Tuple, Union
 
 from smartcard.util import toBytes
 
@@ -74,6 +75,26 @@ def lchan_nr_from_cla(cla: int) -> int:
         raise ValueError("Could not determine logical channel for CLA=%2X" % cla)
 
 
+@functools.lru_cache(maxsize=1024)
+def _select_path_between(
+    cur: "CardFile", target: "CardFile", generation: int
+) -> Optional[Tuple["CardFile", ...]]:
+    """CardFile.build_select_path_to(), memoized by node identity and tree
+    generation.  The files to traverse are the ancestors of cur, from its
+    parent up to the deepest common ancestor of both files, followed by the
+    path from there down to target."""
+    cur_anc = cur._ancestors()
+    target_anc = target._ancestors()
+    # the common ancestor must be a proper ancestor of both files
+    depth = 0
+    limit = min(len(cur_anc), len(target_anc)) - 1
+    while depth < limit and cur_anc[depth] is target_anc[depth]:
+        depth += 1
+    if depth == 0:
+        return None
+    return cur_anc[depth - 1 : -1][::-1] + target_anc[depth:]
+
+
 class CardFile:
     """Base class for all objects in the smart card filesystem.
     Serve as a common ancestor to all other file types; rarely used directly.
@@ -82,6 +103,14 @@ class CardFile:
     RESERVED_NAMES = ["..", ".", "/", "MF"]
     RESERVED_FIDS = ["3f00"]
 
+    # bumped on every change of the file system tree structure; invalidates
+    # the selectables indexes of all files (see get_selectables)
+    _tree_generation = 0
+    _sels_generation = -1
+    _sels_index = None  # type: Optional[Dict[tuple, Dict[str, CardFile]]]
+    _anc_generation = -1
+    _anc = ()  # type: Tuple[CardFile, ...]
+
     def __init__(
         self,
         fid: str = None,
@@ -156,33 +185,25 @@ class CardFile:
             ret.append(elem)
         return ret
 
+    def _ancestors(self) -> Tuple["CardFile", ...]:
+        """Files from the root down to (and including) this file, computed once
+        per tree structure.  The position of a file in it is its depth."""
+        if self._anc_generation != CardFile._tree_generation:
+            if self.parent and self.parent != self:
+                self._anc = self.parent._ancestors() + (self,)
+            else:
+                self._anc = (self,)
+            self._anc_generation = CardFile._tree_generation
+        return self._anc
+
     def fully_qualified_path_fobj(self) -> List["CardFile"]:
         """Return fully qualified path to file as list of CardFile instance references."""
-        if self.parent and self.parent != self:
-            ret = self.parent.fully_qualified_path_fobj()
-        else:
-            ret = []
-        if self:
-            ret.append(self)
-        return ret
+        return list(self._ancestors())
 
     def build_select_path_to(self, target: "CardFile") -> Optional[List["CardFile"]]:
         """Build the relative sequence of files we need to traverse to get from us to 'target'."""
-        cur_fqpath = self.fully_qualified_path_fobj()
-        target_fqpath = target.fully_qualified_path_fobj()
-        inter_path = []
-        cur_fqpath.pop()  # drop last element (currently selected file, doesn't need re-selection
-        cur_fqpath.reverse()
-        for ce in cur_fqpath:
-            inter_path.append(ce)
-            for i in range(0, len(target_fqpath) - 1):
-                te = target_fqpath[i]
-                if te == ce:
-                    for te2 in target_fqpath[i + 1 :]:
-                        inter_path.append(te2)
-                    # we found our common ancestor
-                    return inter_path
-        return None
+        inter_path = _select_path_between(self, target, CardFile._tree_generation)
+        return list(inter_path) if inter_path is not None else None
 
     def get_mf(self) -> Optional["CardMF"]:
         """Return the MF (root) of the file system."""
@@ -232,9 +253,17 @@ class CardFile:
         sels.update(self.parent._get_parent_selectables(None, flags))
         return sels
 
+    @staticmethod
+    def _tree_changed():
+        """Invalidate all selectables indexes after a change of the tree."""
+        CardFile._tree_generation += 1
+
     def get_selectables(self, flags=[]) -> Dict[str, "CardFile"]:
         """Return a dict of {'identifier': File} that is selectable from the current file.
 
+        The dict is built once per file and flags and then served from an index
+        until the file system tree changes; callers must not modify it.
+
         Args:
             flags : Specify which selectables to return 'FIDS' and/or 'NAMES';
                     If not specified, all selectables will be returned.
@@ -242,6 +271,17 @@ class CardFile:
             dict containing all selectable items. Key is identifier (string), value
             a reference to a CardFile (or derived class) instance.
         """
+        if self._sels_generation != CardFile._tree_generation:
+            self._sels_index = {}
+            self._sels_generation = CardFile._tree_generation
+        key = tuple(flags)
+        sels = self._sels_index.get(key)
+        if sels is None:
+            sels = self._sels_index[key] = self._build_selectables(flags)
+        return sels
+
+    def _build_selectables(self, flags=[]) -> Dict[str, "CardFile"]:
+        """Compute the selectables of get_selectables(), without index."""
         sels = {}
         # we can always select ourself
         if flags == [] or "SELF" in flags:
@@ -337,26 +377,61 @@ class CardDF(CardFile):
             if not "fid" in kwargs:
                 raise TypeError("fid is mandatory for all DF")
         super().__init__(**kwargs)
-        self.children = dict()
+        self._children = dict()  # type: Dict[str, CardFile]
+        # secondary indexes of children, maintained by add_file()
+        self._children_by_name = {}  # type: Dict[str, CardFile]
+        self._children_by_sfid = {}  # type: Dict[int, CardFile]
+        # factories of files not built yet, see add_files_lazy()
+        self._lazy_files = (
+            []
+        )  # type: List[Tuple[Callable[[], Iterable[CardFile]], bool]]
         self.shell_commands = [self.ShellCommands()]
         # dict of CardFile affected by service(int), indexed by service
-        self.files_by_service = {}
+        self._files_by_service = {}  # type: Dict[int, List[CardFile]]
+        # child DFs whose files are yet to be added to _files_by_service
+        self._service_dfs = []  # type: List[CardDF]
 
     def __str__(self):
         return "DF(%s)" % (super().__str__())
 
+    @property
+    def children(self) -> Dict[str, CardFile]:
+        """Files of this DF by FID, built from add_files_lazy() factories on
+        first access."""
+        if self._lazy_files:
+            self._materialize()
+        return self._children
+
+    @property
+    def files_by_service(self) -> Dict[int, List[CardFile]]:
+        """Files of this DF and its child DFs affected by a service (int)."""
+        if self._lazy_files:
+            self._materialize()
+        while self._service_dfs:
+            df = self._service_dfs.pop(0)
+            for c in df.children.values():
+                self._add_file_services(c)
+                if isinstance(c, CardDF):
+                    for gc in c.children.values():
+                        if isinstance(gc, CardDF):
+                            if gc._has_service():
+                                raise ValueError(
+                                    "TODO: implement recursive service -> file mapping"
+                                )
+        return self._files_by_service
+
     def _add_file_services(self, child):
         """Add a child (DF/EF) to the files_by_services of the parent."""
         if not child.service:
             return
         if isinstance(child.service, int):
-            self.files_by_service.setdefault(child.service, []).append(child)
+            self._files_by_service.setdefault(child.service, []).append(child)
         elif isinstance(child.service, list):
             for service in child.service:
-                self.files_by_service.setdefault(service, []).append(child)
+                self._files_by_service.setdefault(service, []).append(child)
         elif isinstance(child.service, tuple):
             for service in child.service:
-                self.files_by_service.setdefault(service, []).append(child)
+                self._files_by_service.setdefault(service, []).append(child)
         else:
             raise ValueError
 
@@ -398,20 +473,19 @@ class CardDF(CardFile):
             raise ValueError(
                 "File with given name %s already exists in %s" % (child.name, self)
             )
-        self.children[child.fid] = child
+        self._children[child.fid] = child
+        if child.name:
+            self._children_by_name[child.name] = child
+        if child.sfid is not None:
+            self._children_by_sfid[child.sfid] = child
         child.parent = self
-        # update the service -> file relationship table
+        CardFile._tree_changed()
+        # update the service -> file relationship table; the files of a child
+        # DF are added when files_by_service is used, so that they need not
+        # be built before
         self._add_file_services(child)
         if isinstance(child, CardDF):
-            for c in child.children.values():
-                self._add_file_services(c)
-                if isinstance(c, CardDF):
-                    for gc in c.children.values():
-                        if isinstance(gc, CardDF):
-                            if gc._has_service():
-                                raise ValueError(
-                                    "TODO: implement recursive service -> file mapping"
-                                )
+            self._service_dfs.append(child)
 
     def add_files(self, children: Iterable[CardFile], ignore_existing: bool = False):
         """Add a list of child (DF/EF) to this DF
@@ -423,18 +497,31 @@ class CardDF(CardFile):
         for child in children:
             self.add_file(child, ignore_existing)
 
-    def get_selectables(self, flags=[]) -> dict:
-        """Return a dict of {'identifier': File} that is selectable from the current DF.
+    def add_files_lazy(
+        self,
+        factory: Callable[[], Iterable[CardFile]],
+        ignore_existing: bool = False,
+    ):
+        """Register a factory of child (DF/EF) files, called to add them the
+        first time the files of this DF are needed (selection, lookup, listing
+        or decoding within this DF).  Spares building the file objects and
+        their constructs for DFs that are never used.
 
         Args:
-            flags : Specify which selectables to return 'FIDS' and/or 'NAMES';
-                    If not specified, all selectables will be returned.
-        Returns:
-            dict containing all selectable items. Key is identifier (string), value
-            a reference to a CardFile (or derived class) instance.
+            factory: Callable returning the new DF/EFs to be added
+            ignore_existing: Ignore, if file[s] with given FID already exists. Old one[s] will be kept.
         """
+        self._lazy_files.append((factory, ignore_existing))
+
+    def _materialize(self):
+        """Build and add the files of all pending add_files_lazy() factories."""
+        pending, self._lazy_files = self._lazy_files, []
+        for factory, ignore_existing in pending:
+            self.add_files(factory(), ignore_existing)
+
+    def _build_selectables(self, flags=[]) -> dict:
         # global selectables + our children
-        sels = super().get_selectables(flags)
+        sels = super()._build_selectables(flags)
         if flags == [] or "FIDS" in flags:
             sels.update({x.fid: x for x in self.children.values() if x.fid})
         if flags == [] or "FNAMES" in flags:
@@ -445,19 +532,19 @@ class CardDF(CardFile):
         """Find a file with given name within current DF."""
         if name == None:
             return None
-        for i in self.children.values():
-            if i.name and i.name == name:
-                return i
-        return None
+        if self._lazy_files:
+            self._materialize()
+        return self._children_by_name.get(name)
 
     def lookup_file_by_sfid(self, sfid: Optional[str]) -> Optional[CardFile]:
         """Find a file with given short file ID within current DF."""
         if sfid == None:
             return None
-        for i in self.children.values():
-            if i.sfid == int(str(sfid)):
-                return i
-        return None
+        if not isinstance(sfid, int):
+            sfid = int(str(sfid))
+        if self._lazy_files:
+            self._materialize()
+        return self._children_by_sfid.get(sfid)
 
     def lookup_file_by_fid(self, fid: str) -> Optional[CardFile]:
         """Find a file with given file ID within current DF."""
@@ -490,22 +577,14 @@ class CardMF(CardDF):
             raise ValueError("AID %s already exists" % (app.aid))
         self.applications[app.aid] = app
         app.parent = self
+        CardFile._tree_changed()
 
     def get_app_names(self):
         """Get list of completions (AID names)"""
         return list(self.applications.values())
 
-    def get_selectables(self, flags=[]) -> dict:
-        """Return a dict of {'identifier': File} that is selectable from the current DF.
-
-        Args:
-            flags : Specify which selectables to return 'FIDS' and/or 'NAMES';
-                    If not specified, all selectables will be returned.
-        Returns:
-            dict containing all selectable items. Key is identifier (string), value
-            a reference to a CardFile (or derived class) instance.
-        """
-        sels = super().get_selectables(flags)
+    def _build_selectables(self, flags=[]) -> dict:
+        sels = super()._build_selectables(flags)
         sels.update(self.get_app_selectables(flags))
         return sels
 
@@ -570,18 +649,9 @@ class CardEF(CardFile):
     def __str__(self):
         return "EF(%s)" % (super().__str__())
 
-    def get_selectables(self, flags=[]) -> dict:
-        """Return a dict of {'identifier': File} that is selectable from the current DF.
-
-        Args:
-            flags : Specify which selectables to return 'FIDS' and/or 'NAMES';
-                    If not specified, all selectables will be returned.
-        Returns:
-            dict containing all selectable items. Key is identifier (string), value
-            a reference to a CardFile (or derived class) instance.
-        """
+    def _build_selectables(self, flags=[]) -> dict:
         # global selectable names + those of the parent DF
-        sels = super().get_selectables(flags)
+        sels = super()._build_selectables(flags)
         if flags == [] or "FIDS" in flags:
             sels.update(
                 {x.fid: x for x in self.parent.children.values() if x.fid and x != self}
@@ -889,9 +959,8 @@ class LinFixedEF(CardEF):
         @cmd2.with_argparser(read_rec_parser)
         def do_read_record(self, opts):
             """Read one or multiple records from a record-oriented EF"""
-            for r in range(opts.count):
-                recnr = opts.record_nr + r
-                (data, sw) = self._cmd.lchan.read_record(recnr)
+            recnrs = range(opts.record_nr, opts.record_nr + opts.count)
+            for recnr, data, sw in self._cmd.lchan.read_records(recnrs):
                 if len(data) > 0:
                     recstr = str(data)
                 else:
@@ -919,9 +988,7 @@ class LinFixedEF(CardEF):
         @cmd2.with_argparser(read_recs_parser)
         def do_read_records(self, opts):
             """Read all records from a record-oriented EF"""
-            num_of_rec = self._cmd.lchan.selected_file_num_of_rec()
-            for recnr in range(1, 1 + num_of_rec):
-                (data, sw) = self._cmd.lchan.read_record(recnr)
+            for recnr, data, sw in self._cmd.lchan.read_records():
                 if len(data) > 0:
                     recstr = str(data)
                 else:
@@ -938,12 +1005,12 @@ class LinFixedEF(CardEF):
         @cmd2.with_argparser(read_recs_dec_parser)
         def do_read_records_decoded(self, opts):
             """Read + decode all records from a record-oriented EF"""
-            num_of_rec = self._cmd.lchan.selected_file_num_of_rec()
             # collect all results in list so they are rendered as JSON list when printing
             data_list = []
-            for recnr in range(1, 1 + num_of_rec):
-                (data, sw) = self._cmd.lchan.read_record_dec(recnr)
-                data_list.append(data)
+            for recnr, data, sw in self._cmd.lchan.read_records():
+                data_list.append(
+                    self._cmd.lchan.selected_file.decode_record_hex(data, recnr)
+                )
             self._cmd.poutput_json(data_list, opts.oneline)
 
         upd_rec_parser = argparse.ArgumentParser()
@@ -1837,6 +1904,18 @@ class RuntimeLchan:
         # returns a string of hex nibbles
         return self.rs.card._scc.read_record(self.selected_file.fid, rec_nr)
 
+    def read_records(self, rec_nrs: Iterable[int] = None):
+        """Read multiple records as binary data, selecting the EF only once.
+
+        Args:
+            rec_nrs : Record numbers to read (default: all records)
+        Returns:
+            generator of tuple(rec_nr, hex string of record data, sw)
+        """
+        if not isinstance(self.selected_file, LinFixedEF):
+            raise TypeError("Only works with Linear Fixed EF")
+        return self.rs.card._scc.read_records(self.selected_file.fid, rec_nrs)
+
     def read_record_dec(self, rec_nr: int = 0) -> Tuple[dict, str]:
         """Read a record and decode it to abstract data.
 
@@ -486,53 +486,62 @@ class EF_DialledVals(TransparentEF):
 class DF_EIRENE(CardDF):
     def __init__(self, fid="7fe0", name="DF.EIRENE", desc="GSM-R EIRENE"):
         super().__init__(fid=fid, name=name, desc=desc)
-        files = [
-            # Section 7.1.6 / Table 10 EIRENE GSM EFs
-            EF_FN(),
-            EF_CallconfC(),
-            EF_CallconfI(),
-            EF_Shunting(),
-            EF_GsmrPLMN(),
-            EF_IC(),
-            EF_NW(),
-            # support of the numbering plan
-            EF_Switching(fid="6f8e", name="EF.CT", desc="Call Type"),
-            EF_Switching(fid="6f8f", name="EF.SC", desc="Short Code"),
-            EF_Predefined(fid="6f88", name="EF.FC", desc="Function Code"),
-            EF_Predefined(fid="6f89", name="EF.Service", desc="VGCS/VBS Service Code"),
-            EF_Predefined(
-                fid="6f8a", name="EF.Call", desc="First digit of the group ID"
-            ),
-            EF_Predefined(
-                fid="6f8b",
-                name="EF.FctTeam",
-                desc="Call Type 6 Team Type + Team member function",
-            ),
-            EF_Predefined(
-                fid="6f92",
-                name="EF.Controller",
-                desc="Call Type 7 Controller function code",
-            ),
-            EF_Predefined(
-                fid="6f8c", name="EF.Gateway", desc="Access to external networks"
-            ),
-            EF_DialledVals(
-                fid="6f81",
-                name="EF.5to8digits",
-                desc="Call Type 2 User Identity Number length",
-            ),
-            EF_DialledVals(fid="6f82", name="EF.2digits", desc="2 digits input"),
-            EF_DialledVals(fid="6f83", name="EF.8digits", desc="8 digits input"),
-            EF_DialledVals(fid="6f84", name="EF.9digits", desc="9 digits input"),
-            EF_DialledVals(fid="6f85", name="EF.SSSSS", desc="Group call area input"),
-            EF_DialledVals(
-                fid="6f86", name="EF.LLLLL", desc="Location number Call Type 6"
-            ),
-            EF_DialledVals(
-                fid="6f91", name="EF.Location", desc="Location number Call Type 7"
-            ),
-            EF_DialledVals(
-                fid="6f87", name="EF.FreeNumber", desc="Free Number Call Type 0 and 8"
-            ),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                # Section 7.1.6 / Table 10 EIRENE GSM EFs
+                EF_FN(),
+                EF_CallconfC(),
+                EF_CallconfI(),
+                EF_Shunting(),
+                EF_GsmrPLMN(),
+                EF_IC(),
+                EF_NW(),
+                # support of the numbering plan
+                EF_Switching(fid="6f8e", name="EF.CT", desc="Call Type"),
+                EF_Switching(fid="6f8f", name="EF.SC", desc="Short Code"),
+                EF_Predefined(fid="6f88", name="EF.FC", desc="Function Code"),
+                EF_Predefined(
+                    fid="6f89", name="EF.Service", desc="VGCS/VBS Service Code"
+                ),
+                EF_Predefined(
+                    fid="6f8a", name="EF.Call", desc="First digit of the group ID"
+                ),
+                EF_Predefined(
+                    fid="6f8b",
+                    name="EF.FctTeam",
+                    desc="Call Type 6 Team Type + Team member function",
+                ),
+                EF_Predefined(
+                    fid="6f92",
+                    name="EF.Controller",
+                    desc="Call Type 7 Controller function code",
+                ),
+                EF_Predefined(
+                    fid="6f8c", name="EF.Gateway", desc="Access to external networks"
+                ),
+                EF_DialledVals(
+                    fid="6f81",
+                    name="EF.5to8digits",
+                    desc="Call Type 2 User Identity Number length",
+                ),
+                EF_DialledVals(fid="6f82", name="EF.2digits", desc="2 digits input"),
+                EF_DialledVals(fid="6f83", name="EF.8digits", desc="8 digits input"),
+                EF_DialledVals(fid="6f84", name="EF.9digits", desc="9 digits input"),
+                EF_DialledVals(
+                    fid="6f85", name="EF.SSSSS", desc="Group call area input"
+                ),
+                EF_DialledVals(
+                    fid="6f86", name="EF.LLLLL", desc="Location number Call Type 6"
+                ),
+                EF_DialledVals(
+                    fid="6f91", name="EF.Location", desc="Location number Call Type 7"
+                ),
+                EF_DialledVals(
+                    fid="6f87",
+                    name="EF.FreeNumber",
+                    desc="Free Number Call Type 0 and 8",
+                ),
+            ]
+
+        self.add_files_lazy(files)
@@ -200,10 +200,6 @@ class OtaDialect(abc.ABC):
         pass
 
 
-from Cryptodome.Cipher import DES, DES3, AES
-from Cryptodome.Hash import CMAC
-
-
 class OtaAlgo(abc.ABC):
     iv = property(lambda self: bytes([0] * self.blocksize))
     blocksize = None
@@ -316,10 +312,14 @@ class OtaAlgoCryptDES(OtaAlgoCrypt):
     blocksize = 8
 
     def _encrypt(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import DES
+
         cipher = DES.new(self.otak.kic, DES.MODE_CBC, self.iv)
         return cipher.encrypt(data)
 
     def _decrypt(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import DES
+
         cipher = DES.new(self.otak.kic, DES.MODE_CBC, self.iv)
         return cipher.decrypt(data)
 
@@ -332,6 +332,8 @@ class OtaAlgoAuthDES(OtaAlgoAuth):
     blocksize = 8
 
     def _sign(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import DES
+
         cipher = DES.new(self.otak.kid, DES.MODE_CBC, self.iv)
         ciph = cipher.encrypt(data)
         return ciph[len(ciph) - 8 :]
@@ -343,10 +345,14 @@ class OtaAlgoCryptDES3(OtaAlgoCrypt):
     blocksize = 8
 
     def _encrypt(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import DES3
+
         cipher = DES3.new(self.otak.kic, DES3.MODE_CBC, self.iv)
         return cipher.encrypt(data)
 
     def _decrypt(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import DES3
+
         cipher = DES3.new(self.otak.kic, DES3.MODE_CBC, self.iv)
         return cipher.decrypt(data)
 
@@ -357,6 +363,8 @@ class OtaAlgoAuthDES3(OtaAlgoAuth):
     blocksize = 8
 
     def _sign(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import DES3
+
         cipher = DES3.new(self.otak.kid, DES3.MODE_CBC, self.iv)
         ciph = cipher.encrypt(data)
         return ciph[len(ciph) - 8 :]
@@ -368,10 +376,14 @@ class OtaAlgoCryptAES(OtaAlgoCrypt):
     blocksize = 16  # TODO: is this needed?
 
     def _encrypt(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import AES
+
         cipher = AES.new(self.otak.kic, AES.MODE_CBC, self.iv)
         return cipher.encrypt(data)
 
     def _decrypt(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import AES
+
         cipher = AES.new(self.otak.kic, AES.MODE_CBC, self.iv)
         return cipher.decrypt(data)
 
@@ -382,6 +394,9 @@ class OtaAlgoAuthAES(OtaAlgoAuth):
     blocksize = 1  # AES CMAC doesn't need any padding by us
 
     def _sign(self, data: bytes) -> bytes:
+        from Cryptodome.Cipher import AES
+        from Cryptodome.Hash import CMAC
+
         cmac = CMAC.new(self.otak.kid, ciphermod=AES, mac_len=8)
         cmac.update(data)
         ciph = cmac.digest()
@@ -168,22 +168,25 @@ class EF_SIM_AUTH_KEY(TransparentEF):
 class DF_SYSTEM(CardDF):
     def __init__(self):
         super().__init__(fid="a515", name="DF.SYSTEM", desc="CardOS specifics")
-        files = [
-            EF_PIN("6f01", "EF.CHV1"),
-            EF_PIN("6f81", "EF.CHV2"),
-            EF_PIN("6f0a", "EF.ADM1"),
-            EF_PIN("6f0b", "EF.ADM2"),
-            EF_PIN("6f0c", "EF.ADM3"),
-            EF_PIN("6f0d", "EF.ADM4"),
-            EF_MILENAGE_CFG(),
-            EF_0348_KEY(),
-            EF_SIM_AUTH_COUNTER(),
-            EF_SIM_AUTH_KEY(),
-            EF_0348_COUNT(),
-            EF_GP_COUNT(),
-            EF_GP_DIV_DATA(),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_PIN("6f01", "EF.CHV1"),
+                EF_PIN("6f81", "EF.CHV2"),
+                EF_PIN("6f0a", "EF.ADM1"),
+                EF_PIN("6f0b", "EF.ADM2"),
+                EF_PIN("6f0c", "EF.ADM3"),
+                EF_PIN("6f0d", "EF.ADM4"),
+                EF_MILENAGE_CFG(),
+                EF_0348_KEY(),
+                EF_SIM_AUTH_COUNTER(),
+                EF_SIM_AUTH_KEY(),
+                EF_0348_COUNT(),
+                EF_GP_COUNT(),
+                EF_GP_DIV_DATA(),
+            ]
+
+        self.add_files_lazy(files)
 
     def decode_select_response(self, resp_hex):
         return pySim.ts_102_221.CardProfileUICC.decode_select_response(resp_hex)
@@ -5,12 +5,15 @@
 
 import abc
 import argparse
+import time
 from typing import Optional, Tuple
 
 from pySim.exceptions import *
-from pySim.construct import filter_dict
 from pySim.utils import sw_match, b2h, h2b, i2h, Hexstr
-from pySim.cat import ProactiveCommand, CommandDetails, DeviceIdentities, Result
+
+# pySim.cat and pySim.construct (construct, gsm0338, the TLV model) are only
+# imported once a proactive session starts or a construct based APDU is sent,
+# plain script execution never needs them.
 
 #
 # Copyright (C) 2009-2010  Sylvain Munaut <tnt@246tNt.com>
@@ -38,38 +41,106 @@ class ApduTracer:
     def trace_response(self, cmd, sw, resp):
         pass
 
+    def trace_reset(self, atr):
+        pass
+
 
 class ProactiveHandler(abc.ABC):
     """Abstract base class representing the interface of some code that handles
     the proactive commands, as returned by the card in responses to the FETCH
     command."""
 
-    def receive_fetch_raw(self, pcmd: ProactiveCommand, parsed: Hexstr):
+    @classmethod
+    def _handler_table(cls):
+        """Map of proactive command class name to handle_<name> method, built
+        once per handler class."""
+        table = cls.__dict__.get("_handlers")
+        if table is None:
+            table = {
+                name[len("handle_") :]: getattr(cls, name)
+                for name in dir(cls)
+                if name.startswith("handle_")
+            }
+            cls._handlers = table
+        return table
+
+    def receive_fetch_raw(self, pcmd: "ProactiveCommand", parsed: Hexstr):
         # try to find a generic handler like handle_SendShortMessage
-        handle_name = "handle_%s" % type(parsed).__name__
-        if hasattr(self, handle_name):
-            handler = getattr(self, handle_name)
-            return handler(pcmd.decoded)
+        handler = self._handler_table().get(type(parsed).__name__)
+        if handler is not None:
+            return handler(self, pcmd.decoded)
         # fall back to common handler
         return self.receive_fetch(pcmd)
 
-    def receive_fetch(self, pcmd: ProactiveCommand):
+    def receive_fetch(self, pcmd: "ProactiveCommand"):
         """Default handler for not otherwise handled proactive commands."""
         raise NotImplementedError("No handler method for %s" % pcmd.decoded)
 
 
+# Device Identities and Result TLVs of a TERMINAL RESPONSE, by general result
+_tr_tlv_cache = {}
+
+
+def _terminal_response_tlvs(general_result: str) -> bytes:
+    """Encoded Device Identities + Result TLVs for a TERMINAL RESPONSE.  They do
+    not depend on the proactive command, so they are only encoded once."""
+    tlvs = _tr_tlv_cache.get(general_result)
+    if tlvs is None:
+        from pySim.cat import DeviceIdentities, Result
+
+        # The Device Identities are fixed. (TS 102 223 V4.0.0 Section 6.8.2)
+        device_identities = DeviceIdentities()
+        device_identities.from_dict(
+            {
+                "device_identities": {
+                    "source_dev_id": "terminal",
+                    "dest_dev_id": "uicc",
+                }
+            }
+        )
+        result = Result()
+        result.from_dict(
+            {
+                "result": {
+                    "general_result": general_result,
+                    "additional_information": "",
+                }
+            }
+        )
+        tlvs = _tr_tlv_cache[general_result] = (
+            device_identities.to_tlv() + result.to_tlv()
+        )
+    return tlvs
+
+
 class LinkBase(abc.ABC):
     """Base class for link/transport to card."""
 
+    # Whether the link can carry extended length APDUs (ISO/IEC 7816-4
+    # Section 5.1), and the largest Lc / Le it can carry then.  Whether the
+    # card supports them is a separate question, see SimCardCommands.
+    extended_length = False
+    max_extended_length = 65535
+    # transmission protocol in use: 0 = T=0, 1 = T=1
+    protocol = 0
+    # incremented on every (re)connect to the card, which may negotiate
+    # another protocol; lets users of the link drop card dependent state
+    connect_count = 0
+    # upper bound of FETCH / TERMINAL RESPONSE cycles in one proactive session
+    max_proactive_commands = 256
+
     def __init__(
         self,
         sw_interpreter=None,
         apdu_tracer=None,
         proactive_handler: Optional[ProactiveHandler] = None,
+        apdu_stats=None,
     ):
         self.sw_interpreter = sw_interpreter
         self.apdu_tracer = apdu_tracer
         self.proactive_handler = proactive_handler
+        # optional pySim.transport.stats.ApduStats instance
+        self.apdu_stats = apdu_stats
 
     @abc.abstractmethod
     def _send_apdu_raw(self, pdu: str) -> Tuple[str, str]:
@@ -100,51 +171,123 @@ class LinkBase(abc.ABC):
     def reset_card(self):
         """Resets the card (power down/up)"""
 
-    def send_apdu_raw(self, pdu: str):
+    @staticmethod
+    def build_apdu(
+        cla: int, ins: int, p1: int, p2: int, data: bytes = b"", le: int = None
+    ) -> bytes:
+        """Encode a command APDU, using extended Lc / Le fields only when the
+        command does not fit the short encoding (more than 255 bytes of data
+        or more than 256 bytes expected).
+
+        Args:
+           cla, ins, p1, p2 : header bytes
+           data : command data (Lc is derived from it)
+           le : expected response length, None for no Le field
+        Returns:
+           command APDU as bytes
+        """
+        apdu = bytes((cla, ins, p1, p2))
+        if len(data) <= 255 and (le is None or le <= 256):
+            if data:
+                apdu += bytes((len(data),)) + data
+            if le is not None:
+                apdu += bytes((le & 0xFF,))
+        else:
+            if data:
+                apdu += b"\x00" + len(data).to_bytes(2, "big") + data
+            if le is not None:
+                apdu += (b"" if data else b"\x00") + (le & 0xFFFF).to_bytes(2, "big")
+        return apdu
+
+    def _send_apdu_bytes(self, apdu: bytes) -> Tuple[bytes, int]:
+        """Implementation specific method for sending the APDU as bytes.
+
+        The default goes through _send_apdu_raw(); links that talk bytes to
+        the reader should override it."""
+        data, sw = self._send_apdu_raw(apdu.hex())
+        return bytes.fromhex(data), int(sw, 16)
+
+    def send_apdu_raw_bytes(self, apdu: bytes) -> Tuple[bytes, int]:
         """Sends an APDU with minimal processing
 
         Args:
-           pdu : string of hexadecimal characters (ex. "A0A40000023F00")
+           apdu : command APDU (ex. bytes.fromhex("A0A40000023F00"))
         Returns:
            tuple(data, sw), where
-                        data : string (in hex) of returned data (ex. "074F4EFFFF")
-                        sw   : string (in hex) of status word (ex. "9000")
+                        data : bytes of returned data
+                        sw   : status word as integer (ex. 0x9000)
         """
         if self.apdu_tracer:
-            self.apdu_tracer.trace_command(pdu)
-        (data, sw) = self._send_apdu_raw(pdu)
+            self.apdu_tracer.trace_command(apdu.hex())
+        if self.apdu_stats:
+            start = time.perf_counter_ns()
+            (data, sw) = self._send_apdu_bytes(apdu)
+            self.apdu_stats.record(apdu[1], start, time.perf_counter_ns())
+        else:
+            (data, sw) = self._send_apdu_bytes(apdu)
         if self.apdu_tracer:
-            self.apdu_tracer.trace_response(pdu, sw, data)
+            self.apdu_tracer.trace_response(apdu.hex(), "%04x" % sw, data.hex())
         return (data, sw)
 
-    def send_apdu(self, pdu):
+    def send_apdu_bytes(self, apdu: bytes) -> Tuple[bytes, int]:
         """Sends an APDU and auto fetch response data
 
         Args:
-           pdu : string of hexadecimal characters (ex. "A0A40000023F00")
+           apdu : command APDU
         Returns:
            tuple(data, sw), where
-                        data : string (in hex) of returned data (ex. "074F4EFFFF")
-                        sw   : string (in hex) of status word (ex. "9000")
+                        data : bytes of returned data
+                        sw   : status word as integer (ex. 0x9000)
         """
-        data, sw = self.send_apdu_raw(pdu)
+        data, sw = self.send_apdu_raw_bytes(apdu)
 
         # When we have sent the first APDU, the SW may indicate that there are response bytes
         # available. There are two SWs commonly used for this 9fxx (sim) and 61xx (usim), where
         # xx is the number of response bytes available.
         # See also:
-        if sw is not None:
-            if (sw[0:2] == "9f") or (sw[0:2] == "61"):
-                # SW1=9F: 3GPP TS 51.011 9.4.1, Responses to commands which are correctly executed
-                # SW1=61: ISO/IEC 7816-4, Table 5 — General meaning of the interindustry values of SW1-SW2
-                pdu_gr = pdu[0:2] + "c00000" + sw[2:4]
-                data, sw = self.send_apdu_raw(pdu_gr)
-            if sw[0:2] == "6c":
-                # SW1=6C: ETSI TS 102 221 Table 7.1: Procedure byte coding
-                pdu_gr = pdu[0:8] + sw[2:4]
-                data, sw = self.send_apdu_raw(pdu_gr)
-
-        return data.upper(), sw
+        sw1 = sw >> 8
+        if sw1 == 0x9F or sw1 == 0x61:
+            # SW1=9F: 3GPP TS 51.011 9.4.1, Responses to commands which are correctly executed
+            # SW1=61: ISO/IEC 7816-4, Table 5 — General meaning of the interindustry values of SW1-SW2
+            data, sw = self.send_apdu_raw_bytes(
+                bytes((apdu[0], 0xC0, 0x00, 0x00, sw & 0xFF))
+            )
+            sw1 = sw >> 8
+            if self.apdu_stats:
+                self.apdu_stats.get_response += 1
+        if sw1 == 0x6C:
+            # SW1=6C: ETSI TS 102 221 Table 7.1: Procedure byte coding
+            data, sw = self.send_apdu_raw_bytes(apdu[0:4] + bytes((sw & 0xFF,)))
+            if self.apdu_stats:
+                self.apdu_stats.resend_6c += 1
+
+        return data, sw
+
+    def send_apdu_raw(self, pdu: str):
+        """Sends an APDU with minimal processing
+
+        Args:
+           pdu : string of hexadecimal characters (ex. "A0A40000023F00")
+        Returns:
+           tuple(data, sw), where
+                        data : string (in hex) of returned data (ex. "074F4EFFFF")
+                        sw   : string (in hex) of status word (ex. "9000")
+        """
+        data, sw = self.send_apdu_raw_bytes(bytes.fromhex(pdu))
+        return data.hex(), "%04x" % sw
+
+    def send_apdu(self, pdu):
+        """Sends an APDU and auto fetch response data
+
+        Args:
+           pdu : string of hexadecimal characters (ex. "A0A40000023F00")
+        Returns:
+           tuple(data, sw), where
+                        data : string (in hex) of returned data (ex. "074F4EFFFF")
+                        sw   : string (in hex) of status word (ex. "9000")
+        """
+        data, sw = self.send_apdu_bytes(bytes.fromhex(pdu))
+        return data.hex().upper(), "%04x" % sw
 
     def send_apdu_checksw(self, pdu, sw="9000"):
         """Sends an APDU and check returned SW
@@ -161,41 +304,48 @@ class LinkBase(abc.ABC):
         rv = self.send_apdu(pdu)
         last_sw = rv[1]
 
-        while sw == "9000" and sw_match(last_sw, "91xx"):
+        if sw == "9000" and last_sw[0:2] == "91":
             # It *was* successful after all -- the extra pieces FETCH handled
             # need not concern the caller.
             rv = (rv[0], "9000")
-            # proactive sim as per TS 102 221 Setion 7.4.2
-            # TODO: Check SW manually to avoid recursing on the stack (provided this piece of code stays in this place)
-            fetch_rv = self.send_apdu_checksw("80120000" + last_sw[2:], sw)
-            # Setting this in case we later decide not to send a terminal
-            # response immediately unconditionally -- the card may still have
-            # something pending even though the last command was not processed
-            # yet.
-            last_sw = fetch_rv[1]
+            self._proactive_session(last_sw)
+
+        if not sw_match(rv[1], sw):
+            raise SwMatchError(rv[1], sw.lower(), self.sw_interpreter)
+        return rv
+
+    def _proactive_session(self, last_sw: str):
+        """Run FETCH / TERMINAL RESPONSE until the card has no more proactive
+        commands pending, as per TS 102 221 Section 7.4.2.
+
+        Args:
+           last_sw : the 91xx status word that started the session
+        """
+        from pySim.cat import ProactiveCommand, CommandDetails
+
+        start = time.perf_counter_ns()
+        count = 0
+        while last_sw[0:2] == "91":
+            if count >= self.max_proactive_commands:
+                raise ProtocolError(
+                    "Card keeps sending proactive commands, giving up after %d" % count
+                )
+            count += 1
+            fetch_rv = self.send_apdu("80120000" + last_sw[2:])
+            if not sw_match(fetch_rv[1], "9000") and fetch_rv[1][0:2] != "91":
+                raise SwMatchError(fetch_rv[1], "9000", self.sw_interpreter)
             # parse the proactive command
             pcmd = ProactiveCommand()
             parsed = pcmd.from_tlv(h2b(fetch_rv[0]))
             print("FETCH: %s (%s)" % (fetch_rv[0], type(parsed).__name__))
-            result = Result()
             if self.proactive_handler:
                 # Extension point: If this does return a list of TLV objects,
                 # they could be appended after the Result; if the first is a
                 # Result, that cuold replace the one built here.
                 self.proactive_handler.receive_fetch_raw(pcmd, parsed)
-                result.from_dict(
-                    {
-                        "general_result": "performed_successfully",
-                        "additional_information": "",
-                    }
-                )
+                result = "performed_successfully"
             else:
-                result.from_dict(
-                    {
-                        "general_result": "command_beyond_terminal_capability",
-                        "additional_information": "",
-                    }
-                )
+                result = "command_beyond_terminal_capability"
 
             # Send response immediately, thus also flushing out any further
             # proactive commands that the card already wants to send
@@ -206,18 +356,10 @@ class LinkBase(abc.ABC):
             (command_details,) = [
                 c for c in pcmd.decoded.children if isinstance(c, CommandDetails)
             ]
-            # The Device Identities are fixed. (TS 102 223 V4.0.0 Section 6.8.2)
-            device_identities = DeviceIdentities()
-            device_identities.from_dict(
-                {"source_dev_id": "terminal", "dest_dev_id": "uicc"}
-            )
-
             # Testing hint: The value of tail does not influence the behavior
             # of an SJA2 that sent ans SMS, so this is implemented only
             # following TS 102 223, and not fully tested.
-            tail = (
-                command_details.to_tlv() + device_identities.to_tlv() + result.to_tlv()
-            )
+            tail = command_details.to_tlv() + _terminal_response_tlvs(result)
             # Testing hint: In contrast to the above, this part is positively
             # essential to get the SJA2 to provide the later parts of a
             # multipart SMS in response to an OTA RFM command.
@@ -226,9 +368,8 @@ class LinkBase(abc.ABC):
             terminal_response_rv = self.send_apdu(terminal_response)
             last_sw = terminal_response_rv[1]
 
-        if not sw_match(rv[1], sw):
-            raise SwMatchError(rv[1], sw.lower(), self.sw_interpreter)
-        return rv
+        if self.apdu_stats:
+            self.apdu_stats.proactive(count, time.perf_counter_ns() - start)
 
     def send_apdu_constr(self, cla, ins, p1, p2, cmd_constr, cmd_data, resp_constr):
         """Build and sends an APDU using a 'construct' definition; parses response.
@@ -249,6 +390,8 @@ class LinkBase(abc.ABC):
         pdu = "".join([cla, ins, p1, p2, p3, b2h(cmd)])
         (data, sw) = self.send_apdu(pdu)
         if data:
+            from pySim.construct import filter_dict
+
             # filter the resulting dict to avoid '_io' members inside
             rsp = filter_dict(resp_constr.parse(h2b(data)))
         else:
@@ -280,6 +423,30 @@ class LinkBase(abc.ABC):
         return (rsp, sw)
 
 
+def argparse_add_pcsc_args(arg_parser):
+    """Add the PC/SC reader arguments only to the given argparse.Argumentparser
+    instance, for tools that access cards through PC/SC alone."""
+    pcsc_group = arg_parser.add_argument_group("PC/SC Reader")
+    pcsc_group.add_argument(
+        "-p",
+        "--pcsc-device",
+        type=int,
+        dest="pcsc_dev",
+        metavar="PCSC",
+        default=None,
+        help="PC/SC reader number to use for SIM access",
+    )
+    pcsc_group.add_argument(
+        "--pcsc-protocol",
+        dest="pcsc_protocol",
+        choices=["auto", "t0", "t1"],
+        default="auto",
+        help="Transmission protocol; auto uses T=1 whenever the ATR offers it",
+    )
+
+    return arg_parser
+
+
 def argparse_add_reader_args(arg_parser):
     """Add all reader related arguments to the given argparse.Argumentparser instance."""
     serial_group = arg_parser.add_argument_group("Serial Reader")
@@ -300,16 +467,7 @@ def argparse_add_reader_args(arg_parser):
         help="Baud rate used for SIM access",
     )
 
-    pcsc_group = arg_parser.add_argument_group("PC/SC Reader")
-    pcsc_group.add_argument(
-        "-p",
-        "--pcsc-device",
-        type=int,
-        dest="pcsc_dev",
-        metavar="PCSC",
-        default=None,
-        help="PC/SC reader number to use for SIM access",
-    )
+    argparse_add_pcsc_args(arg_parser)
 
     modem_group = arg_parser.add_argument_group("AT Command Modem Reader")
     modem_group.add_argument(
@@ -339,6 +497,11 @@ def argparse_add_reader_args(arg_parser):
     return arg_parser
 
 
+def pcsc_protocol_arg(opts) -> Optional[int]:
+    """Translate the --pcsc-protocol argument to the protocol argument of the PC/SC links."""
+    return {"t0": 0, "t1": 1}.get(getattr(opts, "pcsc_protocol", "auto"))
+
+
 def init_reader(opts, **kwargs) -> Optional[LinkBase]:
     sl = None  # type : :Optional[LinkBase]
     try:
@@ -347,7 +510,7 @@ def init_reader(opts, **kwargs) -> Optional[LinkBase]:
             print("Using PC/SC reader interface")
             from pySim.transport.pcsc import PcscSimLink
 
-            sl = PcscSimLink(opts.pcsc_dev, **kwargs)
+            sl = PcscSimLink(opts.pcsc_dev, protocol=pcsc_protocol_arg(opts), **kwargs)
         # elif opts.osmocon_sock is not None:
         #     print("Using Calypso-based (OsmocomBB) reader interface")
         #     from pySim.transport.calypso import CalypsoSimLink
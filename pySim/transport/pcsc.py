@@ -27,16 +27,54 @@ from smartcard.Exceptions import (
 )
 from smartcard.System import readers
 
+from typing import Optional
+
 from pySim.exceptions import NoCardError, ProtocolError, ReaderError
 from pySim.transport import LinkBase
-from pySim.utils import h2i, i2h
+from pySim.utils import atr_protocols
+
+PCSC_PROTOCOLS = {0: CardConnection.T0_protocol, 1: CardConnection.T1_protocol}
+
+
+def pcsc_connect(con, protocol: Optional[int] = None) -> int:
+    """Connect a pyscard CardConnection, negotiating the transmission protocol.
+
+    Args:
+            con : pyscard CardConnection
+            protocol : 0 or 1 to force T=0 / T=1, None to use T=1 whenever the
+                       ATR offers it (no GET RESPONSE round trips for case 4)
+    Returns:
+            protocol in use (0 or 1)
+    """
+    if protocol is not None:
+        con.connect(PCSC_PROTOCOLS[protocol])
+        return protocol
+    con.connect(CardConnection.T0_protocol | CardConnection.T1_protocol)
+    if con.getProtocol() == CardConnection.T1_protocol:
+        return 1
+    if 1 in atr_protocols(con.getATR()):
+        # the reader picked T=0 although the card offers T=1
+        con.disconnect()
+        con.connect(CardConnection.T1_protocol)
+        return 1
+    return 0
 
 
 class PcscSimLink(LinkBase):
     """pySim: PCSC reader transport link."""
 
-    def __init__(self, reader_number: int = 0, **kwargs):
+    def __init__(
+        self, reader_number: int = 0, protocol: Optional[int] = None, **kwargs
+    ):
+        """
+        Args:
+                reader_number : index of the PC/SC reader
+                protocol : force T=0 (0) or T=1 (1), default negotiates
+        """
         super().__init__(**kwargs)
+        self.preferred_protocol = protocol
+        # protocol in use, updated on every connect()
+        self.protocol = 0
         r = readers()
         if reader_number >= len(r):
             raise ReaderError("No reader found for number %d" % reader_number)
@@ -67,13 +105,18 @@ class PcscSimLink(LinkBase):
             # is disconnected
             self.disconnect()
 
-            # Explicitly select T=0 communication protocol
-            self._con.connect(CardConnection.T0_protocol)
+            self.protocol = pcsc_connect(self._con, self.preferred_protocol)
+            self.connect_count += 1
         except CardConnectionException:
             raise ProtocolError()
         except NoCardException:
             raise NoCardError()
 
+    @property
+    def extended_length(self):
+        # extended APDUs are only carried by T=1
+        return self.protocol == 1
+
     def get_atr(self):
         return self._con.getATR()
 
@@ -85,12 +128,10 @@ class PcscSimLink(LinkBase):
         self.connect()
         return 1
 
-    def _send_apdu_raw(self, pdu):
-        apdu = h2i(pdu)
-
-        data, sw1, sw2 = self._con.transmit(apdu)
+    def _send_apdu_bytes(self, apdu: bytes):
+        data, sw1, sw2 = self._con.transmit(list(apdu))
+        return bytes(data), (sw1 << 8) | sw2
 
-        sw = [sw1, sw2]
-
-        # Return value
-        return i2h(data), i2h(sw)
+    def _send_apdu_raw(self, pdu):
+        data, sw = self._send_apdu_bytes(bytes.fromhex(pdu))
+        return data.hex(), "%04x" % sw
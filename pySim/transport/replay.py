@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+""" pySim: APDU recording tracer and replay transport link
+
+RecordingTracer is an ApduTracer persisting every exchange of a link (command,
+response data, SW and latency) into a compact line oriented trace file.
+ReplayLink is a LinkBase serving the responses of such a trace back, either
+at full speed or at the recorded latencies, so that the host side of scripts
+and of SimCardCommands can be profiled and regression tested against real
+card transcripts without hardware.
+
+Trace file format, one record per line ('.gz' suffix = gzip compressed):
+        # comment
+        R <atr>
+        A <command> <sw> <response data or '-'> <latency in microseconds>
+"""
+
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import gzip
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from pySim.exceptions import ProtocolError
+from pySim.transport import ApduTracer, LinkBase
+from pySim.utils import Hexstr
+
+TRACE_HEADER = "# pySim APDU trace v1\n"
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+class TraceRecord(NamedTuple):
+    """One recorded APDU exchange."""
+
+    cmd: Hexstr
+    sw: Hexstr
+    data: Hexstr
+    latency: float  # seconds
+
+
+class RecordingTracer(ApduTracer):
+    """ApduTracer writing every exchange to a trace file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open(path, "w")
+        self._file.write(TRACE_HEADER)
+        self._start = 0.0
+        self.count = 0
+
+    def trace_command(self, cmd):
+        self._start = time.perf_counter()
+
+    def trace_response(self, cmd, sw, resp):
+        latency = time.perf_counter() - self._start
+        self._file.write(
+            "A %s %s %s %d\n" % (cmd.upper(), sw, resp or "-", latency * 1e6)
+        )
+        self.count += 1
+
+    def trace_reset(self, atr):
+        self._file.write("R %s\n" % "".join("%02X" % b for b in atr))
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def load_trace(path: str) -> Tuple[List[Optional[TraceRecord]], List[Hexstr]]:
+    """Read a trace file.
+
+    Returns:
+            tuple(records, atrs), where records holds a None entry for every reset
+    """
+    records = []  # type: List[Optional[TraceRecord]]
+    atrs = []  # type: List[Hexstr]
+    with _open(path, "r") as f:
+        for lineno, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            if fields[0] == "R" and len(fields) == 2:
+                records.append(None)
+                atrs.append(fields[1])
+            elif fields[0] == "A" and len(fields) == 5:
+                data = "" if fields[3] == "-" else fields[3]
+                records.append(
+                    TraceRecord(
+                        fields[1].upper(), fields[2], data, int(fields[4]) / 1e6
+                    )
+                )
+            else:
+                raise ValueError("%s:%d: invalid trace record" % (path, lineno))
+    return records, atrs
+
+
+class ReplayLink(LinkBase):
+    """Transport link serving the responses of a recorded trace."""
+
+    def __init__(
+        self,
+        path: str,
+        realtime: bool = False,
+        strict: bool = True,
+        loop: bool = False,
+        **kwargs
+    ):
+        """
+        Args:
+                path : trace file written by RecordingTracer
+                realtime : wait the recorded latency before every response
+                strict : raise ProtocolError if a command differs from the trace
+                loop : restart at the beginning once the trace is exhausted
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.realtime = realtime
+        self.strict = strict
+        self.loop = loop
+        self._records, self._atrs = load_trace(path)
+        self._atr = self._atrs[0] if self._atrs else ""
+        self._pos = 0
+        self._resets = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def rewind(self):
+        self._pos = 0
+        self._resets = 0
+
+    def _next(self):
+        if self._pos >= len(self._records):
+            if not self.loop or not self._records:
+                raise ProtocolError(
+                    "Trace %s exhausted after %d records" % (self.path, self._pos)
+                )
+            self.rewind()
+        rec = self._records[self._pos]
+        self._pos += 1
+        return rec
+
+    def wait_for_card(self, timeout: int = None, newcardonly: bool = False):
+        self.connect()
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def reset_card(self):
+        if self.loop and self._pos >= len(self._records):
+            self.rewind()
+        # consume the reset marker of the trace, if the trace has one here
+        if self._pos < len(self._records) and self._records[self._pos] is None:
+            self._pos += 1
+            self._atr = self._atrs[self._resets % len(self._atrs)]
+            self._resets += 1
+        return 1
+
+    def get_atr(self):
+        return list(bytes.fromhex(self._atr))
+
+    def _send_apdu_raw(self, pdu: str) -> Tuple[str, str]:
+        rec = self._next()
+        while rec is None:
+            # reset in the trace that the replayed code did not do
+            if self.strict:
+                raise ProtocolError(
+                    "Trace %s: expected card reset at record %d"
+                    % (self.path, self._pos)
+                )
+            rec = self._next()
+        if self.strict and rec.cmd != pdu.upper():
+            raise ProtocolError(
+                "Trace %s: record %d is %s, got %s"
+                % (self.path, self._pos, rec.cmd, pdu.upper())
+            )
+        if self.realtime:
+            time.sleep(rec.latency)
+        return rec.data, rec.sw
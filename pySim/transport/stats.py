@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+""" pySim: per-APDU latency instrumentation of a transport link
+
+ApduStats is attached to a LinkBase (apdu_stats argument) and is fed by
+LinkBase.send_apdu_raw_bytes() with monotonic timestamps.  For every
+instruction byte it keeps a latency histogram of the time spent in
+_send_apdu_bytes() (reader + card), and separately a histogram of the host
+time elapsed between two consecutive APDUs (script processing, logging,
+GUI, ...).  GET RESPONSE and 6Cxx re-sends issued by send_apdu_bytes() are
+counted on their own, as are the proactive commands handled by
+send_apdu_checksw().
+
+Histograms use power-of-two microsecond buckets: bucket n holds latencies
+in [2^(n-1), 2^n) us, bucket 0 everything below 1 us.
+"""
+
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import time
+from typing import Dict, List, Optional
+
+NUM_BUCKETS = 32
+
+# well known instructions, for the report only
+INS_NAMES = {
+    0x04: "DEACTIVATE FILE",
+    0x0E: "ERASE BINARY",
+    0x10: "TERMINAL PROFILE",
+    0x12: "FETCH",
+    0x14: "TERMINAL RESPONSE",
+    0x20: "VERIFY",
+    0x24: "CHANGE PIN",
+    0x2C: "UNBLOCK PIN",
+    0x44: "ACTIVATE FILE",
+    0x70: "MANAGE CHANNEL",
+    0x84: "GET CHALLENGE",
+    0x88: "AUTHENTICATE",
+    0xA4: "SELECT",
+    0xB0: "READ BINARY",
+    0xB2: "READ RECORD",
+    0xC0: "GET RESPONSE",
+    0xC2: "ENVELOPE",
+    0xCA: "GET DATA",
+    0xD6: "UPDATE BINARY",
+    0xDC: "UPDATE RECORD",
+    0xE0: "CREATE FILE",
+    0xE4: "DELETE FILE",
+    0xF2: "STATUS",
+}
+
+
+class LatencyHistogram:
+    """Count, sum, min, max and log2 buckets of latencies in nanoseconds."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None  # type: Optional[int]
+        self.max = 0
+        self.buckets = [0] * NUM_BUCKETS
+
+    def add(self, ns: int):
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        self.buckets[min((ns // 1000).bit_length(), NUM_BUCKETS - 1)] += 1
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """Upper bound (ns) of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for n, c in enumerate(self.buckets):
+            seen += c
+            if seen >= rank:
+                return min((1 << n) * 1000, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        last = max((n for n, c in enumerate(self.buckets) if c), default=-1)
+        return {
+            "count": self.count,
+            "total_us": self.total / 1000,
+            "mean_us": self.mean() / 1000,
+            "min_us": (self.min or 0) / 1000,
+            "max_us": self.max / 1000,
+            "p50_us": self.percentile(50) / 1000,
+            "p99_us": self.percentile(99) / 1000,
+            "buckets_us": self.buckets[: last + 1],
+        }
+
+
+class ApduStats:
+    """Latency statistics of all APDUs sent through a LinkBase."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.per_ins = {}  # type: Dict[int, LatencyHistogram]
+        self.card = LatencyHistogram()
+        self.host = LatencyHistogram()
+        self.get_response = 0
+        self.resend_6c = 0
+        self.proactive_commands = 0
+        self.proactive_ns = 0
+        self._last_end = None  # type: Optional[int]
+        self._start = time.perf_counter_ns()
+
+    # called by LinkBase
+
+    def record(self, ins: int, start: int, end: int):
+        """Account one exchange, start / end are time.perf_counter_ns() values."""
+        ns = end - start
+        hist = self.per_ins.get(ins)
+        if hist is None:
+            hist = self.per_ins[ins] = LatencyHistogram()
+        hist.add(ns)
+        self.card.add(ns)
+        if self._last_end is not None:
+            self.host.add(start - self._last_end)
+        self._last_end = end
+
+    def proactive(self, count: int, ns: int):
+        """Account a proactive session of count FETCH / TERMINAL RESPONSE cycles."""
+        self.proactive_commands += count
+        self.proactive_ns += ns
+
+    def proactive_rate(self) -> float:
+        """Proactive commands handled per second of proactive session time."""
+        if not self.proactive_ns:
+            return 0.0
+        return self.proactive_commands * 1e9 / self.proactive_ns
+
+    def idle(self):
+        """Mark a pause (e.g. waiting for the next card) not to count as host time."""
+        self._last_end = None
+
+    # reports
+
+    def to_dict(self) -> dict:
+        wall = time.perf_counter_ns() - self._start
+        return {
+            "apdus": self.card.count,
+            "wall_us": wall / 1000,
+            "card": self.card.to_dict(),
+            "host": self.host.to_dict(),
+            "get_response": self.get_response,
+            "resend_6c": self.resend_6c,
+            "proactive_commands": self.proactive_commands,
+            "proactive_per_s": self.proactive_rate(),
+            "ins": {
+                "%02X" % ins: dict(name=INS_NAMES.get(ins, ""), **h.to_dict())
+                for ins, h in sorted(
+                    self.per_ins.items(), key=lambda i: i[1].total, reverse=True
+                )
+            },
+        }
+
+    def to_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def table(self) -> str:
+        """Summary table, instructions sorted by total time spent."""
+        rows = []  # type: List[str]
+        fmt = "%-4s %-18s %8s %11s %9s %9s %9s %9s"
+        rows.append(
+            fmt
+            % ("INS", "", "count", "total ms", "mean us", "p50 us", "p99 us", "max us")
+        )
+
+        def row(ins, name, h):
+            rows.append(
+                fmt
+                % (
+                    ins,
+                    name,
+                    h.count,
+                    "%.1f" % (h.total / 1e6),
+                    "%.0f" % (h.mean() / 1000),
+                    "%.0f" % (h.percentile(50) / 1000),
+                    "%.0f" % (h.percentile(99) / 1000),
+                    "%.0f" % (h.max / 1000),
+                )
+            )
+
+        for ins, h in sorted(
+            self.per_ins.items(), key=lambda i: i[1].total, reverse=True
+        ):
+            row("%02X" % ins, INS_NAMES.get(ins, ""), h)
+        row("", "reader/card", self.card)
+        row("", "host", self.host)
+        rows.append(
+            "GET RESPONSE: %d, 6Cxx re-sends: %d" % (self.get_response, self.resend_6c)
+        )
+        if self.proactive_commands:
+            rows.append(
+                "Proactive commands: %d (%.1f/s)"
+                % (self.proactive_commands, self.proactive_rate())
+            )
+        return "\n".join(rows)
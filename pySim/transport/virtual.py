@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+
+""" pySim: in-memory virtual UICC transport link
+
+The VirtualCardLink simulates a card whose file system is built from the
+CardMF / CardDF / TransparentEF / LinFixedEF models of pySim.filesystem.  It
+answers SELECT, STATUS, GET RESPONSE, READ/UPDATE BINARY, READ/UPDATE RECORD
+and VERIFY entirely in memory, with T=0 style 61xx / 9Fxx / 6Cxx procedure
+bytes, so scripts and SimCardCommands can be dry-run and benchmarked without
+a reader.
+
+Access conditions are not enforced; VERIFY only tracks the PIN state and
+retry counters.
+"""
+
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from typing import Dict, List, Optional, Tuple
+
+from pySim.exceptions import NoCardError
+from pySim.filesystem import (
+    CardADF,
+    CardDF,
+    CardEF,
+    CardFile,
+    CardMF,
+    CyclicEF,
+    LinFixedEF,
+    TransparentEF,
+)
+from pySim.transport import LinkBase
+from pySim.utils import b2h, Hexstr
+
+DEFAULT_ATR = "3b9f96801fc78031a073be21136743200718000001a5"
+# same, but with extended Lc / Le fields in the card capabilities
+DEFAULT_ATR_EXT = "3b9f96801fc78031a073be21536743200718000001e5"
+DEFAULT_NUM_RECORDS = 10
+DEFAULT_FILE_SIZE = 32
+DEFAULT_RETRIES = 3
+
+
+def _size(size: Tuple[Optional[int], Optional[int]]) -> int:
+    """Use the recommended size of a file model, falling back to the minimum
+    and, for models leaving the size open, to DEFAULT_FILE_SIZE."""
+    if size[1] is not None:
+        return size[1]
+    return size[0] if size[0] is not None else DEFAULT_FILE_SIZE
+
+
+def _tlv(tag: int, value: bytes) -> bytes:
+    return bytes([tag, len(value)]) + value
+
+
+class VirtualFile:
+    """Runtime content of one file of the virtual card."""
+
+    def __init__(self, model: CardFile, num_records: int = DEFAULT_NUM_RECORDS):
+        self.model = model
+        self.fid = bytes.fromhex(model.fid) if model.fid else b""
+        self.sfid = int(str(model.sfid)) if model.sfid else None
+        self.children = {}  # type: Dict[bytes, VirtualFile]
+        self.sfi_children = {}  # type: Dict[int, VirtualFile]
+        self.parent = None  # type: Optional[VirtualFile]
+        self.data = None  # type: Optional[bytearray]
+        self.records = None  # type: Optional[List[bytearray]]
+        self.rec_len = 0
+        if isinstance(model, LinFixedEF):
+            self.rec_len = _size(model.rec_len)
+            self.records = [
+                bytearray(b"\xff" * self.rec_len) for _ in range(num_records)
+            ]
+        elif isinstance(model, TransparentEF):
+            self.data = bytearray(b"\xff" * _size(model.size))
+
+    @property
+    def is_df(self) -> bool:
+        return isinstance(self.model, CardDF)
+
+    def add_child(self, child: "VirtualFile"):
+        child.parent = self
+        self.children[child.fid] = child
+        if child.sfid is not None:
+            self.sfi_children[child.sfid] = child
+
+    def file_size(self) -> int:
+        if self.records is not None:
+            return self.rec_len * len(self.records)
+        if self.data is not None:
+            return len(self.data)
+        return 0
+
+    def fcp(self) -> bytes:
+        """FCP template as per TS 102 221 Section 11.1.1.3"""
+        if self.is_df:
+            body = _tlv(0x82, b"\x78\x21") + _tlv(0x83, self.fid or b"\x7f\xff")
+            if isinstance(self.model, CardADF):
+                body += _tlv(0x84, bytes.fromhex(self.model.aid))
+            body += _tlv(0x8A, b"\x05")
+        else:
+            if self.records is not None:
+                fdb = 0x46 if isinstance(self.model, CyclicEF) else 0x42
+                desc = bytes([fdb, 0x21]) + self.rec_len.to_bytes(2, "big")
+                desc += bytes([len(self.records)])
+            else:
+                desc = b"\x41\x21"
+            body = _tlv(0x82, desc) + _tlv(0x83, self.fid) + _tlv(0x8A, b"\x05")
+            body += _tlv(0x80, self.file_size().to_bytes(2, "big"))
+            body += _tlv(0x88, bytes([self.sfid << 3]) if self.sfid else b"")
+        return _tlv(0x62, body)
+
+    def gsm_response(self) -> bytes:
+        """SELECT response as per GSM 11.11 Section 9.2.1"""
+        if self.is_df:
+            num_dfs = sum(1 for c in self.children.values() if c.is_df)
+            num_efs = len(self.children) - num_dfs
+            ftype = 0x01 if isinstance(self.model, CardMF) else 0x02
+            return (
+                b"\x00\x00\x00\x00"
+                + self.fid
+                + bytes([ftype])
+                + b"\x00" * 5
+                + b"\x09\x00"
+                + bytes([num_dfs, num_efs, 0x04, 0x00])
+                + b"\x83\x83\x83\x83"
+            )
+        if self.records is not None:
+            structure = 0x03 if isinstance(self.model, CyclicEF) else 0x01
+        else:
+            structure = 0x00
+        return (
+            b"\x00\x00"
+            + self.file_size().to_bytes(2, "big")
+            + self.fid
+            + b"\x04\x00\x00\x00\x00\x01\x02"
+            + bytes([structure, self.rec_len])
+        )
+
+
+class VirtualCardLink(LinkBase):
+    """Transport link to an in-memory simulated card."""
+
+    def __init__(
+        self,
+        mf: CardMF,
+        atr: Optional[Hexstr] = None,
+        pins: Optional[Dict[int, Hexstr]] = None,
+        num_records: int = DEFAULT_NUM_RECORDS,
+        extended_length: bool = True,
+        **kwargs
+    ):
+        """
+        Args:
+                mf : file system model the card is built from
+                atr : ATR returned by get_atr() (default depends on extended_length)
+                pins : dict of PIN reference (1=PIN1, 0x0a=ADM1, ...) to the
+                       8 byte PIN value as hex string
+                num_records : number of records of each record oriented EF
+                extended_length : accept extended length APDUs
+        """
+        super().__init__(**kwargs)
+        self.extended_length = extended_length
+        if atr is None:
+            atr = DEFAULT_ATR_EXT if extended_length else DEFAULT_ATR
+        self._atr = list(bytes.fromhex(atr))
+        self.num_records = num_records
+        self.pins = {
+            ref: bytes.fromhex(pin) for ref, pin in (pins or {}).items()
+        }  # type: Dict[int, bytes]
+        self.mf = self._build(mf)
+        self.adfs = {}  # type: Dict[bytes, VirtualFile]
+        for aid, adf in mf.applications.items():
+            vadf = self._build(adf)
+            vadf.parent = self.mf
+            self.adfs[bytes.fromhex(aid)] = vadf
+        self._present = True
+        self.reset_card()
+
+    @classmethod
+    def from_profile(cls, profile, **kwargs) -> "VirtualCardLink":
+        """Build a virtual card from the files and applications of a CardProfile."""
+        mf = CardMF(profile=profile)
+        for f in profile.files_in_mf:
+            mf.add_file(f, ignore_existing=True)
+        for app in profile.applications:
+            if app.adf and app.adf.aid not in mf.applications:
+                mf.add_application_df(app.adf)
+        return cls(mf, **kwargs)
+
+    def _build(self, model: CardFile) -> VirtualFile:
+        vf = VirtualFile(model, self.num_records)
+        if isinstance(model, CardDF):
+            for child in model.children.values():
+                vf.add_child(self._build(child))
+        return vf
+
+    def lookup_path(self, path: List[Hexstr]) -> VirtualFile:
+        """Resolve a list of FIDs (starting below the MF) or an AID as first element."""
+        node = self.mf
+        for i, elem in enumerate(path):
+            key = bytes.fromhex(elem)
+            if i == 0 and key in self.adfs:
+                node = self.adfs[key]
+            elif i == 0 and elem.lower() == "3f00":
+                node = self.mf
+            else:
+                node = node.children[key]
+        return node
+
+    def load_binary(self, path: List[Hexstr], data: Hexstr, offset: int = 0):
+        """Preset the content of a transparent EF."""
+        ef = self.lookup_path(path)
+        raw = bytes.fromhex(data)
+        ef.data[offset : offset + len(raw)] = raw
+
+    def load_record(self, path: List[Hexstr], rec_nr: int, data: Hexstr):
+        """Preset the content of a record of a record oriented EF."""
+        ef = self.lookup_path(path)
+        raw = bytes.fromhex(data)
+        ef.records[rec_nr - 1][: len(raw)] = raw
+
+    # LinkBase interface
+
+    def wait_for_card(self, timeout: int = None, newcardonly: bool = False):
+        self.connect()
+
+    def connect(self):
+        if not self._present:
+            raise NoCardError()
+
+    def disconnect(self):
+        pass
+
+    def reset_card(self):
+        self._cur_df = self.mf
+        self._cur_ef = None  # type: Optional[VirtualFile]
+        self._cur_rec = 0
+        self._pending = b""
+        self._verified = set()
+        self._retries = {ref: DEFAULT_RETRIES for ref in self.pins}
+        return 1
+
+    def get_atr(self):
+        return self._atr
+
+    def _send_apdu_bytes(self, apdu: bytes) -> Tuple[bytes, int]:
+        return self._process(apdu)
+
+    def _send_apdu_raw(self, pdu: str) -> Tuple[str, str]:
+        data, sw = self._process(bytes.fromhex(pdu))
+        return b2h(data), "%04x" % sw
+
+    # command processing
+
+    def _process(self, apdu: bytes) -> Tuple[bytes, int]:
+        if len(apdu) < 4:
+            return b"", 0x6700
+        cla, ins, p1, p2 = apdu[0], apdu[1], apdu[2], apdu[3]
+        if len(apdu) >= 7 and apdu[4] == 0 and self.extended_length:
+            # extended length: 00 Le Le, or 00 Lc Lc data [Le Le]
+            lc = int.from_bytes(apdu[5:7], "big")
+            if len(apdu) == 7:
+                p3, body = lc or 65536, b""
+            else:
+                p3, body = lc, apdu[7 : 7 + lc]
+        else:
+            p3 = apdu[4] if len(apdu) > 4 else 0
+            body = apdu[5:]
+        if cla == 0xA0:
+            gsm = True
+        elif cla & 0xF0 in (0x00, 0x80):
+            gsm = False
+        else:
+            return b"", 0x6E00
+        handler = self._handlers.get(ins)
+        if handler is None:
+            return b"", 0x6D00
+        return handler(self, gsm, p1, p2, p3, body)
+
+    def _respond(self, gsm: bool, data: bytes) -> Tuple[bytes, int]:
+        """Queue response data for GET RESPONSE, as a T=0 card would."""
+        if not data:
+            return b"", 0x9000
+        self._pending = data
+        return b"", (0x9F00 if gsm else 0x6100) | (len(data) & 0xFF)
+
+    def _find(self, fid: bytes) -> Optional[VirtualFile]:
+        df = self._cur_df
+        if fid == b"\x3f\x00":
+            return self.mf
+        if fid == b"\x7f\xff" and df is not self.mf:
+            node = df
+            while node.parent is not None and node.parent is not self.mf:
+                node = node.parent
+            return node if isinstance(node.model, CardADF) else None
+        if fid == df.fid:
+            return df
+        if fid in df.children:
+            return df.children[fid]
+        parent = df.parent
+        if parent is not None:
+            if fid == parent.fid:
+                return parent
+            if fid in parent.children:
+                return parent.children[fid]
+        return None
+
+    def _select_node(self, node: VirtualFile):
+        if node.is_df:
+            self._cur_df = node
+            self._cur_ef = None
+        else:
+            self._cur_df = node.parent
+            self._cur_ef = node
+        self._cur_rec = 0
+
+    def _ins_select(self, gsm, p1, p2, p3, body):
+        if p1 == 0x04:
+            node = None
+            for aid, adf in self.adfs.items():
+                # partial AID selection by prefix
+                if aid[: len(body)] == bytes(body):
+                    node = adf
+                    break
+        elif p1 == 0x03:
+            node = self._cur_df.parent if self._cur_ef is None else self._cur_df
+            if node is None:
+                node = self.mf
+        elif p1 == 0x00 or (p1 == 0x08 and gsm is False):
+            if p1 == 0x08:
+                node = self.mf
+                for i in range(0, len(body), 2):
+                    node = node.children.get(bytes(body[i : i + 2])) if node else None
+            else:
+                node = self._find(bytes(body[:2]))
+        else:
+            return b"", 0x6A86
+        if node is None:
+            return b"", 0x6A82 if not gsm else 0x9404
+        self._select_node(node)
+        if gsm:
+            return self._respond(gsm, node.gsm_response())
+        if p2 & 0x0C == 0x0C:
+            return b"", 0x9000
+        return self._respond(gsm, node.fcp())
+
+    def _ins_status(self, gsm, p1, p2, p3, body):
+        data = self._cur_df.gsm_response() if gsm else self._cur_df.fcp()
+        if p2 == 0x0C:
+            return b"", 0x9000
+        le = p3 or len(data)
+        return data[:le], 0x9000
+
+    def _ins_get_response(self, gsm, p1, p2, p3, body):
+        if not self._pending:
+            return b"", 0x6F00 if gsm else 0x6985
+        data = self._pending
+        le = p3 or 256
+        if le != len(data) and le > len(data):
+            return b"", 0x6C00 | len(data)
+        self._pending = b""
+        return data[:le], 0x9000
+
+    def _ef_for(self, sfi: Optional[int]) -> Optional[VirtualFile]:
+        if sfi:
+            ef = self._cur_df.sfi_children.get(sfi)
+            if ef is not None:
+                self._cur_ef = ef
+                self._cur_rec = 0
+            return ef
+        return self._cur_ef
+
+    def _ins_read_binary(self, gsm, p1, p2, p3, body):
+        if p1 & 0x80:
+            ef, offset = self._ef_for(p1 & 0x1F), p2
+        else:
+            ef, offset = self._ef_for(None), (p1 << 8) | p2
+        if ef is None:
+            return b"", 0x6986 if not gsm else 0x9400
+        if ef.data is None:
+            return b"", 0x6981 if not gsm else 0x9408
+        le = p3 or 256
+        if offset >= len(ef.data):
+            return b"", 0x6B00
+        data = bytes(ef.data[offset : offset + le])
+        if len(data) < le:
+            return data, 0x6282
+        return data, 0x9000
+
+    def _ins_update_binary(self, gsm, p1, p2, p3, body):
+        if p1 & 0x80:
+            ef, offset = self._ef_for(p1 & 0x1F), p2
+        else:
+            ef, offset = self._ef_for(None), (p1 << 8) | p2
+        if ef is None:
+            return b"", 0x6986 if not gsm else 0x9400
+        if ef.data is None:
+            return b"", 0x6981 if not gsm else 0x9408
+        if len(body) != p3:
+            return b"", 0x6700
+        if offset + len(body) > len(ef.data):
+            return b"", 0x6B00 if not gsm else 0x9402
+        ef.data[offset : offset + len(body)] = body
+        return b"", 0x9000
+
+    def _record_nr(self, ef: VirtualFile, p1: int, mode: int) -> int:
+        num = len(ef.records)
+        if mode == 0x04:
+            return p1 if p1 else self._cur_rec
+        if mode == 0x02:
+            return self._cur_rec + 1 if self._cur_rec < num else 0
+        if mode == 0x03:
+            return (
+                self._cur_rec - 1
+                if self._cur_rec > 1
+                else (num if not self._cur_rec else 0)
+            )
+        return 0
+
+    def _ins_read_record(self, gsm, p1, p2, p3, body):
+        ef = self._ef_for(p2 >> 3)
+        if ef is None:
+            return b"", 0x6986 if not gsm else 0x9400
+        if ef.records is None:
+            return b"", 0x6981 if not gsm else 0x9408
+        rec_nr = self._record_nr(ef, p1, p2 & 0x07)
+        if not 1 <= rec_nr <= len(ef.records):
+            return b"", 0x6A83 if not gsm else 0x9402
+        if (p3 or 256) != ef.rec_len:
+            return b"", 0x6C00 | ef.rec_len if not gsm else 0x6700
+        self._cur_rec = rec_nr
+        return bytes(ef.records[rec_nr - 1]), 0x9000
+
+    def _ins_update_record(self, gsm, p1, p2, p3, body):
+        ef = self._ef_for(p2 >> 3)
+        if ef is None:
+            return b"", 0x6986 if not gsm else 0x9400
+        if ef.records is None:
+            return b"", 0x6981 if not gsm else 0x9408
+        if len(body) != p3 or p3 != ef.rec_len:
+            return b"", 0x6700
+        if isinstance(ef.model, CyclicEF) and p2 & 0x07 == 0x03:
+            # cyclic files: the oldest record is overwritten and becomes record 1
+            ef.records.insert(0, ef.records.pop())
+            rec_nr = 1
+        else:
+            rec_nr = self._record_nr(ef, p1, p2 & 0x07)
+        if not 1 <= rec_nr <= len(ef.records):
+            return b"", 0x6A83 if not gsm else 0x9402
+        ef.records[rec_nr - 1][:] = body
+        self._cur_rec = rec_nr
+        return b"", 0x9000
+
+    def _ins_verify(self, gsm, p1, p2, p3, body):
+        ref = p2
+        if ref not in self.pins:
+            return b"", 0x6A88 if not gsm else 0x9802
+        if not body:
+            if ref in self._verified:
+                return b"", 0x9000
+            return b"", 0x63C0 | self._retries[ref]
+        if self._retries[ref] == 0:
+            return b"", 0x6983 if not gsm else 0x9840
+        if bytes(body) == self.pins[ref]:
+            self._verified.add(ref)
+            self._retries[ref] = DEFAULT_RETRIES
+            return b"", 0x9000
+        self._verified.discard(ref)
+        self._retries[ref] -= 1
+        return b"", 0x63C0 | self._retries[ref] if not gsm else 0x9804
+
+    _handlers = {
+        0xA4: _ins_select,
+        0xF2: _ins_status,
+        0xC0: _ins_get_response,
+        0xB0: _ins_read_binary,
+        0xD6: _ins_update_binary,
+        0xB2: _ins_read_record,
+        0xDC: _ins_update_record,
+        0x20: _ins_verify,
+    }
@@ -17,6 +17,9 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import copy
+import functools
+
 from construct import *
 from construct import Optional as COptional
 from pySim.construct import *
@@ -342,6 +345,13 @@ class FcpTemplate(
     pass
 
 
+@functools.lru_cache(maxsize=256)
+def _decode_fcp(resp: bytes) -> dict:
+    t = FcpTemplate()
+    t.from_tlv(resp)
+    return flatten_dict_lists(t.to_dict()["fcp_template"])
+
+
 def tlv_key_replace(inmap, indata):
     def newkey(inmap, key):
         if key in inmap:
@@ -1039,10 +1049,8 @@ class CardProfileUICC(CardProfile):
     @staticmethod
     def decode_select_response(resp_hex: str) -> object:
         """ETSI TS 102 221 Section 11.1.1.3"""
-        t = FcpTemplate()
-        t.from_tlv(h2b(resp_hex))
-        d = t.to_dict()
-        return flatten_dict_lists(d["fcp_template"])
+        # decoded once per distinct response, every caller gets its own copy
+        return copy.deepcopy(_decode_fcp(bytes.fromhex(resp_hex)))
 
     @staticmethod
     def match_with_card(scc: SimCardCommands) -> bool:
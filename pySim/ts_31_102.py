@@ -1472,19 +1472,22 @@ class EF_eAKA(TransparentEF):
 class DF_GSM_ACCESS(CardDF):
     def __init__(self, fid="5F3B", name="DF.GSM-ACCESS", desc="GSM Access", **kwargs):
         super().__init__(fid=fid, name=name, desc=desc, service=27, **kwargs)
-        files = [
-            EF_Kc(fid="4f20", sfid=0x01, service=27),
-            EF_Kc(
-                fid="4f52",
-                sfid=0x02,
-                name="EF.KcGPRS",
-                desc="GPRS Ciphering key KcGPRS",
-                service=27,
-            ),
-            EF_CPBCCH(fid="4f63", service=39),
-            EF_InvScan(fid="4f64", service=40),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_Kc(fid="4f20", sfid=0x01, service=27),
+                EF_Kc(
+                    fid="4f52",
+                    sfid=0x02,
+                    name="EF.KcGPRS",
+                    desc="GPRS Ciphering key KcGPRS",
+                    service=27,
+                ),
+                EF_CPBCCH(fid="4f63", service=39),
+                EF_InvScan(fid="4f64", service=40),
+            ]
+
+        self.add_files_lazy(files)
 
 
 ######################################################################
@@ -1731,11 +1734,14 @@ class DF_SNPN(CardDF):
         self, fid="5fe0", name="DF.SNPN", desc="Files for SNPN purpose", **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_PWS_SNPN(service=143),
-            EF_NID(service=146),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_PWS_SNPN(service=143),
+                EF_NID(service=146),
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.4.13.2 (Rel 17)
@@ -2008,15 +2014,18 @@ class DF_5G_ProSe(CardDF):
         **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_5G_PROSE_ST(),
-            EF_5G_PROSE_DD(service=1),
-            EF_5G_PROSE_DC(service=2),
-            EF_5G_PROSE_U2NRU(service=3),
-            EF_5G_PROSE_RU(service=4),
-            EF_5G_PROSE_UIR(service=5),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_5G_PROSE_ST(),
+                EF_5G_PROSE_DD(service=1),
+                EF_5G_PROSE_DC(service=2),
+                EF_5G_PROSE_U2NRU(service=3),
+                EF_5G_PROSE_RU(service=4),
+                EF_5G_PROSE_UIR(service=5),
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.4.11.18 (Rel 17)
@@ -2089,64 +2098,79 @@ class DF_WLAN(CardDF):
         self, fid="5f40", name="DF.WLAN", desc="Files for WLAN purpose", **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            TransparentEF("4f41", 0x01, "EF.Pseudo", "Pseudonym", service=59),
-            TransparentEF(
-                "4f42",
-                0x02,
-                "EF.UPLMNWLAN",
-                "User controlled PLMN selector for I-WLAN Access",
-                service=60,
-            ),
-            TransparentEF(
-                "4f43",
-                0x03,
-                "EF.OPLMNWLAN",
-                "Operator controlled PLMN selector for I-WLAN Access",
-                service=61,
-            ),
-            LinFixedEF(
-                "4f44",
-                0x04,
-                "EF.UWSIDL",
-                "User controlled WLAN Specific Identifier List",
-                service=62,
-            ),
-            LinFixedEF(
-                "4f45",
-                0x05,
-                "EF.OWSIDL",
-                "Operator controlled WLAN Specific Identifier List",
-                service=63,
-            ),
-            TransparentEF(
-                "4f46", 0x06, "EF.WRI", "WLAN Reauthentication Identity", service=66
-            ),
-            LinFixedEF(
-                "4f47",
-                0x07,
-                "EF.HWSIDL",
-                "Home I-WLAN Specific Identifier List",
-                service=81,
-            ),
-            TransparentEF(
-                "4f48",
-                0x08,
-                "EF.WEHPLMNPI",
-                "I-WLAN Equivalent HPLMN Presentation Indication",
-                service=82,
-            ),
-            TransparentEF(
-                "4f49", 0x09, "EF.WHPI", "I-WLAN HPLMN Priority Indication", service=83
-            ),
-            TransparentEF(
-                "4f4a", 0x0A, "EF.WLRPLMN", "I-WLAN Last Registered PLMN", service=84
-            ),
-            TransparentEF(
-                "4f4b", 0x0B, "EF.HPLMNDAI", "HPLMN Direct Access Indicator", service=88
-            ),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                TransparentEF("4f41", 0x01, "EF.Pseudo", "Pseudonym", service=59),
+                TransparentEF(
+                    "4f42",
+                    0x02,
+                    "EF.UPLMNWLAN",
+                    "User controlled PLMN selector for I-WLAN Access",
+                    service=60,
+                ),
+                TransparentEF(
+                    "4f43",
+                    0x03,
+                    "EF.OPLMNWLAN",
+                    "Operator controlled PLMN selector for I-WLAN Access",
+                    service=61,
+                ),
+                LinFixedEF(
+                    "4f44",
+                    0x04,
+                    "EF.UWSIDL",
+                    "User controlled WLAN Specific Identifier List",
+                    service=62,
+                ),
+                LinFixedEF(
+                    "4f45",
+                    0x05,
+                    "EF.OWSIDL",
+                    "Operator controlled WLAN Specific Identifier List",
+                    service=63,
+                ),
+                TransparentEF(
+                    "4f46", 0x06, "EF.WRI", "WLAN Reauthentication Identity", service=66
+                ),
+                LinFixedEF(
+                    "4f47",
+                    0x07,
+                    "EF.HWSIDL",
+                    "Home I-WLAN Specific Identifier List",
+                    service=81,
+                ),
+                TransparentEF(
+                    "4f48",
+                    0x08,
+                    "EF.WEHPLMNPI",
+                    "I-WLAN Equivalent HPLMN Presentation Indication",
+                    service=82,
+                ),
+                TransparentEF(
+                    "4f49",
+                    0x09,
+                    "EF.WHPI",
+                    "I-WLAN HPLMN Priority Indication",
+                    service=83,
+                ),
+                TransparentEF(
+                    "4f4a",
+                    0x0A,
+                    "EF.WLRPLMN",
+                    "I-WLAN Last Registered PLMN",
+                    service=84,
+                ),
+                TransparentEF(
+                    "4f4b",
+                    0x0B,
+                    "EF.HPLMNDAI",
+                    "HPLMN Direct Access Indicator",
+                    service=88,
+                ),
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.4.6
@@ -2155,17 +2179,20 @@ class DF_HNB(CardDF):
         self, fid="5f50", name="DF.HNB", desc="Files for HomeNodeB purpose", **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            LinFixedEF("4f81", 0x01, "EF.ACSGL", "Allowed CSG Lists", service=86),
-            LinFixedEF("4f82", 0x02, "EF.CSGTL", "CSG Types", service=86),
-            LinFixedEF("4f83", 0x03, "EF.HNBN", "Home NodeB Name", service=86),
-            LinFixedEF("4f84", 0x04, "EF.OCSGL", "Operator CSG Lists", service=90),
-            LinFixedEF("4f85", 0x05, "EF.OCSGT", "Operator CSG Type", service=90),
-            LinFixedEF(
-                "4f86", 0x06, "EF.OHNBN", "Operator Home NodeB Name", service=90
-            ),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                LinFixedEF("4f81", 0x01, "EF.ACSGL", "Allowed CSG Lists", service=86),
+                LinFixedEF("4f82", 0x02, "EF.CSGTL", "CSG Types", service=86),
+                LinFixedEF("4f83", 0x03, "EF.HNBN", "Home NodeB Name", service=86),
+                LinFixedEF("4f84", 0x04, "EF.OCSGL", "Operator CSG Lists", service=90),
+                LinFixedEF("4f85", 0x05, "EF.OCSGT", "Operator CSG Type", service=90),
+                LinFixedEF(
+                    "4f86", 0x06, "EF.OHNBN", "Operator Home NodeB Name", service=90
+                ),
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.4.8
@@ -2174,97 +2201,106 @@ class DF_ProSe(CardDF):
         self, fid="5f90", name="DF.ProSe", desc="Files for ProSe purpose", **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            LinFixedEF("4f01", 0x01, "EF.PROSE_MON", "ProSe Monitoring Parameters"),
-            LinFixedEF("4f02", 0x02, "EF.PROSE_ANN", "ProSe Announcing Parameters"),
-            LinFixedEF("4f03", 0x03, "EF.PROSEFUNC", "HPLMN ProSe Function"),
-            TransparentEF(
-                "4f04",
-                0x04,
-                "EF.PROSE_RADIO_COM",
-                "ProSe Direct Communication Radio Parameters",
-            ),
-            TransparentEF(
-                "4f05",
-                0x05,
-                "EF.PROSE_RADIO_MON",
-                "ProSe Direct Discovery Monitoring Radio Parameters",
-            ),
-            TransparentEF(
-                "4f06",
-                0x06,
-                "EF.PROSE_RADIO_ANN",
-                "ProSe Direct Discovery Announcing Radio Parameters",
-            ),
-            LinFixedEF("4f07", 0x07, "EF.PROSE_POLICY", "ProSe Policy Parameters"),
-            LinFixedEF("4f08", 0x08, "EF.PROSE_PLMN", "ProSe PLMN Parameters"),
-            TransparentEF("4f09", 0x09, "EF.PROSE_GC", "ProSe Group Counter"),
-            TransparentEF("4f10", 0x10, "EF.PST", "ProSe Service Table"),
-            TransparentEF(
-                "4f11", 0x11, "EF.UIRC", "ProSe UsageInformationReportingConfiguration"
-            ),
-            LinFixedEF(
-                "4f12",
-                0x12,
-                "EF.PROSE_GM_DISCOVERY",
-                "ProSe Group Member Discovery Parameters",
-            ),
-            LinFixedEF("4f13", 0x13, "EF.PROSE_RELAY", "ProSe Relay Parameters"),
-            TransparentEF(
-                "4f14",
-                0x14,
-                "EF.PROSE_RELAY_DISCOVERY",
-                "ProSe Relay Discovery Parameters",
-            ),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                LinFixedEF("4f01", 0x01, "EF.PROSE_MON", "ProSe Monitoring Parameters"),
+                LinFixedEF("4f02", 0x02, "EF.PROSE_ANN", "ProSe Announcing Parameters"),
+                LinFixedEF("4f03", 0x03, "EF.PROSEFUNC", "HPLMN ProSe Function"),
+                TransparentEF(
+                    "4f04",
+                    0x04,
+                    "EF.PROSE_RADIO_COM",
+                    "ProSe Direct Communication Radio Parameters",
+                ),
+                TransparentEF(
+                    "4f05",
+                    0x05,
+                    "EF.PROSE_RADIO_MON",
+                    "ProSe Direct Discovery Monitoring Radio Parameters",
+                ),
+                TransparentEF(
+                    "4f06",
+                    0x06,
+                    "EF.PROSE_RADIO_ANN",
+                    "ProSe Direct Discovery Announcing Radio Parameters",
+                ),
+                LinFixedEF("4f07", 0x07, "EF.PROSE_POLICY", "ProSe Policy Parameters"),
+                LinFixedEF("4f08", 0x08, "EF.PROSE_PLMN", "ProSe PLMN Parameters"),
+                TransparentEF("4f09", 0x09, "EF.PROSE_GC", "ProSe Group Counter"),
+                TransparentEF("4f10", 0x10, "EF.PST", "ProSe Service Table"),
+                TransparentEF(
+                    "4f11",
+                    0x11,
+                    "EF.UIRC",
+                    "ProSe UsageInformationReportingConfiguration",
+                ),
+                LinFixedEF(
+                    "4f12",
+                    0x12,
+                    "EF.PROSE_GM_DISCOVERY",
+                    "ProSe Group Member Discovery Parameters",
+                ),
+                LinFixedEF("4f13", 0x13, "EF.PROSE_RELAY", "ProSe Relay Parameters"),
+                TransparentEF(
+                    "4f14",
+                    0x14,
+                    "EF.PROSE_RELAY_DISCOVERY",
+                    "ProSe Relay Discovery Parameters",
+                ),
+            ]
+
+        self.add_files_lazy(files)
 
 
 class DF_USIM_5GS(CardDF):
     def __init__(self, fid="5FC0", name="DF.5GS", desc="5GS related files", **kwargs):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            # I'm looking at 31.102 R16.6
-            EF_5GS3GPPLOCI(service=122),
-            EF_5GS3GPPLOCI(
-                "4f02",
-                0x02,
-                "EF.5GSN3GPPLOCI",
-                "5GS non-3GPP location information",
-                service=122,
-            ),
-            EF_5GS3GPPNSC(service=122),
-            EF_5GS3GPPNSC(
-                "4f04",
-                0x04,
-                "EF.5GSN3GPPNSC",
-                "5GS non-3GPP Access NAS Security Context",
-                service=122,
-            ),
-            EF_5GAUTHKEYS(service=123),
-            EF_UAC_AIC(service=126),
-            EF_SUCI_Calc_Info(service=124),
-            EF_OPL5G(service=129),
-            EF_SUPI_NAI(service=130),
-            EF_Routing_Indicator(service=124),
-            TransparentEF(
-                "4F0B",
-                0x0B,
-                "EF.URSP",
-                "UE Route Selector Policies per PLMN",
-                service=132,
-            ),
-            EF_TN3GPPSNN(service=133),
-            # Rel-17 additions below
-            EF_CAG(service=137),
-            EF_SOR_CMCI(service=138),
-            EF_DRI(service=140),
-            EF_5GSEDRX(service=141),
-            EF_5GNSWO_CONF(service=142),
-            EF_MCHPPLMN(service=144),
-            EF_KAUSF_DERIVATION(service=145),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                # I'm looking at 31.102 R16.6
+                EF_5GS3GPPLOCI(service=122),
+                EF_5GS3GPPLOCI(
+                    "4f02",
+                    0x02,
+                    "EF.5GSN3GPPLOCI",
+                    desc="5GS non-3GPP location information",
+                    service=122,
+                ),
+                EF_5GS3GPPNSC(service=122),
+                EF_5GS3GPPNSC(
+                    "4f04",
+                    0x04,
+                    "EF.5GSN3GPPNSC",
+                    desc="5GS non-3GPP Access NAS Security Context",
+                    service=122,
+                ),
+                EF_5GAUTHKEYS(service=123),
+                EF_UAC_AIC(service=126),
+                EF_SUCI_Calc_Info(service=124),
+                EF_OPL5G(service=129),
+                EF_SUPI_NAI(service=130),
+                EF_Routing_Indicator(service=124),
+                TransparentEF(
+                    "4F0B",
+                    0x0B,
+                    "EF.URSP",
+                    "UE Route Selector Policies per PLMN",
+                    service=132,
+                ),
+                EF_TN3GPPSNN(service=133),
+                # Rel-17 additions below
+                EF_CAG(service=137),
+                EF_SOR_CMCI(service=138),
+                EF_DRI(service=140),
+                EF_5GSEDRX(service=141),
+                EF_5GNSWO_CONF(service=142),
+                EF_MCHPPLMN(service=144),
+                EF_KAUSF_DERIVATION(service=145),
+            ]
+
+        self.add_files_lazy(files)
 
 
 class DF_SAIP(CardDF):
@@ -2279,11 +2315,14 @@ class DF_SAIP(CardDF):
         **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            # uses the same file format as DF.5GS/EF_SUCI_Calc_Info, but different FID
-            EF_SUCI_Calc_Info(fid="4f01")
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                # uses the same file format as DF.5GS/EF_SUCI_Calc_Info, but different FID
+                EF_SUCI_Calc_Info(fid="4f01")
+            ]
+
+        self.add_files_lazy(files)
 
 
 class ADF_USIM(CardADF):
@@ -2299,228 +2338,258 @@ class ADF_USIM(CardADF):
         # add those commands to the general commands of a TransparentEF
         self.shell_commands += [self.AddlShellCommands()]
 
-        files = [
-            EF_LI(sfid=0x02),
-            EF_IMSI(sfid=0x07),
-            EF_Keys(),
-            EF_Keys(
-                "6f09",
-                0x09,
-                "EF.KeysPS",
-                desc="Ciphering and Integrity Keys for PS domain",
-            ),
-            EF_xPLMNwAcT(
-                "6f60",
-                0x0A,
-                "EF.PLMNwAcT",
-                "User controlled PLMN Selector with Access Technology",
-                service=20,
-            ),
-            EF_HPPLMN(),
-            EF_ACMmax(service=13),
-            EF_UST(),
-            CyclicEF(
-                "6f39",
-                None,
-                "EF.ACM",
-                "Accumulated call meter",
-                rec_len=(3, 3),
-                service=13,
-            ),
-            TransparentEF(
-                "6f3e", None, "EF.GID1", "Group Identifier Level 1", service=17
-            ),
-            TransparentEF(
-                "6f3f", None, "EF.GID2", "Group Identifier Level 2", service=18
-            ),
-            EF_SPN(service=19),
-            TransparentEF(
-                "6f41",
-                None,
-                "EF.PUCT",
-                "Price per unit and currency table",
-                size=(5, 5),
-                service=13,
-            ),
-            EF_CBMI(service=15),
-            EF_ACC(sfid=0x06),
-            EF_PLMNsel("6f7b", 0x0D, "EF.FPLMN", "Forbidden PLMNs", size=(12, None)),
-            EF_LOCI(),
-            EF_AD(),
-            EF_CBMID(sfid=0x0E, service=29),
-            EF_ECC(),
-            EF_CBMIR(service=16),
-            EF_PSLOCI(),
-            EF_ADN(
-                "6f3b", None, "EF.FDN", "Fixed Dialling Numbers", service=[2, 89], ext=2
-            ),
-            EF_SMS("6f3c", None, service=10),
-            EF_MSISDN(service=21),
-            EF_SMSP(service=12),
-            EF_SMSS(service=10),
-            EF_ADN(
-                "6f49",
-                None,
-                "EF.SDN",
-                "Service Dialling Numbers",
-                service=[4, 89],
-                ext=3,
-            ),
-            EF_EXT("6f4b", None, "EF.EXT2", "Extension2 (FDN)", service=3),
-            EF_EXT("6f4c", None, "EF.EXT3", "Extension2 (SDN)", service=5),
-            EF_SMSR(service=11),
-            EF_ICI(service=9),
-            EF_OCI(service=8),
-            EF_ICT(service=9),
-            EF_ICT("6f83", None, "EF.OCT", "Outgoing Call Timer", service=8),
-            EF_EXT("6f4e", None, "EF.EXT5", "Extension5 (ICI/OCI/MSISDN)", service=44),
-            EF_CCP2(service=14),
-            EF_eMLPP(service=24),
-            EF_AAeM(service=25),
-            # EF_Hiddenkey
-            EF_ADN("6f4d", None, "EF.BDN", "Barred Dialling Numbers", service=6, ext=4),
-            EF_EXT("6f55", None, "EF.EXT4", "Extension4 (BDN/SSC)", service=7),
-            EF_CMI(service=6),
-            EF_EST(service=[2, 6, 34, 35]),
-            EF_ACL(service=35),
-            EF_DCK(service=36),
-            EF_CNL(service=37),
-            EF_START_HFN(),
-            EF_THRESHOLD(),
-            EF_xPLMNwAcT(
-                "6f61",
-                0x11,
-                "EF.OPLMNwAcT",
-                "User controlled PLMN Selector with Access Technology",
-                service=42,
-            ),
-            EF_xPLMNwAcT(
-                "6f62",
-                0x13,
-                "EF.HPLMNwAcT",
-                "HPLMN Selector with Access Technology",
-                service=43,
-            ),
-            EF_ARR("6f06", 0x17),
-            EF_RPLMNAcT(),
-            TransparentEF("6fc4", None, "EF.NETPAR", "Network Parameters"),
-            EF_PNN("6fc5", 0x19, service=45),
-            EF_OPL(service=46),
-            EF_ADN(
-                "6fc7", None, "EF.MBDN", "Mailbox Dialling Numbers", service=47, ext=6
-            ),
-            EF_EXT("6fc8", None, "EF.EXT6", "Extension6 (MBDN)"),
-            EF_MBI(service=47),
-            EF_MWIS(service=48),
-            EF_ADN(
-                "6fcb",
-                None,
-                "EF.CFIS",
-                "Call Forwarding Indication Status",
-                service=49,
-                ext=7,
-            ),
-            EF_EXT("6fcc", None, "EF.EXT7", "Extension7 (CFIS)"),
-            TransparentEF(
-                "6fcd",
-                None,
-                "EF.SPDI",
-                "Service Provider Display Information",
-                service=51,
-            ),
-            EF_MMSN(service=52),
-            EF_EXT("6fcf", None, "EF.EXT8", "Extension8 (MMSN)", service=53),
-            EF_MMSICP(service=52),
-            EF_MMSUP(service=52),
-            EF_MMSUCP(service=(52, 55)),
-            EF_NIA(service=56, fid="6fd3"),
-            EF_VGCS(service=57),
-            EF_VGCSS(service=57),
-            EF_VGCS("6fb3", None, "EF.VBS", "Voice Broadcast Service", service=58),
-            EF_VGCSS(
-                "6fb4", None, "EF.VBSS", "Voice Broadcast Service Status", service=58
-            ),
-            EF_VGCSCA(service=64),
-            EF_VGCSCA(
-                "6fd5",
-                None,
-                "EF.VBCSCA",
-                "Voice Broadcast Service Ciphering Algorithm",
-                service=65,
-            ),
-            EF_GBABP(service=68),
-            EF_MSK(service=69),
-            EF_MUK(service=69),
-            EF_GBANL(service=68),
-            EF_PLMNsel(
-                "6fd9",
-                0x1D,
-                "EF.EHPLMN",
-                "Equivalent HPLMN",
-                size=(12, None),
-                service=71,
-            ),
-            EF_EHPLMNPI(service=(71, 73)),
-            # EF_LRPLMNSI ('6fdc', service=74)
-            EF_NAFKCA(service=(68, 76)),
-            TransparentEF(
-                "6fde", None, "EF.SPNI", "Service Provider Name Icon", service=78
-            ),
-            LinFixedEF("6fdf", None, "EF.PNNI", "PLMN Network Name Icon", service=79),
-            EF_NCP_IP(service=80),
-            EF_EPSLOCI(
-                "6fe3", 0x1E, "EF.EPSLOCI", "EPS location information", service=85
-            ),
-            EF_EPSNSC(service=85),
-            TransparentEF(
-                "6fe6", None, "EF.UFC", "USAT Facility Control", size=(1, 16)
-            ),
-            TransparentEF(
-                "6fe8",
-                None,
-                "EF.NASCONFIG",
-                "Non Access Stratum Configuration",
-                service=96,
-            ),
-            # UICC IARI (only in cards that have no ISIM) service=95
-            EF_PWS(service=97),
-            LinFixedEF(
-                "6fed", None, "EF.FDNURI", "Fixed Dialling Numbers URI", service=(2, 99)
-            ),
-            LinFixedEF(
-                "6fee",
-                None,
-                "EF.BDNURI",
-                "Barred Dialling Numbers URI",
-                service=(6, 99),
-            ),
-            LinFixedEF(
-                "6fef",
-                None,
-                "EF.SDNURI",
-                "Service Dialling Numbers URI",
-                service=(4, 99),
-            ),
-            # EF_IWL (IMEI(SV) White List)
-            EF_IPS(),
-            EF_ePDGId(service=(106, 107)),
-            # FIXME: from EF_ePDGSelection onwards
-            EF_FromPreferred(service=114),
-            EF_eAKA(),
-            # FIXME: DF_SoLSA service=23
-            DF_PHONEBOOK(),
-            DF_GSM_ACCESS(),
-            DF_WLAN(service=[59, 60, 61, 62, 63, 66, 81, 82, 83, 84, 88]),
-            DF_HNB(service=[86, 90]),
-            DF_ProSe(service=101),
-            # FIXME: DF_ACDC service=108
-            # FIXME: DF_TV service=116
-            DF_USIM_5GS(service=[122, 123, 124, 125, 126, 127, 129, 130]),
-            DF_SNPN(service=[143, 146]),
-            DF_5G_ProSe(service=139),
-            DF_SAIP(),
-        ]
-        self.add_files(files)
+        def files():
+            return [
+                EF_LI(sfid=0x02),
+                EF_IMSI(sfid=0x07),
+                EF_Keys(),
+                EF_Keys(
+                    "6f09",
+                    0x09,
+                    "EF.KeysPS",
+                    desc="Ciphering and Integrity Keys for PS domain",
+                ),
+                EF_xPLMNwAcT(
+                    "6f60",
+                    0x0A,
+                    "EF.PLMNwAcT",
+                    "User controlled PLMN Selector with Access Technology",
+                    service=20,
+                ),
+                EF_HPPLMN(),
+                EF_ACMmax(service=13),
+                EF_UST(),
+                CyclicEF(
+                    "6f39",
+                    None,
+                    "EF.ACM",
+                    "Accumulated call meter",
+                    rec_len=(3, 3),
+                    service=13,
+                ),
+                TransparentEF(
+                    "6f3e", None, "EF.GID1", "Group Identifier Level 1", service=17
+                ),
+                TransparentEF(
+                    "6f3f", None, "EF.GID2", "Group Identifier Level 2", service=18
+                ),
+                EF_SPN(service=19),
+                TransparentEF(
+                    "6f41",
+                    None,
+                    "EF.PUCT",
+                    "Price per unit and currency table",
+                    size=(5, 5),
+                    service=13,
+                ),
+                EF_CBMI(service=15),
+                EF_ACC(sfid=0x06),
+                EF_PLMNsel(
+                    "6f7b", 0x0D, "EF.FPLMN", "Forbidden PLMNs", size=(12, None)
+                ),
+                EF_LOCI(),
+                EF_AD(),
+                EF_CBMID(sfid=0x0E, service=29),
+                EF_ECC(),
+                EF_CBMIR(service=16),
+                EF_PSLOCI(),
+                EF_ADN(
+                    "6f3b",
+                    None,
+                    "EF.FDN",
+                    "Fixed Dialling Numbers",
+                    service=[2, 89],
+                    ext=2,
+                ),
+                EF_SMS("6f3c", None, service=10),
+                EF_MSISDN(service=21),
+                EF_SMSP(service=12),
+                EF_SMSS(service=10),
+                EF_ADN(
+                    "6f49",
+                    None,
+                    "EF.SDN",
+                    "Service Dialling Numbers",
+                    service=[4, 89],
+                    ext=3,
+                ),
+                EF_EXT("6f4b", None, "EF.EXT2", "Extension2 (FDN)", service=3),
+                EF_EXT("6f4c", None, "EF.EXT3", "Extension2 (SDN)", service=5),
+                EF_SMSR(service=11),
+                EF_ICI(service=9),
+                EF_OCI(service=8),
+                EF_ICT(service=9),
+                EF_ICT("6f83", None, "EF.OCT", desc="Outgoing Call Timer", service=8),
+                EF_EXT(
+                    "6f4e", None, "EF.EXT5", "Extension5 (ICI/OCI/MSISDN)", service=44
+                ),
+                EF_CCP2(service=14),
+                EF_eMLPP(service=24),
+                EF_AAeM(service=25),
+                # EF_Hiddenkey
+                EF_ADN(
+                    "6f4d", None, "EF.BDN", "Barred Dialling Numbers", service=6, ext=4
+                ),
+                EF_EXT("6f55", None, "EF.EXT4", "Extension4 (BDN/SSC)", service=7),
+                EF_CMI(service=6),
+                EF_EST(service=[2, 6, 34, 35]),
+                EF_ACL(service=35),
+                EF_DCK(service=36),
+                EF_CNL(service=37),
+                EF_START_HFN(),
+                EF_THRESHOLD(),
+                EF_xPLMNwAcT(
+                    "6f61",
+                    0x11,
+                    "EF.OPLMNwAcT",
+                    "User controlled PLMN Selector with Access Technology",
+                    service=42,
+                ),
+                EF_xPLMNwAcT(
+                    "6f62",
+                    0x13,
+                    "EF.HPLMNwAcT",
+                    "HPLMN Selector with Access Technology",
+                    service=43,
+                ),
+                EF_ARR("6f06", 0x17),
+                EF_RPLMNAcT(),
+                TransparentEF("6fc4", None, "EF.NETPAR", "Network Parameters"),
+                EF_PNN("6fc5", 0x19, service=45),
+                EF_OPL(service=46),
+                EF_ADN(
+                    "6fc7",
+                    None,
+                    "EF.MBDN",
+                    "Mailbox Dialling Numbers",
+                    service=47,
+                    ext=6,
+                ),
+                EF_EXT("6fc8", None, "EF.EXT6", "Extension6 (MBDN)"),
+                EF_MBI(service=47),
+                EF_MWIS(service=48),
+                EF_ADN(
+                    "6fcb",
+                    None,
+                    "EF.CFIS",
+                    "Call Forwarding Indication Status",
+                    service=49,
+                    ext=7,
+                ),
+                EF_EXT("6fcc", None, "EF.EXT7", "Extension7 (CFIS)"),
+                TransparentEF(
+                    "6fcd",
+                    None,
+                    "EF.SPDI",
+                    "Service Provider Display Information",
+                    service=51,
+                ),
+                EF_MMSN(service=52),
+                EF_EXT("6fcf", None, "EF.EXT8", "Extension8 (MMSN)", service=53),
+                EF_MMSICP(service=52),
+                EF_MMSUP(service=52),
+                EF_MMSUCP(service=(52, 55)),
+                EF_NIA(service=56, fid="6fd3"),
+                EF_VGCS(service=57),
+                EF_VGCSS(service=57),
+                EF_VGCS(
+                    "6fb3", None, "EF.VBS", desc="Voice Broadcast Service", service=58
+                ),
+                EF_VGCSS(
+                    "6fb4",
+                    None,
+                    "EF.VBSS",
+                    desc="Voice Broadcast Service Status",
+                    service=58,
+                ),
+                EF_VGCSCA(service=64),
+                EF_VGCSCA(
+                    "6fd5",
+                    None,
+                    "EF.VBCSCA",
+                    desc="Voice Broadcast Service Ciphering Algorithm",
+                    service=65,
+                ),
+                EF_GBABP(service=68),
+                EF_MSK(service=69),
+                EF_MUK(service=69),
+                EF_GBANL(service=68),
+                EF_PLMNsel(
+                    "6fd9",
+                    0x1D,
+                    "EF.EHPLMN",
+                    "Equivalent HPLMN",
+                    size=(12, None),
+                    service=71,
+                ),
+                EF_EHPLMNPI(service=(71, 73)),
+                # EF_LRPLMNSI ('6fdc', service=74)
+                EF_NAFKCA(service=(68, 76)),
+                TransparentEF(
+                    "6fde", None, "EF.SPNI", "Service Provider Name Icon", service=78
+                ),
+                LinFixedEF(
+                    "6fdf", None, "EF.PNNI", "PLMN Network Name Icon", service=79
+                ),
+                EF_NCP_IP(service=80),
+                EF_EPSLOCI(
+                    "6fe3", 0x1E, "EF.EPSLOCI", "EPS location information", service=85
+                ),
+                EF_EPSNSC(service=85),
+                TransparentEF(
+                    "6fe6", None, "EF.UFC", "USAT Facility Control", size=(1, 16)
+                ),
+                TransparentEF(
+                    "6fe8",
+                    None,
+                    "EF.NASCONFIG",
+                    "Non Access Stratum Configuration",
+                    service=96,
+                ),
+                # UICC IARI (only in cards that have no ISIM) service=95
+                EF_PWS(service=97),
+                LinFixedEF(
+                    "6fed",
+                    None,
+                    "EF.FDNURI",
+                    "Fixed Dialling Numbers URI",
+                    service=(2, 99),
+                ),
+                LinFixedEF(
+                    "6fee",
+                    None,
+                    "EF.BDNURI",
+                    "Barred Dialling Numbers URI",
+                    service=(6, 99),
+                ),
+                LinFixedEF(
+                    "6fef",
+                    None,
+                    "EF.SDNURI",
+                    "Service Dialling Numbers URI",
+                    service=(4, 99),
+                ),
+                # EF_IWL (IMEI(SV) White List)
+                EF_IPS(),
+                EF_ePDGId(service=(106, 107)),
+                # FIXME: from EF_ePDGSelection onwards
+                EF_FromPreferred(service=114),
+                EF_eAKA(),
+                # FIXME: DF_SoLSA service=23
+                DF_PHONEBOOK(),
+                DF_GSM_ACCESS(),
+                DF_WLAN(service=[59, 60, 61, 62, 63, 66, 81, 82, 83, 84, 88]),
+                DF_HNB(service=[86, 90]),
+                DF_ProSe(service=101),
+                # FIXME: DF_ACDC service=108
+                # FIXME: DF_TV service=116
+                DF_USIM_5GS(service=[122, 123, 124, 125, 126, 127, 129, 130]),
+                DF_SNPN(service=[143, 146]),
+                DF_5G_ProSe(service=139),
+                DF_SAIP(),
+            ]
+
+        self.add_files_lazy(files)
 
     def decode_select_response(self, data_hex):
         return pySim.ts_102_221.CardProfileUICC.decode_select_response(data_hex)
@@ -174,14 +174,17 @@ class EF_PUID(TransparentEF):
 class DF_PHONEBOOK(CardDF):
     def __init__(self, fid="5F3A", name="DF.PHONEBOOK", desc="Phonebook", **kwargs):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_PBR(),
-            EF_PSC(),
-            EF_CC(),
-            EF_PUID(),
-            # FIXME: Those 4Fxx entries with unspecified FID...
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_PBR(),
+                EF_PSC(),
+                EF_CC(),
+                EF_PUID(),
+                # FIXME: Those 4Fxx entries with unspecified FID...
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.6.3.1
@@ -203,11 +206,14 @@ class EF_MMDF(BerTlvEF):
 class DF_MULTIMEDIA(CardDF):
     def __init__(self, fid="5F3B", name="DF.MULTIMEDIA", desc="Multimedia", **kwargs):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_MML(),
-            EF_MMDF(),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_MML(),
+                EF_MMDF(),
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.6.4.1
@@ -313,11 +319,14 @@ class DF_MCS(CardDF):
         self, fid="5F3D", name="DF.MCS", desc="Mission Critical Services", **kwargs
     ):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_MST(),
-            EF_MCS_CONFIG(),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_MST(),
+                EF_MCS_CONFIG(),
+            ]
+
+        self.add_files_lazy(files)
 
 
 # TS 31.102 Section 4.6.5.2
@@ -377,8 +386,11 @@ class EF_V2X_CONFIG(BerTlvEF):
 class DF_V2X(CardDF):
     def __init__(self, fid="5F3E", name="DF.V2X", desc="Vehicle to X", **kwargs):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_VST(),
-            EF_V2X_CONFIG(),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_VST(),
+                EF_V2X_CONFIG(),
+            ]
+
+        self.add_files_lazy(files)
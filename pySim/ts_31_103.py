@@ -416,29 +416,31 @@ class ADF_ISIM(CardADF):
     ):
         super().__init__(aid=aid, fid=fid, sfid=sfid, name=name, desc=desc)
 
-        files = [
-            EF_IMPI(),
-            EF_DOMAIN(),
-            EF_IMPU(),
-            EF_AD(),
-            EF_ARR("6f06", 0x06),
-            EF_IST(),
-            EF_PCSCF(service=5),
-            EF_GBABP(service=2),
-            EF_GBANL(service=2),
-            EF_NAFKCA(service=2),
-            EF_SMS(service=(6, 8)),
-            EF_SMSS(service=(6, 8)),
-            EF_SMSR(service=(7, 8)),
-            EF_SMSP(service=8),
-            EF_UICCIARI(service=10),
-            EF_FromPreferred(service=17),
-            EF_IMSConfigData(service=18),
-            EF_XCAPConfigData(service=19),
-            EF_WebRTCURI(service=20),
-            EF_MuDMiDConfigData(service=21),
-        ]
-        self.add_files(files)
+        def files():
+            return [
+                EF_IMPI(),
+                EF_DOMAIN(),
+                EF_IMPU(),
+                EF_AD(),
+                EF_ARR("6f06", 0x06),
+                EF_IST(),
+                EF_PCSCF(service=5),
+                EF_GBABP(service=2),
+                EF_GBANL(service=2),
+                EF_NAFKCA(service=2),
+                EF_SMS(service=(6, 8)),
+                EF_SMSS(service=(6, 8)),
+                EF_SMSR(service=(7, 8)),
+                EF_SMSP(service=8),
+                EF_UICCIARI(service=10),
+                EF_FromPreferred(service=17),
+                EF_IMSConfigData(service=18),
+                EF_XCAPConfigData(service=19),
+                EF_WebRTCURI(service=20),
+                EF_MuDMiDConfigData(service=21),
+            ]
+
+        self.add_files_lazy(files)
         # add those commands to the general commands of a TransparentEF
         self.shell_commands += [ADF_USIM.AddlShellCommands()]
 
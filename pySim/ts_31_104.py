@@ -40,12 +40,14 @@ class ADF_HPSIM(CardADF):
     ):
         super().__init__(aid=aid, fid=fid, sfid=sfid, name=name, desc=desc)
 
-        files = [
-            EF_ARR(fid="6f06", sfid=0x06),
-            EF_IMSI(fid="6f07", sfid=0x07),
-            EF_AD(fid="6fad", sfid=0x03),
-        ]
-        self.add_files(files)
+        def files():
+            return [
+                EF_ARR(fid="6f06", sfid=0x06),
+                EF_IMSI(fid="6f07", sfid=0x07),
+                EF_AD(fid="6fad", sfid=0x03),
+            ]
+
+        self.add_files_lazy(files)
         # add those commands to the general commands of a TransparentEF
         self.shell_commands += [ADF_USIM.AddlShellCommands()]
 
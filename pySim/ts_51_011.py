@@ -631,41 +631,44 @@ class EF_CMI(LinFixedEF):
 class DF_TELECOM(CardDF):
     def __init__(self, fid="7f10", name="DF.TELECOM", desc=None, **kwargs):
         super().__init__(fid=fid, name=name, desc=desc, **kwargs)
-        files = [
-            EF_ADN(),
-            EF_ADN(fid="6f3b", name="EF.FDN", desc="Fixed dialling numbers", ext=2),
-            EF_SMS(),
-            LinFixedEF(
-                fid="6f3d",
-                name="EF.CCP",
-                desc="Capability Configuration Parameters",
-                rec_len=(14, 14),
-            ),
-            LinFixedEF(
-                fid="6f4f",
-                name="EF.ECCP",
-                desc="Extended Capability Configuration Parameters",
-                rec_len=(15, 32),
-            ),
-            EF_MSISDN(),
-            EF_SMSP(),
-            EF_SMSS(),
-            EF_ADN("6f44", None, "EF.LND", "Last Number Dialled", ext=1),
-            EF_ADN("6f49", None, "EF.SDN", "Service Dialling Numbers", ext=3),
-            EF_EXT("6f4a", None, "EF.EXT1", "Extension1 (ADN/SSC)"),
-            EF_EXT("6f4b", None, "EF.EXT2", "Extension2 (FDN/SSC)"),
-            EF_EXT("6f4c", None, "EF.EXT3", "Extension3 (SDN)"),
-            EF_ADN(fid="6f4d", name="EF.BDN", desc="Barred Dialling Numbers"),
-            EF_EXT("6f4e", None, "EF.EXT4", "Extension4 (BDN/SSC)"),
-            EF_SMSR(),
-            EF_CMI(),
-            # not really part of 51.011 but something that TS 31.102 specifies may exist here.
-            DF_PHONEBOOK(),
-            DF_MULTIMEDIA(),
-            DF_MCS(),
-            DF_V2X(),
-        ]
-        self.add_files(files)
+
+        def files():
+            return [
+                EF_ADN(),
+                EF_ADN(fid="6f3b", name="EF.FDN", desc="Fixed dialling numbers", ext=2),
+                EF_SMS(),
+                LinFixedEF(
+                    fid="6f3d",
+                    name="EF.CCP",
+                    desc="Capability Configuration Parameters",
+                    rec_len=(14, 14),
+                ),
+                LinFixedEF(
+                    fid="6f4f",
+                    name="EF.ECCP",
+                    desc="Extended Capability Configuration Parameters",
+                    rec_len=(15, 32),
+                ),
+                EF_MSISDN(),
+                EF_SMSP(),
+                EF_SMSS(),
+                EF_ADN("6f44", None, "EF.LND", "Last Number Dialled", ext=1),
+                EF_ADN("6f49", None, "EF.SDN", "Service Dialling Numbers", ext=3),
+                EF_EXT("6f4a", None, "EF.EXT1", "Extension1 (ADN/SSC)"),
+                EF_EXT("6f4b", None, "EF.EXT2", "Extension2 (FDN/SSC)"),
+                EF_EXT("6f4c", None, "EF.EXT3", "Extension3 (SDN)"),
+                EF_ADN(fid="6f4d", name="EF.BDN", desc="Barred Dialling Numbers"),
+                EF_EXT("6f4e", None, "EF.EXT4", "Extension4 (BDN/SSC)"),
+                EF_SMSR(),
+                EF_CMI(),
+                # not really part of 51.011 but something that TS 31.102 specifies may exist here.
+                DF_PHONEBOOK(),
+                DF_MULTIMEDIA(),
+                DF_MCS(),
+                DF_V2X(),
+            ]
+
+        self.add_files_lazy(files)
 
 
 ######################################################################
@@ -1789,93 +1792,102 @@ class DF_GSM(CardDF):
         super().__init__(fid=fid, name=name, desc=desc)
         self.shell_commands += [self.AddlShellCommands()]
 
-        files = [
-            EF_LP(),
-            EF_IMSI(),
-            EF_Kc(),
-            EF_PLMNsel(),
-            TransparentEF(
-                "6f31", None, "EF.HPPLMN", "Higher Priority PLMN search period"
-            ),
-            EF_ACMmax(),
-            EF_ServiceTable(
-                "6f38",
-                None,
-                "EF.SST",
-                "SIM service table",
-                table=EF_SST_map,
-                size=(2, 16),
-            ),
-            CyclicEF("6f39", None, "EF.ACM", "Accumulated call meter", rec_len=(3, 3)),
-            TransparentEF("6f3e", None, "EF.GID1", "Group Identifier Level 1"),
-            TransparentEF("6f3f", None, "EF.GID2", "Group Identifier Level 2"),
-            EF_SPN(),
-            TransparentEF(
-                "6f41",
-                None,
-                "EF.PUCT",
-                "Price per unit and currency table",
-                size=(5, 5),
-            ),
-            EF_CBMI(),
-            TransparentEF(
-                "6f74", None, "EF.BCCH", "Broadcast control channels", size=(16, 16)
-            ),
-            EF_ACC(),
-            EF_PLMNsel("6f7b", None, "EF.FPLMN", "Forbidden PLMNs", size=(12, 12)),
-            EF_LOCI(),
-            EF_AD(),
-            TransparentEF(
-                "6fae", None, "EF.Phase", "Phase identification", size=(1, 1)
-            ),
-            EF_VGCS(),
-            EF_VGCSS(),
-            EF_VGCS("6fb3", None, "EF.VBS", "Voice Broadcast Service"),
-            EF_VGCSS("6fb4", None, "EF.VBSS", "Voice Broadcast Service Status"),
-            EF_eMLPP(),
-            EF_AAeM(),
-            EF_CBMID(),
-            EF_ECC(),
-            EF_CBMIR(),
-            EF_DCK(),
-            EF_CNL(),
-            EF_NIA(),
-            EF_Kc("6f52", None, "EF.KcGPRS", "GPRS Ciphering key KcGPRS"),
-            EF_LOCIGPRS(),
-            TransparentEF("6f54", None, "EF.SUME", "SetUpMenu Elements"),
-            EF_xPLMNwAcT(
-                "6f60",
-                None,
-                "EF.PLMNwAcT",
-                "User controlled PLMN Selector with Access Technology",
-            ),
-            EF_xPLMNwAcT(
-                "6f61",
-                None,
-                "EF.OPLMNwAcT",
-                "Operator controlled PLMN Selector with Access Technology",
-            ),
-            EF_xPLMNwAcT(
-                "6f62", None, "EF.HPLMNwAcT", "HPLMN Selector with Access Technology"
-            ),
-            EF_CPBCCH(),
-            EF_InvScan(),
-            EF_PNN(),
-            EF_OPL(),
-            EF_ADN("6fc7", None, "EF.MBDN", "Mailbox Dialling Numbers"),
-            EF_MBI(),
-            EF_MWIS(),
-            EF_ADN("6fcb", None, "EF.CFIS", "Call Forwarding Indication Status"),
-            EF_EXT("6fc8", None, "EF.EXT6", "Externsion6 (MBDN)"),
-            EF_EXT("6fcc", None, "EF.EXT7", "Externsion7 (CFIS)"),
-            EF_SPDI(),
-            EF_MMSN(),
-            EF_EXT("6fcf", None, "EF.EXT8", "Extension8 (MMSN)"),
-            EF_MMSICP(),
-            EF_MMSUP(),
-            EF_MMSUCP(),
-        ]
-        self.add_files(files)
+        def files():
+            return [
+                EF_LP(),
+                EF_IMSI(),
+                EF_Kc(),
+                EF_PLMNsel(),
+                TransparentEF(
+                    "6f31", None, "EF.HPPLMN", "Higher Priority PLMN search period"
+                ),
+                EF_ACMmax(),
+                EF_ServiceTable(
+                    "6f38",
+                    None,
+                    "EF.SST",
+                    "SIM service table",
+                    table=EF_SST_map,
+                    size=(2, 16),
+                ),
+                CyclicEF(
+                    "6f39", None, "EF.ACM", "Accumulated call meter", rec_len=(3, 3)
+                ),
+                TransparentEF("6f3e", None, "EF.GID1", "Group Identifier Level 1"),
+                TransparentEF("6f3f", None, "EF.GID2", "Group Identifier Level 2"),
+                EF_SPN(),
+                TransparentEF(
+                    "6f41",
+                    None,
+                    "EF.PUCT",
+                    "Price per unit and currency table",
+                    size=(5, 5),
+                ),
+                EF_CBMI(),
+                TransparentEF(
+                    "6f74", None, "EF.BCCH", "Broadcast control channels", size=(16, 16)
+                ),
+                EF_ACC(),
+                EF_PLMNsel("6f7b", None, "EF.FPLMN", "Forbidden PLMNs", size=(12, 12)),
+                EF_LOCI(),
+                EF_AD(),
+                TransparentEF(
+                    "6fae", None, "EF.Phase", "Phase identification", size=(1, 1)
+                ),
+                EF_VGCS(),
+                EF_VGCSS(),
+                EF_VGCS("6fb3", None, "EF.VBS", desc="Voice Broadcast Service"),
+                EF_VGCSS(
+                    "6fb4", None, "EF.VBSS", desc="Voice Broadcast Service Status"
+                ),
+                EF_eMLPP(),
+                EF_AAeM(),
+                EF_CBMID(),
+                EF_ECC(),
+                EF_CBMIR(),
+                EF_DCK(),
+                EF_CNL(),
+                EF_NIA(),
+                EF_Kc("6f52", None, "EF.KcGPRS", "GPRS Ciphering key KcGPRS"),
+                EF_LOCIGPRS(),
+                TransparentEF("6f54", None, "EF.SUME", "SetUpMenu Elements"),
+                EF_xPLMNwAcT(
+                    "6f60",
+                    None,
+                    "EF.PLMNwAcT",
+                    "User controlled PLMN Selector with Access Technology",
+                ),
+                EF_xPLMNwAcT(
+                    "6f61",
+                    None,
+                    "EF.OPLMNwAcT",
+                    "Operator controlled PLMN Selector with Access Technology",
+                ),
+                EF_xPLMNwAcT(
+                    "6f62",
+                    None,
+                    "EF.HPLMNwAcT",
+                    "HPLMN Selector with Access Technology",
+                ),
+                EF_CPBCCH(),
+                EF_InvScan(),
+                EF_PNN(),
+                EF_OPL(),
+                EF_ADN("6fc7", None, "EF.MBDN", "Mailbox Dialling Numbers"),
+                EF_MBI(),
+                EF_MWIS(),
+                EF_ADN("6fcb", None, "EF.CFIS", "Call Forwarding Indication Status"),
+                EF_EXT("6fc8", None, "EF.EXT6", "Externsion6 (MBDN)"),
+                EF_EXT("6fcc", None, "EF.EXT7", "Externsion7 (CFIS)"),
+                EF_SPDI(),
+                EF_MMSN(),
+                EF_EXT("6fcf", None, "EF.EXT8", "Extension8 (MMSN)"),
+                EF_MMSICP(),
+                EF_MMSUP(),
+                EF_MMSUCP(),
+            ]
+
+        self.add_files_lazy(files)
 
     @with_default_category("Application-Specific Commands")
     class AddlShellCommands(CommandSet):
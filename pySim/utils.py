@@ -5,6 +5,7 @@
 
 import json
 import abc
+import functools
 import string
 from io import BytesIO
 from typing import Optional, List, Dict, Any, Tuple
@@ -358,6 +359,154 @@ def bertlv_parse_one(binary: bytes) -> Tuple[dict, int, bytes, bytes]:
     return (tagdict, length, value, remainder)
 
 
+@functools.lru_cache(maxsize=1024)
+def fcp_parse(fcp: bytes, tags: Tuple[int, ...]) -> Dict[int, bytes]:
+    """Extract some top level data objects of an FCP template (ETSI TS 102 221
+    Section 11.1.1.3), without decoding their contents.  Results are
+    memoized per (FCP, tags), so repeated lookups on the same select
+    response cost a dict access.
+    Args:
+            fcp : select response, starting with the FCP template tag 62
+            tags : tags to extract (ex. (0x80, 0x82))
+    Returns:
+            dict of tag to raw value, for the tags present in the template
+    """
+    if not fcp or fcp[0] != 0x62:
+        raise ValueError(
+            "Tag of the FCP template does not match, expected 62 but got %s"
+            % fcp[0:1].hex()
+        )
+    length, body = bertlv_parse_len(fcp[1:])
+    body = body[:length]
+    found = {}  # type: Dict[int, bytes]
+    i = 0
+    while i < len(body) and len(found) < len(tags):
+        tag = body[i]
+        i += 1
+        if tag & 0x1F == 0x1F:
+            # multi-byte tag
+            while i < len(body) and body[i] & 0x80:
+                tag = (tag << 8) | body[i]
+                i += 1
+            tag = (tag << 8) | body[i]
+            i += 1
+        vlen = body[i]
+        i += 1
+        if vlen & 0x80:
+            n = vlen & 0x7F
+            vlen = int.from_bytes(body[i : i + n], "big")
+            i += n
+        if tag in tags and tag not in found:
+            found[tag] = bytes(body[i : i + vlen])
+        i += vlen
+    return found
+
+
+def atr_historical_bytes(atr: List[int]) -> bytes:
+    """Extract the historical bytes of an ATR (ISO/IEC 7816-3 Section 8.2).
+    Args:
+            atr : ATR as list of integers (as returned by LinkBase.get_atr())
+    Returns:
+            historical bytes T1..TK
+    """
+    if len(atr) < 2:
+        return b""
+    k = atr[1] & 0x0F
+    i = 1
+    y = atr[1] & 0xF0
+    while True:
+        # skip TAi, TBi, TCi, stop after TDi if it announces no further bytes
+        pos = i + bin(y & 0x70).count("1")
+        if not y & 0x80:
+            i = pos
+            break
+        i = pos + 1
+        if i >= len(atr):
+            return b""
+        y = atr[i] & 0xF0
+    return bytes(atr[i + 1 : i + 1 + k])
+
+
+def atr_protocols(atr: List[int]) -> List[int]:
+    """List the transmission protocols (T=0, T=1, ...) offered in an ATR,
+    in the order of the TDi bytes; T=0 if there is no TD1.
+    Args:
+            atr : ATR as list of integers (as returned by LinkBase.get_atr())
+    """
+    protocols = []  # type: List[int]
+    if len(atr) < 2:
+        return [0]
+    i = 1
+    y = atr[1] & 0xF0
+    while y & 0x80:
+        i += bin(y & 0x70).count("1") + 1
+        if i >= len(atr):
+            break
+        t = atr[i] & 0x0F
+        # T=15 only carries global interface bytes
+        if t != 15 and t not in protocols:
+            protocols.append(t)
+        y = atr[i] & 0xF0
+    return protocols or [0]
+
+
+def atr_extended_length(atr: List[int]) -> bool:
+    """Tell if the card indicates support of extended Lc and Le fields in the
+    card capabilities of its historical bytes (ISO/IEC 7816-4 Section 12.1.1.9,
+    third software function table, bit b7).
+    Args:
+            atr : ATR as list of integers (as returned by LinkBase.get_atr())
+    """
+    hist = atr_historical_bytes(atr)
+    # only the compact-TLV format (category indicator 0x80) carries capabilities
+    if not hist or hist[0] != 0x80:
+        return False
+    i = 1
+    while i < len(hist):
+        tag, length = hist[i] >> 4, hist[i] & 0x0F
+        value = hist[i + 1 : i + 1 + length]
+        if tag == 0x7 and len(value) >= 3:
+            return bool(value[2] & 0x40)
+        i += 1 + length
+    return False
+
+
+def ef_atr_extended_length(data: bytes) -> Optional[Tuple[int, int]]:
+    """Extract the extended length information (DO 7F66, ISO/IEC 7816-4
+    Section 12.7.1) from the contents of EF.ATR/INFO.
+    Args:
+            data : contents of EF.ATR
+    Returns:
+            Tuple of (max. command data length, max. response data length), or
+            None if the data object is missing or malformed
+    """
+    i = 0
+    try:
+        while i < len(data) and data[i] not in (0x00, 0xFF):
+            tag = data[i]
+            i += 1
+            if tag & 0x1F == 0x1F:
+                # two byte tags are all EF.ATR needs
+                tag = tag << 8 | data[i]
+                i += 1
+            length, rest = bertlv_parse_len(data[i:])
+            value = rest[:length]
+            i = len(data) - len(rest) + length
+            if tag != 0x7F66:
+                continue
+            # two INTEGER data objects, max. Nc and max. Ne
+            limits = []  # type: List[int]
+            j = 0
+            while j + 1 < len(value) and value[j] == 0x02:
+                vlen = value[j + 1]
+                limits.append(int.from_bytes(value[j + 2 : j + 2 + vlen], "big"))
+                j += 2 + vlen
+            return (limits[0], limits[1]) if len(limits) >= 2 else None
+    except IndexError:
+        pass
+    return None
+
+
 # IMSI encoded format:
 # For IMSI 0123456789ABCDE:
 #
@@ -1325,6 +1474,45 @@ def expand_hex(hexstring, length):
     return hexstring
 
 
+def diff_runs(old: bytes, new: bytes, max_gap: int = 0) -> List[Tuple[int, int]]:
+    """Determine the byte runs in which new differs from old.
+
+    Runs separated by no more than max_gap unchanged bytes are merged into one,
+    for writers where rewriting a few unchanged bytes is cheaper than another
+    command.  Bytes of new beyond the end of old always count as changed.
+
+    Args:
+            old : current content
+            new : content to be written
+            max_gap : largest number of unchanged bytes to include in a run
+    Returns:
+            list of tuple(offset, length), in ascending order
+    """
+    if old == new:
+        return []
+    runs = []  # type: List[List[int]]
+    common = min(len(old), len(new))
+    i = 0
+    while i < common:
+        if old[i] == new[i]:
+            i += 1
+            continue
+        if runs and i - runs[-1][1] <= max_gap:
+            run = runs[-1]
+        else:
+            run = [i, i]
+            runs.append(run)
+        while i < common and old[i] != new[i]:
+            i += 1
+        run[1] = i
+    if len(new) > common:
+        if runs and common - runs[-1][1] <= max_gap:
+            runs[-1][1] = len(new)
+        else:
+            runs.append([common, len(new)])
+    return [(start, end - start) for start, end in runs]
+
+
 class JsonEncoder(json.JSONEncoder):
     """Extend the standard library JSONEncoder with support for more types."""
 
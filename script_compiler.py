@@ -0,0 +1,257 @@
+""" Perso script compiler
+
+Turns an APDU script file (Pre OS / OS / Pre Perso / Perso) into an immutable
+program of opcodes.  All text handling (whitespace and comment stripping, APDU
+validation, splitting of the expected SW) happens once at compile time, so the
+per-card loop only has to transmit and compare.
+
+Compiled programs are cached by file path, mtime and content hash; loading the
+same perso file for every card of a batch costs a single os.stat().
+
+APDU lines may contain placeholders for card-individual data, e.g.
+
+        00D600000A ${ICCID} SW9000
+        00D6000009 ${IMSI:imsi} SW9000
+
+A placeholder is substituted by the hex value of the variable, optionally run
+through an encoder (see ENCODERS).  Such lines are compiled into static byte
+slices plus variable slots, so binding a program to the data of one card only
+patches the slots (ScriptProgram.bind).
+"""
+
+import csv
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pySim.utils import enc_iccid, enc_imsi, s2h
+
+OP_APDU = 0
+OP_RESET = 1
+OP_INVALID = 2
+
+HEX_CHARS = frozenset("0123456789ABCDEF")
+SCRIPT_CHARS = HEX_CHARS | frozenset("SW")
+RESET_KEYWORDS = ("reset", "rst")
+COMMENT_PREFIXES = ("#", "/")
+
+PLACEHOLDER_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::([a-z]+))?\}")
+
+# optional value encoders, ${NAME:encoder}
+ENCODERS = {
+    "iccid": enc_iccid,
+    "imsi": enc_imsi,
+    "ascii": s2h,
+}
+
+
+def _encode(values: Dict[str, str], name: str, encoder: Optional[str]) -> bytes:
+    try:
+        value = values[name]
+    except KeyError:
+        raise ValueError("Script variable ${%s} is not bound" % name)
+    if encoder:
+        value = ENCODERS[encoder](value)
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        raise ValueError(
+            "Script variable ${%s} is not a hex string: %s" % (name, value)
+        )
+
+
+class ScriptOp(NamedTuple):
+    """A single compiled script line."""
+
+    opcode: int
+    # the line as it appears in the logs (whitespace removed)
+    text: str
+    # command APDU as hex string and as bytes (OP_APDU only)
+    pdu: str = ""
+    apdu: bytes = b""
+    # expected SW in upper case hex, None if the line has no 'SW' part
+    sw: Optional[str] = None
+    # template lines only: static bytes and (name, encoder) slots
+    parts: Optional[tuple] = None
+
+    def bind(self, values: Dict[str, str]) -> "ScriptOp":
+        """Return the APDU op with all variable slots filled from values."""
+        apdu = b"".join(
+            p if isinstance(p, bytes) else _encode(values, *p) for p in self.parts
+        )
+        pdu = apdu.hex().upper()
+        return self._replace(text=pdu, pdu=pdu, apdu=apdu, parts=None)
+
+    def sw_ok(self, sw: str) -> bool:
+        """Compare the SW returned by the card against the expected SW."""
+        return self.sw is None or sw.upper() == self.sw
+
+
+class ScriptProgram(NamedTuple):
+    """Immutable result of compiling a script file."""
+
+    path: str
+    digest: str
+    ops: Tuple[ScriptOp, ...]
+    # indexes of template ops in ops
+    slots: Tuple[int, ...] = ()
+
+    @property
+    def apdu_count(self) -> int:
+        return sum(1 for op in self.ops if op.opcode == OP_APDU)
+
+    @property
+    def variables(self) -> List[str]:
+        """Names of all variables used by the program."""
+        names = []
+        for i in self.slots:
+            for p in self.ops[i].parts:
+                if not isinstance(p, bytes) and p[0] not in names:
+                    names.append(p[0])
+        return names
+
+    def bind(self, values: Dict[str, str]) -> "ScriptProgram":
+        """Return the program for one card, with all variables substituted.
+
+        Args:
+                values : dict of variable name to hex string, as returned by
+                         CardDataCsv.next_card() or card_key_provider_get()
+        """
+        if not self.slots:
+            return self
+        ops = list(self.ops)
+        for i in self.slots:
+            ops[i] = ops[i].bind(values)
+        return self._replace(ops=tuple(ops), slots=())
+
+
+def is_valid_apdu(command: str) -> bool:
+    """Check if a (whitespace stripped) script line is an APDU line."""
+    return (
+        len(command) >= 10
+        and len(command) % 2 == 0
+        and SCRIPT_CHARS.issuperset(command)
+    )
+
+
+def compile_line(line: str) -> Optional[ScriptOp]:
+    """Compile one script line; returns None for blank and comment lines."""
+    command = "".join(line.split())
+    if not command or command.startswith(COMMENT_PREFIXES):
+        return None
+    if "${" in command:
+        return compile_template(command)
+    if is_valid_apdu(command):
+        cmd, sep, sw = command.partition("SW")
+        if HEX_CHARS.issuperset(cmd) and len(cmd) % 2 == 0:
+            return ScriptOp(
+                OP_APDU, cmd, cmd, bytes.fromhex(cmd), sw.upper() if sep else None
+            )
+    elif command.lower() in RESET_KEYWORDS:
+        return ScriptOp(OP_RESET, command)
+    return ScriptOp(OP_INVALID, command)
+
+
+def compile_template(command: str) -> ScriptOp:
+    """Compile an APDU line containing ${NAME} placeholders."""
+    # static, name, encoder, static, name, encoder, ..., static
+    pieces = PLACEHOLDER_RE.split(command)
+    head, sep, sw = pieces[-1].partition("SW")
+    pieces[-1] = head
+    parts = []
+    for i in range(0, len(pieces), 3):
+        static = pieces[i]
+        if len(static) % 2 or not HEX_CHARS.issuperset(static):
+            return ScriptOp(OP_INVALID, command)
+        if static:
+            parts.append(bytes.fromhex(static))
+        if i + 1 < len(pieces):
+            name, encoder = pieces[i + 1].upper(), pieces[i + 2]
+            if encoder and encoder not in ENCODERS:
+                return ScriptOp(OP_INVALID, command)
+            parts.append((name, encoder))
+    text = command[: len(command) - len(sw) - 2] if sep else command
+    return ScriptOp(OP_APDU, text, sw=sw.upper() if sep else None, parts=tuple(parts))
+
+
+def compile_text(text: str, path: str = "", digest: str = "") -> ScriptProgram:
+    """Compile the contents of a script file."""
+    ops = []
+    slots = []
+    for line in text.splitlines():
+        op = compile_line(line)
+        if op is not None:
+            if op.parts is not None:
+                slots.append(len(ops))
+            ops.append(op)
+    return ScriptProgram(path, digest, tuple(ops), tuple(slots))
+
+
+# path -> (mtime_ns, size, digest, program)
+_cache = {}  # type: Dict[str, Tuple[int, int, str, ScriptProgram]]
+
+
+def compile_script(path: str) -> ScriptProgram:
+    """Compile a script file, re-using the cached program if the file is unchanged.
+
+    Args:
+            path : path of the script file
+    Returns:
+            compiled ScriptProgram
+    """
+    st = os.stat(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[3]
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached and cached[2] == digest:
+        # touched but not modified
+        program = cached[3]
+    else:
+        program = compile_text(raw.decode(errors="replace"), path, digest)
+    _cache[path] = (st.st_mtime_ns, st.st_size, digest, program)
+    return program
+
+
+def clear_cache():
+    """Drop all cached programs."""
+    _cache.clear()
+
+
+class CardDataCsv:
+    """Per-card variable source: one CSV row per card, in file order.
+
+    Column names are upper-cased, like in CardKeyProviderCsv.  Rows are handed
+    out thread safe, so several readers can share one data file."""
+
+    def __init__(self, filename: str):
+        """
+        Args:
+                filename : file name (path) of CSV file containing card-individual data
+        """
+        with open(filename, "r", newline="") as f:
+            cr = csv.DictReader(f)
+            if not cr.fieldnames:
+                raise RuntimeError("CSV-File '%s' has no header" % filename)
+            cr.fieldnames = [field.strip().upper() for field in cr.fieldnames]
+            self.rows = [dict(row) for row in cr]
+        self.filename = filename
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def next_card(self) -> Optional[Dict[str, str]]:
+        """Return the variables of the next card, None once the file is used up."""
+        with self._lock:
+            if self._next >= len(self.rows):
+                return None
+            row = self.rows[self._next]
+            self._next += 1
+        return row
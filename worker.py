@@ -0,0 +1,99 @@
+""" Script execution worker
+
+Runs the Pre OS / OS / Pre Perso / Perso stages of PcscSimLink.run_script on a
+QThread so the GUI stays responsive.  Console lines go into the LogSink of the
+PcscSimLink and progress is published as throttled signals; the GUI renders
+both on a timer tick instead of repainting once per APDU.
+"""
+
+import threading
+import time
+from typing import List, Tuple
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from script_compiler import compile_script
+
+# minimum interval between two progress signals (seconds)
+PROGRESS_INTERVAL = 0.1
+
+
+class ScriptWorker(QThread):
+    """Execute a list of (path, banner) stages on a PcscSimLink in a worker thread.
+
+    Signals:
+            progress(index, total, elapsed, throughput) : APDU index over all
+                    stages, total APDU count, elapsed seconds and APDUs/second
+            stage_done(path) : a stage completed successfully
+            failed(message) : a stage failed or the run was cancelled
+    """
+
+    progress = pyqtSignal(int, int, float, float)
+    stage_done = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, scc, stages: List[Tuple[str, str]], parent=None):
+        super().__init__(parent)
+        self.scc = scc
+        self.stages = stages
+        self._cancel = False
+        self._resume = threading.Event()
+        self._resume.set()
+        self._base = 0
+        self._total = 0
+        self._start = 0.0
+        self._last_emit = 0.0
+
+    def cancel(self):
+        self._cancel = True
+        self._resume.set()
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def is_paused(self) -> bool:
+        return not self._resume.is_set()
+
+    def _progress(self, index: int, total: int) -> bool:
+        if not self._resume.is_set():
+            paused_at = time.perf_counter()
+            self._resume.wait()
+            # do not count the pause into the throughput
+            self._start += time.perf_counter() - paused_at
+        if self._cancel:
+            return False
+        now = time.perf_counter()
+        if index == total or now - self._last_emit >= PROGRESS_INTERVAL:
+            self._last_emit = now
+            self._emit_progress(self._base + index, now)
+        return True
+
+    def _emit_progress(self, index: int, now: float):
+        elapsed = now - self._start
+        throughput = index / elapsed if elapsed > 0 else 0.0
+        self.progress.emit(index, self._total, elapsed, throughput)
+
+    def run(self):
+        try:
+            programs = [compile_script(path) for path, _ in self.stages]
+        except OSError as e:
+            self.failed.emit(str(e))
+            return
+        self._total = sum(p.apdu_count for p in programs)
+        self._base = 0
+        self._start = time.perf_counter()
+
+        for (path, banner), program in zip(self.stages, programs):
+            if not self.scc.run_script(path=path, progress=self._progress):
+                if self._cancel:
+                    self.failed.emit("Script loading cancelled")
+                else:
+                    self.failed.emit("Error loading Script {}!".format(path))
+                return
+            self.scc.textEdit.summary(banner)
+            self._base += program.apdu_count
+            self.stage_done.emit(path)
+        self._emit_progress(self._base, time.perf_counter())